@@ -0,0 +1,53 @@
+"""
+SHARED ADMIN TOKENS
+---------------------------------------------------------
+Admin tokens used to live in a Python set, so a token handed out
+by one server process meant nothing to the next one. With
+run_server.py pre-forking several workers (and replacing them on
+a rolling restart) the set moves into a tiny SQLite file under
+data/, shared by every process and surviving restarts.
+
+Drop-in for the old set: `token in TOKENS`, add(), discard().
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+TOKENS_FILE = Path(__file__).parent / "data" / "admin_tokens.sqlite"
+
+
+class SharedTokens:
+    def __init__(self, path=TOKENS_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._inherited = []
+        self._connect()
+
+    def _connect(self):
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS tokens (token TEXT PRIMARY KEY, created REAL NOT NULL)")
+
+    def reopen(self):
+        """New connection in a forked child; the parent's is kept open (never closed here) but unused."""
+        self._inherited.append(self._db)
+        self._lock = threading.Lock()
+        self._connect()
+
+    def __contains__(self, token):
+        if not token:
+            return False
+        with self._lock:
+            return self._db.execute("SELECT 1 FROM tokens WHERE token = ?", (token,)).fetchone() is not None
+
+    def add(self, token):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR IGNORE INTO tokens VALUES (?, ?)", (token, time.time()))
+
+    def discard(self, token):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM tokens WHERE token = ?", (token,))
@@ -1,5 +1,5 @@
 from flask import Flask, request, jsonify, send_from_directory, render_template
-import os, shutil
+import os, shutil, threading, time, uuid
 from werkzeug.utils import secure_filename
 
 app = Flask(__name__, static_folder='static', template_folder='templates')
@@ -8,6 +8,114 @@ UPLOAD_FOLDER = os.path.join(app.static_folder, 'logos')
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 ADMIN_PASSWORD = "password"  # change this
+LOGO_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.svg', '.gif')
+REVALIDATE_SECONDS = 2  # how often /logos re-checks directory mtimes
+
+
+class LogoTreeIndex:
+    """Cached listing of UPLOAD_FOLDER.
+
+    Each directory is re-listed only when its mtime changes, and mtimes are
+    re-checked at most every REVALIDATE_SECONDS. Writers that know what they
+    changed call add_file/remove_file/invalidate instead of forcing a rescan.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.boot_id = uuid.uuid4().hex[:8]
+        self.version = 0
+        self._dirs = {}  # dir path -> {'mtime': ns, 'files': {name: entry}, 'subdirs': [paths]}
+        self._checked = 0.0
+        self._sorted = None
+        self._lock = threading.Lock()
+
+    def _entry(self, dirpath, name):
+        rel_path = os.path.relpath(os.path.join(dirpath, name), app.static_folder).replace("\\", "/")
+        stem = os.path.splitext(name)[0]
+        return {
+            'batch': os.path.basename(dirpath),
+            'brand': stem.rsplit('_logo', 1)[0].replace('_', ' '),
+            'filename': name,
+            'url': f'/static/{rel_path}',
+        }
+
+    def _scan(self, dirpath):
+        try:
+            mtime = os.stat(dirpath).st_mtime_ns
+        except FileNotFoundError:
+            self._dirs.pop(dirpath, None)
+            return True
+        known = self._dirs.get(dirpath)
+        changed = known is None or known['mtime'] != mtime
+        if changed:
+            files, subdirs = {}, []
+            with os.scandir(dirpath) as it:
+                for e in it:
+                    if e.is_dir():
+                        subdirs.append(e.path)
+                    elif e.name.lower().endswith(LOGO_EXTENSIONS):
+                        files[e.name] = self._entry(dirpath, e.name)
+            for gone in set(known['subdirs'] if known else []) - set(subdirs):
+                self._drop(gone)
+            known = self._dirs[dirpath] = {'mtime': mtime, 'files': files, 'subdirs': subdirs}
+        for sub in known['subdirs']:
+            changed = self._scan(sub) or changed
+        return changed
+
+    def _drop(self, dirpath):
+        node = self._dirs.pop(dirpath, None)
+        for sub in (node or {}).get('subdirs', []):
+            self._drop(sub)
+
+    def _bump(self):
+        self.version += 1
+        self._sorted = None
+
+    def refresh(self, force=False):
+        with self._lock:
+            now = time.monotonic()
+            if not force and now - self._checked < REVALIDATE_SECONDS:
+                return
+            self._checked = now
+            if self._scan(self.root):
+                self._bump()
+
+    def add_file(self, path):
+        dirpath, name = os.path.split(path)
+        with self._lock:
+            node = self._dirs.get(dirpath)
+            if node is None:
+                self._checked = 0.0  # unknown folder: let the next read discover it
+                return
+            node['files'][name] = self._entry(dirpath, name)
+            node['mtime'] = os.stat(dirpath).st_mtime_ns
+            self._bump()
+
+    def remove_file(self, path):
+        dirpath, name = os.path.split(path)
+        with self._lock:
+            node = self._dirs.get(dirpath)
+            if node and node['files'].pop(name, None):
+                node['mtime'] = os.stat(dirpath).st_mtime_ns
+                self._bump()
+
+    def invalidate(self):
+        with self._lock:
+            self._checked = 0.0
+
+    def etag(self):
+        return f'{self.boot_id}-{self.version}'
+
+    def listing(self):
+        self.refresh()
+        with self._lock:
+            if self._sorted is None:
+                entries = [e for node in self._dirs.values() for e in node['files'].values()]
+                self._sorted = sorted(entries, key=lambda x: (x['brand'].lower(), x['batch'], x['filename']))
+            return self._sorted
+
+
+LOGO_INDEX = LogoTreeIndex(UPLOAD_FOLDER)
 
 @app.route('/')
 def index():
@@ -15,18 +123,23 @@ def index():
 
 @app.route('/logos')
 def get_logos():
-    logos = []
-    for root, _, files in os.walk(UPLOAD_FOLDER):
-        for f in files:
-            if f.lower().endswith(('.png', '.jpg', '.jpeg', '.svg', '.gif')):
-                full_path = os.path.join(root, f)
-                rel_path = os.path.relpath(full_path, app.static_folder)
-                brand = os.path.basename(os.path.dirname(full_path))
-                logos.append({
-                    'brand': brand,
-                    'url': f'/static/{rel_path.replace("\\", "/")}'
-                })
-    return jsonify(sorted(logos, key=lambda x: x['brand'].lower()))
+    """Cached listing. Optional ?batch=<folder>&page=<n>&per_page=<n>; total in X-Total-Count."""
+    logos = LOGO_INDEX.listing()
+    batch = request.args.get('batch')
+    if batch:
+        logos = [x for x in logos if x['batch'] == batch]
+    total = len(logos)
+    per_page = request.args.get('per_page', type=int)
+    page = max(request.args.get('page', 1, type=int), 1)
+    if per_page:
+        per_page = min(max(per_page, 1), 1000)
+        logos = logos[(page - 1) * per_page: page * per_page]
+
+    response = jsonify(logos)
+    response.headers['X-Total-Count'] = str(total)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.set_etag(f'{LOGO_INDEX.etag()}-{batch or ""}-{page}-{per_page or ""}')
+    return response.make_conditional(request)
 
 @app.route('/upload', methods=['POST'])
 def upload_logo():
@@ -40,6 +153,7 @@ def upload_logo():
         filename = secure_filename(file.filename)
         target_path = os.path.join(UPLOAD_FOLDER, filename)
         file.save(target_path)
+        LOGO_INDEX.add_file(target_path)
     return jsonify({'message': 'Uploaded successfully'})
 
 @app.route('/add_brand', methods=['POST'])
@@ -54,6 +168,7 @@ def add_brand():
 
     new_folder = os.path.join(UPLOAD_FOLDER, brand.replace(" ", "_"))
     os.makedirs(new_folder, exist_ok=True)
+    LOGO_INDEX.invalidate()
     return jsonify({'message': f'Brand {brand} added'})
 
 @app.route('/rename_brand', methods=['POST'])
@@ -66,6 +181,7 @@ def rename_brand():
     new = os.path.join(UPLOAD_FOLDER, data.get('newName', '').replace(" ", "_"))
     if os.path.exists(old):
         os.rename(old, new)
+        LOGO_INDEX.invalidate()
         return jsonify({'message': 'Renamed successfully'})
     return jsonify({'error': 'Old brand not found'}), 404
 
@@ -78,6 +194,7 @@ def delete_brand():
     brand = os.path.join(UPLOAD_FOLDER, data.get('brand', '').replace(" ", "_"))
     if os.path.exists(brand):
         shutil.rmtree(brand)
+        LOGO_INDEX.invalidate()
         return jsonify({'message': 'Deleted successfully'})
     return jsonify({'error': 'Brand not found'}), 404
 
@@ -91,6 +208,7 @@ def delete_logo():
     abs_path = os.path.join(app.static_folder, rel_path)
     if os.path.exists(abs_path):
         os.remove(abs_path)
+        LOGO_INDEX.remove_file(os.path.abspath(abs_path))
         return jsonify({'message': 'Deleted successfully'})
     return jsonify({'error': 'Logo not found'}), 404
 
@@ -0,0 +1,226 @@
+"""
+HOT-PATH MICROBENCHMARKS
+---------------------------------------------------------
+Times the pure-Python helpers that run on every listing, match
+and serve, on synthetic inputs from 10^2 to 10^6 items:
+
+  group_by_brand      one call over N filenames
+  clean_brand_key     N calls
+  clean_filename      N calls
+  get_file_extension  N calls (mixed direct / Wikipedia URLs)
+  safe_join           N calls
+  find_best_match     per-query time against a master of N rows
+                      (exact, contains, fuzzy and missing names)
+
+For each function it fits the slope of log(time) against log(N):
+~1.0 is linear, anything above 1 + --slope-tolerance is flagged
+as super-linear. Results are compared with the stored run and a
+slowdown beyond --tolerance at any size is flagged as a
+regression. Either flag exits 1.
+
+    python benchmarks/bench_hot_paths.py --save          # record results
+    python benchmarks/bench_hot_paths.py                 # compare
+    python benchmarks/bench_hot_paths.py --only find_best_match --max-size 100000
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+# The editor creates its logo root and SQLite stores at import; keep them in a temp root that goes
+# away with the process, and skip the reconcile/pack threads it would start on that catalog.
+_SCRATCH = tempfile.TemporaryDirectory(prefix="logo_bench_")
+os.environ["STATIC_LOGOS_ROOT"] = os.path.join(_SCRATCH.name, "logos")
+os.environ["LOGO_DATA_DIR"] = os.path.join(_SCRATCH.name, "data")
+os.environ["LOGO_EDITOR_PRELOAD"] = "1"
+
+RESULTS_FILE = Path(__file__).with_name("bench_hot_paths.json")
+SIZES = (10**2, 10**3, 10**4, 10**5, 10**6)
+MATCH_MAX_SIZE = 10**5      # find_best_match also builds a trigram index over the master
+MIN_SAMPLE_SECONDS = 0.2    # repeat small runs until they are long enough to time
+MAX_REPEATS = 5
+SLOPE_TOLERANCE = 0.25
+TOLERANCE = 0.50            # microbenchmarks are noisy; flag only clear slowdowns
+NOISE_FLOOR = 0.001         # runs faster than 1 ms never count as regressions
+
+
+# ---------- synthetic inputs ----------
+def brand_names(n, seed=0):
+    rng = random.Random(seed)
+    syllables = ["ka", "lo", "mi", "ra", "tek", "on", "vis", "ta", "nor", "el", "qu", "ix", "sun", "bra"]
+    words = ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))).title() for _ in range(max(n // 3, 50))]
+    suffixes = ["", "", " Inc", " Co.", " Group", " & Sons", " Bank", " Foods"]
+    return [f"{rng.choice(words)} {rng.choice(words)}{rng.choice(suffixes)} {i}" for i in range(n)]
+
+
+def filenames(n):
+    names = [f"{b.replace(' ', '_')}_logo{i % 3 + 1 if i % 3 else ''}.png" for i, b in enumerate(brand_names(n))]
+    random.Random(1).shuffle(names)
+    return names
+
+
+def urls(n):
+    rng = random.Random(2)
+    out = []
+    for i in range(n):
+        kind = i % 4
+        if kind == 0:
+            out.append(f"https://cdn.example.com/brands/{i}/logo-final.png?v={rng.randint(1, 99)}")
+        elif kind == 1:
+            out.append(f"https://upload.wikimedia.org/wikipedia/commons/thumb/a/ab/Logo_{i}.svg/440px-Logo_{i}.svg.png")
+        elif kind == 2:
+            out.append(f"https://en.wikipedia.org/wiki/File:Logo_{i}.svg")
+        else:
+            out.append(f"https://www.example.org/assets/img/{''.join(rng.choices(string.ascii_lowercase, k=12))}")
+    return out
+
+
+def master_rows(n):
+    return [{"Brand": b, "Brand_Lower": b.lower(), "Logo1": "", "Logo2": "", "Logo3": ""} for b in brand_names(n)]
+
+
+def match_queries(rows):
+    rng = random.Random(3)
+    last = rows[-1]["Brand"]
+    queries = [last, last.upper()]                              # exact (worst case: end of the list)
+    queries += [rows[len(rows) // 2]["Brand"].split(" ")[0]]     # contains
+    typo = list(rows[-2]["Brand"])
+    typo[1] = "z"
+    queries += ["".join(typo)]                                  # fuzzy
+    queries += ["".join(rng.choices(string.ascii_lowercase, k=10)) for _ in range(2)]  # not found
+    return queries
+
+
+# ---------- benchmarks: setup(n) -> (callable, units of work) ----------
+def bench_group_by_brand(n):
+    from logo_preview_editor import group_by_brand
+    names = filenames(n)
+    return (lambda: group_by_brand(names)), n
+
+
+def bench_clean_brand_key(n):
+    from logo_preview_editor import clean_brand_key
+    names = brand_names(n)
+    return (lambda: [clean_brand_key(b) for b in names]), n
+
+
+def bench_clean_filename(n):
+    from logo_lookup_multi import clean_filename
+    names = brand_names(n)
+    return (lambda: [clean_filename(b) for b in names]), n
+
+
+def bench_get_file_extension(n):
+    from logo_lookup_multi import get_file_extension
+    links = urls(n)
+    return (lambda: [get_file_extension(u) for u in links]), n
+
+
+def bench_safe_join(n):
+    from logo_preview_editor import STATIC_LOGOS_ROOT, safe_join
+    names = filenames(n)
+    return (lambda: [safe_join(STATIC_LOGOS_ROOT, "batch_bench", fn) for fn in names]), n
+
+
+def bench_find_best_match(n):
+    from logo_lookup_multi import find_best_match
+    from brand_search import index_for
+    rows = master_rows(n)
+    index_for(rows)  # built once per master in real runs; time the queries
+    queries = match_queries(rows)
+    return (lambda: [find_best_match(q, rows) for q in queries]), len(queries)
+
+
+BENCHMARKS = {
+    "group_by_brand": (bench_group_by_brand, None),
+    "clean_brand_key": (bench_clean_brand_key, None),
+    "clean_filename": (bench_clean_filename, None),
+    "get_file_extension": (bench_get_file_extension, None),
+    "safe_join": (bench_safe_join, None),
+    "find_best_match": (bench_find_best_match, MATCH_MAX_SIZE),
+}
+
+
+# ---------- timing & analysis ----------
+def measure(fn):
+    """Best-of wall time for one call of `fn`, repeating short calls until the sample is long enough."""
+    best, spent, repeats = float("inf"), 0.0, 0
+    while repeats < MAX_REPEATS and (repeats == 0 or spent < MIN_SAMPLE_SECONDS):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best, spent, repeats = min(best, elapsed), spent + elapsed, repeats + 1
+    return best
+
+
+def slope(points):
+    """Least-squares slope of log(seconds) vs log(n)."""
+    xs = [math.log(n) for n, _ in points]
+    ys = [math.log(max(t, 1e-9)) for _, t in points]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    den = sum((x - mx) ** 2 for x in xs)
+    return sum((x - mx) * (y - my) for x, y in zip(xs, ys)) / den if den else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks for the hot pure-Python helpers.")
+    parser.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS))
+    parser.add_argument("--max-size", type=int, default=max(SIZES))
+    parser.add_argument("--results", type=Path, default=RESULTS_FILE)
+    parser.add_argument("--save", action="store_true", help="store this run as the reference")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--slope-tolerance", type=float, default=SLOPE_TOLERANCE)
+    args = parser.parse_args()
+
+    stored = json.loads(args.results.read_text(encoding="utf-8")) if args.results.exists() else {}
+    results, failures = {}, []
+    for name in args.only or BENCHMARKS:
+        setup, cap = BENCHMARKS[name]
+        sizes = [n for n in SIZES if n <= min(args.max_size, cap or args.max_size)]
+        print(f"\n⏱️  {name}")
+        points = []
+        for n in sizes:
+            fn, units = setup(n)
+            seconds = measure(fn)
+            points.append((n, seconds))
+            before = stored.get(name, {}).get(str(n))
+            note = ""
+            if before is not None:
+                change = seconds / before - 1 if before else 0.0
+                note = f"  {change:+.0%} vs stored"
+                if change > args.tolerance and seconds > NOISE_FLOOR:
+                    failures.append(f"{name} @ {n:,}: {seconds * 1000:.2f} ms vs stored {before * 1000:.2f} ms")
+            print(f"   n={n:>9,}  {seconds * 1000:10.2f} ms  {seconds / units * 1e9:9.0f} ns/unit{note}")
+        results[name] = {str(n): round(t, 6) for n, t in points}
+        if len(points) >= 2:
+            # tiny sizes are dominated by fixed costs; fit from 10^3 up when we have it
+            fitted = [p for p in points if p[0] >= 1000] if len(points) > 2 else points
+            s = slope(fitted if len(fitted) >= 2 else points)
+            flag = s > 1 + args.slope_tolerance
+            print(f"   scaling slope {s:.2f} {'❌ super-linear' if flag else '✓'}")
+            if flag:
+                failures.append(f"{name}: super-linear scaling (slope {s:.2f})")
+            results[name]["slope"] = round(s, 3)
+
+    if args.save:
+        merged = {**stored, **results}
+        args.results.write_text(json.dumps(merged, indent=2, sort_keys=True), encoding="utf-8")
+        print(f"\n💾 Results saved to {args.results}")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("\n✅ No super-linear scaling or regression")
+
+
+if __name__ == "__main__":
+    main()
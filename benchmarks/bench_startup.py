@@ -0,0 +1,81 @@
+"""
+STARTUP BUDGET CHECK
+---------------------------------------------------------
+Runs the quick-lookup path of logo_lookup_multi.py under
+`python -X importtime` and fails (exit 1) when:
+  - the total import time of the script is over budget
+  - the whole lookup takes longer than its wall-clock budget
+  - a heavy module (pandas, openpyxl, requests, PIL) gets imported
+
+Run from the repo root (the master-sheet cache is warmed first):
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --import-budget-ms 50 --runs 10
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("pandas", "openpyxl", "requests", "PIL")
+IMPORT_BUDGET_MS = 100
+LOOKUP_BUDGET_MS = 500
+
+
+def run_lookup(brand):
+    cmd = [sys.executable, "-X", "importtime", "logo_lookup_multi.py", "--lookup", brand]
+    start = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=ROOT, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise SystemExit(f"❌ lookup failed:\n{proc.stderr[-2000:]}")
+    modules, total_ms = set(), 0.0
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        modules.add(name.strip())
+        if not name[1:].startswith(" "):  # top-level import: cumulative covers its children
+            total_ms += int(cumulative) / 1000
+    return wall_ms, total_ms, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check quick-lookup startup stays under budget.")
+    parser.add_argument("--brand", default="Oreo")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--import-budget-ms", type=float, default=IMPORT_BUDGET_MS)
+    parser.add_argument("--lookup-budget-ms", type=float, default=LOOKUP_BUDGET_MS)
+    args = parser.parse_args()
+
+    run_lookup(args.brand)  # warm the master-sheet cache and the OS file cache
+    walls, imports, heavy = [], [], set()
+    for _ in range(args.runs):
+        wall_ms, import_ms, modules = run_lookup(args.brand)
+        walls.append(wall_ms)
+        imports.append(import_ms)
+        heavy |= {m for m in modules if m.split(".")[0] in HEAVY_MODULES}
+
+    import_ms, wall_ms = statistics.median(imports), statistics.median(walls)
+    print(f"📦 imports (-X importtime):  {import_ms:7.1f} ms (budget {args.import_budget_ms:.0f} ms)")
+    print(f"⏱️  --lookup {args.brand!r}:    {wall_ms:7.1f} ms (budget {args.lookup_budget_ms:.0f} ms)")
+
+    failures = []
+    if import_ms > args.import_budget_ms:
+        failures.append("import time over budget")
+    if wall_ms > args.lookup_budget_ms:
+        failures.append("lookup wall time over budget")
+    if heavy:
+        failures.append(f"heavy modules imported: {', '.join(sorted(heavy))}")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print("✅ Startup within budget")
+
+
+if __name__ == "__main__":
+    main()
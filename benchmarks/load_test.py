@@ -0,0 +1,313 @@
+"""
+EDITOR LOAD TEST
+---------------------------------------------------------
+Generates synthetic batches (10 / 1,000 / 50,000 logos by
+default) under a temporary STATIC_LOGOS_ROOT (and LOGO_DATA_DIR,
+so marks, SQLite stores and caches stay out of data/), starts the editor
+under waitress at several thread counts and drives it with
+concurrent clients (one process each):
+
+  index       GET  /
+  api_logos   GET  /api/logos/<batch>
+  serve_logo  GET  /logos/<batch>/<random file>
+  add_brand   POST /add_brand (admin, small PNG upload)
+
+For every scenario x batch size x thread count it reports
+throughput and p50/p99 latency, then compares them with the
+saved baseline and exits 1 on a regression beyond --tolerance -
+or when there is no baseline to compare with (--no-compare only
+prints the numbers).
+
+Baselines are machine-specific - record one on the machine that
+runs the check:
+    python benchmarks/load_test.py --save-baseline
+    python benchmarks/load_test.py                       # compare
+    python benchmarks/load_test.py --sizes 10 1000 --threads 8 --duration 3 --no-compare
+    python benchmarks/load_test.py --packs               # serve through logo_pack
+"""
+
+import argparse
+import http.client
+import io
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+BASELINE_FILE = Path(__file__).with_name("load_baseline.json")
+SIZES = (10, 1000, 50000)
+THREADS = (4, 16)
+CLIENTS = 8
+DURATION = 5.0
+TOLERANCE = 0.30
+SCENARIOS = ("index", "api_logos", "serve_logo", "add_brand")
+ADMIN_PASSWORD = "aya900"  # logo_preview_editor.ADMIN_PASSWORD
+VARIANTS = 16              # distinct synthetic images, reused across files
+LOAD_BRAND = "LoadTest"    # add_brand uploads; removed after each run
+
+SERVER = """
+import sys
+from waitress import serve
+import logo_preview_editor as editor
+serve(editor.app, host="127.0.0.1", port=int(sys.argv[1]), threads=int(sys.argv[2]), _quiet=True)
+"""
+
+
+# ---------- synthetic data ----------
+def variant_images():
+    from PIL import Image
+
+    images = []
+    for i in range(VARIANTS):
+        buf = io.BytesIO()
+        Image.new("RGB", (160, 80), ((i * 53) % 256, (i * 97) % 256, (i * 31) % 256)).save(buf, "PNG")
+        images.append(buf.getvalue())
+    return images
+
+
+def generate(root, sizes):
+    """batch_load_<n>/Brand_<i>_logo<k>.png, two logos per brand, with a pre-filled metadata sidecar."""
+    from logo_meta import meta_for, probe_image
+
+    images = variant_images()
+    probe_dir = Path(root) / ".probe"
+    probe_dir.mkdir(parents=True, exist_ok=True)
+    probed = []
+    for i, data in enumerate(images):
+        path = probe_dir / f"v{i}.png"
+        path.write_bytes(data)
+        probed.append(probe_image(path))
+    shutil.rmtree(probe_dir)
+
+    batches = {}
+    for size in sizes:
+        batch = f"batch_load_{size}"
+        batch_dir = Path(root) / batch
+        batch_dir.mkdir(parents=True, exist_ok=True)
+        rows = []
+        for i in range(size):
+            name = f"Brand_{i // 2:05d}_logo{i % 2 + 1}.png"
+            path = batch_dir / name
+            path.write_bytes(images[i % VARIANTS])
+            st = path.stat()
+            rows.append({**probed[i % VARIANTS], "filename": name, "size": st.st_size, "mtime_ns": st.st_mtime_ns})
+        meta_for(batch_dir).put_many(rows)
+        batches[size] = (batch, sorted(p.name for p in batch_dir.iterdir() if p.suffix == ".png"))
+        print(f"   🗂️  {batch}: {size} files")
+    return batches, images[0]
+
+
+def remove_uploads(root, batch):
+    for p in (Path(root) / batch).glob(f"{LOAD_BRAND}*"):
+        p.unlink()
+
+
+# ---------- server ----------
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(root, threads, packs, log_path):
+    port = free_port()
+    env = {**os.environ, "STATIC_LOGOS_ROOT": str(root / "logos"), "LOGO_DATA_DIR": str(root / "data"),
+           "SLOW_REQUEST_MS": "1e9"}
+    if packs:
+        env["LOGO_PACKS"] = "1"
+    log = open(log_path, "ab")
+    proc = subprocess.Popen([sys.executable, "-c", SERVER, str(port), str(threads)],
+                            cwd=ROOT, env=env, stdout=log, stderr=log)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"❌ server exited, see {log_path}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+            conn.request("GET", "/")
+            if conn.getresponse().status == 200:
+                return proc, port
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise SystemExit("❌ server did not come up within 60 s")
+
+
+def admin_token(port):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    conn.request("POST", "/admin_login", body=json.dumps({"password": ADMIN_PASSWORD}),
+                 headers={"Content-Type": "application/json"})
+    return json.loads(conn.getresponse().read())["token"]
+
+
+def warm_up(port, batch_names):
+    """One untimed pass over the listing routes, so first-hit costs don't land in a p99."""
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    for path in ["/"] + [f"/api/logos/{b}" for b in batch_names]:
+        conn.request("GET", path)
+        conn.getresponse().read()
+
+
+# ---------- clients ----------
+def multipart(fields, filename, data):
+    boundary = uuid.uuid4().hex
+    parts = [f'--{boundary}\r\nContent-Disposition: form-data; name="{k}"\r\n\r\n{v}\r\n'.encode()
+             for k, v in fields.items()]
+    parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+                 f'Content-Type: image/png\r\n\r\n'.encode() + data + b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def build_request(scenario, batch, files, token, upload, rng, client_id, n):
+    if scenario == "index":
+        return "GET", "/", None, {}
+    if scenario == "api_logos":
+        return "GET", f"/api/logos/{batch}", None, {}
+    if scenario == "serve_logo":
+        return "GET", f"/logos/{batch}/{rng.choice(files)}", None, {}
+    body, ctype = multipart({"brand": f"{LOAD_BRAND} {client_id} {n}", "batch": batch}, "upload.png", upload)
+    return "POST", "/add_brand", body, {"Content-Type": ctype, "X-Admin-Token": token}
+
+
+def run_client(port, scenario, batch, files, token, upload, duration, client_id):
+    """One client process: back-to-back requests on a keep-alive connection for `duration` seconds."""
+    rng = random.Random(client_id)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    latencies, errors, n = [], 0, 0
+    end = time.perf_counter() + duration
+    while True:
+        start = time.perf_counter()
+        if start >= end:
+            break
+        method, path, body, headers = build_request(scenario, batch, files, token, upload, rng, client_id, n)
+        try:
+            conn.request(method, path, body=body, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            errors += resp.status >= 400
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+        latencies.append(time.perf_counter() - start)
+        n += 1
+    return latencies, errors
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def drive(pool, port, scenario, batch, files, token, upload, clients, duration):
+    futures = [pool.submit(run_client, port, scenario, batch, files, token, upload, duration, c)
+               for c in range(clients)]
+    latencies, errors = [], 0
+    for f in futures:
+        lat, err = f.result()
+        latencies.extend(lat)
+        errors += err
+    latencies.sort()
+    return {
+        "rps": round(len(latencies) / duration, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        "requests": len(latencies),
+        "errors": errors,
+    }
+
+
+# ---------- baseline ----------
+def compare(results, baseline, tolerance):
+    failures = []
+    for key, now in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        if now["rps"] < base["rps"] * (1 - tolerance):
+            failures.append(f"{key}: throughput {now['rps']} req/s < baseline {base['rps']}")
+        if now["p99_ms"] > base["p99_ms"] * (1 + tolerance):
+            failures.append(f"{key}: p99 {now['p99_ms']} ms > baseline {base['p99_ms']}")
+        if now["errors"] and not base.get("errors"):
+            failures.append(f"{key}: {now['errors']} errors (baseline had none)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the logo editor against synthetic batches.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--threads", type=int, nargs="+", default=list(THREADS), help="waitress thread counts")
+    parser.add_argument("--clients", type=int, default=CLIENTS, help="concurrent client processes")
+    parser.add_argument("--duration", type=float, default=DURATION, help="seconds per scenario")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    parser.add_argument("--packs", action="store_true", help="run the editor with LOGO_PACKS=1")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--no-compare", action="store_true", help="just print the numbers, no baseline check")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed regression (0.3 = 30%%)")
+    parser.add_argument("--keep", action="store_true", help="keep the synthetic root for inspection")
+    args = parser.parse_args()
+
+    root = Path(tempfile.mkdtemp(prefix="logo_load_"))
+    log_path = root / "server.log"
+    print(f"📂 Generating synthetic batches in {root}")
+    batches, upload = generate(root / "logos", args.sizes)
+
+    results = {}
+    try:
+        with ProcessPoolExecutor(max_workers=args.clients) as pool:
+            for threads in args.threads:
+                proc, port = start_server(root, threads, args.packs, log_path)
+                try:
+                    token = admin_token(port)
+                    warm_up(port, [batches[size][0] for size in args.sizes])
+                    print(f"\n🚀 waitress threads={threads}, clients={args.clients}, {args.duration:g}s per run")
+                    print(f"   {'scenario':<11} {'files':>6} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+                    for size in args.sizes:
+                        batch, files = batches[size]
+                        for scenario in args.scenarios:
+                            stats = drive(pool, port, scenario, batch, files, token, upload,
+                                          args.clients, args.duration)
+                            if scenario == "add_brand":
+                                remove_uploads(root / "logos", batch)
+                            results[f"{scenario}/{size}/t{threads}"] = stats
+                            print(f"   {scenario:<11} {size:>6} {stats['rps']:>9} {stats['p50_ms']:>9} "
+                                  f"{stats['p99_ms']:>9} {stats['errors']:>7}")
+                finally:
+                    proc.terminate()
+                    proc.wait(timeout=30)
+    finally:
+        if not args.keep:
+            shutil.rmtree(root, ignore_errors=True)
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True), encoding="utf-8")
+        print(f"\n💾 Baseline saved to {args.baseline}")
+        return
+    if args.no_compare:
+        return
+    if not args.baseline.exists():
+        sys.exit(f"\n❌ No baseline at {args.baseline} - run with --save-baseline first (or pass --no-compare)")
+    failures = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        sys.exit(1)
+    print(f"\n✅ No regression beyond {args.tolerance:.0%} of the baseline")
+
+
+if __name__ == "__main__":
+    main()
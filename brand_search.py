@@ -0,0 +1,116 @@
+"""
+FUZZY BRAND SEARCH
+---------------------------------------------------------
+Ranked fuzzy matching of brand names against the master sheet:
+"Rapid7", "Amalie Oil Company" or "Childrens National Hospital"
+still find their row instead of coming back NOT_FOUND.
+
+Two inverted indexes keep it fast on thousands of brands:
+  - word tokens  -> brands containing that word
+  - trigrams     -> brands containing that 3-character slice
+Only brands sharing at least one trigram with the query are
+scored; the score blends trigram similarity (Dice) with word
+overlap, so both typos and re-ordered words rank well.
+
+USAGE:
+    from brand_search import BrandSearchIndex
+    index = BrandSearchIndex([row['Brand'] for row in master])
+    index.top_k("rapid seven", k=5)  -> [(score, position, name), ...]
+
+    python brand_search.py "Amalie Oil" "Vanderbilt Univ"
+"""
+
+import re
+import sys
+from collections import Counter
+
+TRIGRAM_WEIGHT = 0.7
+TOKEN_WEIGHT = 0.3
+DEFAULT_K = 5
+
+
+def normalize(text):
+    text = str(text).lower().replace("&", " and ").replace("'", "").replace("\u2019", "")
+    return re.sub(r"[^0-9a-z]+", " ", text).strip()
+
+
+def tokens(text):
+    return set(normalize(text).split())
+
+
+def trigrams(text):
+    """Trigrams of the name as written and with spaces squeezed out ("Rapid7" ~ "Rapid 7")."""
+    norm = normalize(text)
+    grams = set()
+    for form in (norm, norm.replace(" ", "")):
+        padded = f"  {form} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class BrandSearchIndex:
+    """Token + trigram inverted index over a list of names; positions refer back into that list."""
+
+    def __init__(self, names):
+        self.names = [str(n) for n in names]
+        self._grams = []
+        self._tokens = []
+        self._by_gram = {}
+        self._by_token = {}
+        for pos, name in enumerate(self.names):
+            grams, toks = trigrams(name), tokens(name)
+            self._grams.append(len(grams))
+            self._tokens.append(toks)
+            for g in grams:
+                self._by_gram.setdefault(g, []).append(pos)
+            for t in toks:
+                self._by_token.setdefault(t, []).append(pos)
+
+    def __len__(self):
+        return len(self.names)
+
+    def top_k(self, query, k=DEFAULT_K, min_score=0.0):
+        """Best `k` (score, position, name) triples, highest score first."""
+        q_grams, q_tokens = trigrams(query), tokens(query)
+        if not q_grams:
+            return []
+        shared = Counter()
+        for g in q_grams:
+            shared.update(self._by_gram.get(g, ()))
+        for t in q_tokens:  # whole-word hits are candidates even when they share few trigrams
+            for pos in self._by_token.get(t, ()):
+                shared.setdefault(pos, 0)
+
+        scored = []
+        for pos, common in shared.items():
+            dice = 2 * common / (len(q_grams) + self._grams[pos])
+            toks = self._tokens[pos]
+            overlap = len(q_tokens & toks) / len(q_tokens | toks) if q_tokens or toks else 0.0
+            score = TRIGRAM_WEIGHT * dice + TOKEN_WEIGHT * overlap
+            if score >= min_score:
+                scored.append((round(score, 4), pos, self.names[pos]))
+        scored.sort(key=lambda x: (-x[0], x[2]))
+        return scored[:k]
+
+
+_CACHE = {}
+
+
+def index_for(rows, key="Brand"):
+    """Shared index for a master-row list (built once per list object)."""
+    cached = _CACHE.get(id(rows))
+    if cached is None or cached[0] is not rows:
+        _CACHE.clear()
+        cached = _CACHE[id(rows)] = (rows, BrandSearchIndex(row[key] for row in rows))
+    return cached[1]
+
+
+if __name__ == "__main__":
+    from logo_lookup_multi import CLIENT_LOGO_FILE, load_master
+
+    master = load_master(CLIENT_LOGO_FILE)
+    index = index_for(master)
+    for query in sys.argv[1:]:
+        print(f"\n🔎 {query}")
+        for score, _, name in index.top_k(query):
+            print(f"   {score:.2f}  {name}")
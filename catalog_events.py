@@ -0,0 +1,134 @@
+"""
+CATALOG EVENT LOG
+---------------------------------------------------------
+Every change the editor makes to a batch (logos added, removed
+or renamed, marks toggled) is appended to a small SQLite log
+(data/catalog_events.sqlite). The row id is the CATALOG VERSION:
+it only ever goes up, so a client that knows version V can ask
+for "everything in batch X after V" - after a reconnect, a
+sleep, or a server restart.
+
+Live delivery: one watcher thread per process picks new rows
+out of the log (its own writes immediately, other processes'
+within POLL_SECONDS) into an in-memory ring and wakes every
+waiting stream, so a hundred open SSE streams cost one query,
+not a hundred.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from pathlib import Path
+
+EVENTS_FILE = Path(__file__).parent / "data" / "catalog_events.sqlite"
+RING_SIZE = 4096        # recent events served from memory
+RETAIN = 100_000        # events kept on disk for catch-up
+PRUNE_EVERY = 1000
+POLL_SECONDS = 0.5      # picks up events written by other processes
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch   TEXT NOT NULL,
+    kind    TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    ts      REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_batch ON events (batch, version);
+"""
+
+
+class CatalogEvents:
+    def __init__(self, path=EVENTS_FILE):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._path = path
+        self._db = sqlite3.connect(str(path), check_same_thread=False, timeout=30)
+        self._db_lock = threading.Lock()
+        with self._db_lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+        self._cond = threading.Condition()
+        self._ring = deque(maxlen=RING_SIZE)
+        self._head = self._max_version()
+        self._floor = self._head  # every event newer than this is in the ring
+        self._watcher = None
+
+    def reopen(self):
+        """New connection in a forked child (run_server.py); the parent's is left open but unused."""
+        self._inherited = self._db
+        self._db = sqlite3.connect(str(self._path), check_same_thread=False, timeout=30)
+        self._db_lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._watcher = None
+
+    def _max_version(self):
+        with self._db_lock:
+            return self._db.execute("SELECT COALESCE(MAX(version), 0) FROM events").fetchone()[0]
+
+    def version(self):
+        """Current catalog version (read before listing a batch, so no later change is missed)."""
+        self._refresh()
+        return self._head
+
+    def publish(self, batch, kind, **payload):
+        """Append one change and wake local streams. Returns its version."""
+        with self._db_lock, self._db:
+            cur = self._db.execute("INSERT INTO events (batch, kind, payload, ts) VALUES (?, ?, ?, ?)",
+                                   (batch, kind, json.dumps(payload), time.time()))
+            version = cur.lastrowid
+            if version % PRUNE_EVERY == 0:
+                self._db.execute("DELETE FROM events WHERE version <= ?", (version - RETAIN,))
+        self._refresh()
+        return version
+
+    def _refresh(self):
+        """Move rows newer than the ring's head into the ring and notify waiters."""
+        with self._cond:
+            with self._db_lock:
+                rows = self._db.execute("SELECT version, batch, kind, payload FROM events WHERE version > ? "
+                                        "ORDER BY version", (self._head,)).fetchall()
+            if rows:
+                self._ring.extend((v, b, k, json.loads(p)) for v, b, k, p in rows)
+                self._head = rows[-1][0]
+                if len(self._ring) == self._ring.maxlen:
+                    self._floor = max(self._floor, self._ring[0][0] - 1)
+                self._cond.notify_all()
+
+    def _watch(self):
+        while True:
+            time.sleep(POLL_SECONDS)
+            self._refresh()
+
+    def _ensure_watcher(self):
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name="catalog-events", daemon=True)
+            self._watcher.start()
+
+    def since(self, batch, after):
+        """(events for `batch` after version `after`, head version), or (None, head) when the log no
+        longer reaches back that far and the client has to reload the batch."""
+        with self._cond:
+            head = self._head
+            if after > head:  # from a log that has since been reset
+                return None, head
+            if after >= self._floor:
+                return [(v, k, p) for v, b, k, p in self._ring if v > after and b == batch], head
+        with self._db_lock:
+            oldest = self._db.execute("SELECT COALESCE(MIN(version), 1) FROM events").fetchone()[0]
+            if after < oldest - 1:
+                return None, head
+            rows = self._db.execute("SELECT version, kind, payload FROM events WHERE batch = ? "
+                                    "AND version > ? AND version <= ? ORDER BY version",
+                                    (batch, after, head)).fetchall()
+        return [(v, k, json.loads(p)) for v, k, p in rows], head
+
+    def wait(self, batch, after, timeout):
+        """Block until something newer than `after` exists (or `timeout`), then return since()."""
+        self._ensure_watcher()
+        with self._cond:
+            if self._head <= after:
+                self._cond.wait(timeout)
+        return self.since(batch, after)
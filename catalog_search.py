@@ -0,0 +1,152 @@
+"""
+CATALOG-WIDE BRAND SEARCH
+---------------------------------------------------------
+The grid's search box only filters the open batch. This index
+covers every batch under static/logos at once, so "TD" or
+"Amazon" lists every batch holding that brand without opening
+them one by one.
+
+Each batch is a shard of brand groups (brand name + file names,
+normalized like brand_search.normalize) with two inverted
+indexes:
+  - trigrams -> brands whose text contains that 3-char slice;
+    intersecting the query's trigrams narrows a substring search
+    to a handful of candidates that are then checked directly
+  - a sorted word list, bisected for word-prefix search (used
+    alone for 1-2 character queries, where trigrams don't apply)
+
+A shard is rebuilt only when its batch folder's mtime changes
+(every add, delete, rename and sidecar write touches it), so
+searches stay in the millisecond range on 100k-file catalogs.
+
+Results rank exact brand > brand prefix > word prefix >
+substring and are grouped by batch.
+
+    python catalog_search.py "td" "amazon"
+"""
+
+import bisect
+import os
+import sys
+import threading
+
+from brand_search import normalize
+
+DEFAULT_LIMIT = 100
+EXACT, PREFIX, WORD_PREFIX, SUBSTRING = range(4)
+
+
+def _grams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class _Shard:
+    """Search structures for one batch's brand groups."""
+
+    def __init__(self, stamp, groups):
+        self.stamp = stamp
+        self.groups = groups
+        self.names = [normalize(g["brand"]) for g in groups]
+        # File names add whatever their stem carries beyond the brand; "\n" keeps matches inside one name.
+        self.texts = []
+        self.by_gram = {}
+        words = []
+        for pos, group in enumerate(groups):
+            parts = dict.fromkeys([self.names[pos]] + [normalize(os.path.splitext(fn)[0]) for fn in group["files"]])
+            self.texts.append("\n".join(p for p in parts if p))
+            grams = set()
+            for part in parts:
+                grams.update(_grams(part))
+            for g in grams:  # positions go in ascending order, once each
+                self.by_gram.setdefault(g, []).append(pos)
+            words.extend((w, pos) for w in set(" ".join(parts).split()))
+        words.sort()
+        self.words = words
+
+    def _word_prefix(self, q):
+        found = set()
+        i = bisect.bisect_left(self.words, (q, -1))
+        while i < len(self.words) and self.words[i][0].startswith(q):
+            found.add(self.words[i][1])
+            i += 1
+        return found
+
+    def _substring(self, q):
+        postings = sorted((self.by_gram.get(g, ()) for g in _grams(q)), key=len)
+        if not postings or not postings[0]:
+            return set()
+        found = set(postings[0])
+        for positions in postings[1:]:
+            found.intersection_update(positions)
+            if not found:
+                return found
+        return {pos for pos in found if q in self.texts[pos]}
+
+    def search(self, q):
+        """(rank, pos) for every brand group matching the normalized query."""
+        found = self._substring(q) if len(q) >= 3 else self._word_prefix(q)
+        ranked = []
+        for pos in found:
+            name = self.names[pos]
+            if name == q:
+                rank = EXACT
+            elif name.startswith(q):
+                rank = PREFIX
+            elif len(q) < 3 or any(w.startswith(q) for w in name.split()):
+                rank = WORD_PREFIX
+            else:
+                rank = SUBSTRING
+            ranked.append((rank, pos))
+        return ranked
+
+
+class CatalogSearch:
+    """One shard per batch; `sync` keeps the shards in step with the folders."""
+
+    def __init__(self):
+        self._shards = {}
+        self._lock = threading.Lock()
+
+    def sync(self, stamps, load_groups):
+        """`stamps` maps batch -> change token (folder mtime); `load_groups(batch)` lists its brand groups."""
+        with self._lock:
+            for batch in [b for b in self._shards if b not in stamps]:
+                del self._shards[batch]
+            for batch, stamp in stamps.items():
+                shard = self._shards.get(batch)
+                if shard is None or shard.stamp != stamp:
+                    self._shards[batch] = _Shard(stamp, load_groups(batch))
+
+    def __len__(self):
+        return sum(len(s.groups) for s in self._shards.values())
+
+    def search(self, query, limit=DEFAULT_LIMIT):
+        """Matches grouped by batch, best batches first. Returns (total matches, [{batch, brands}])."""
+        q = normalize(query)
+        if not q:
+            return 0, []
+        hits = []
+        for batch, shard in list(self._shards.items()):
+            for rank, pos in shard.search(q):
+                hits.append((rank, shard.names[pos], batch, shard.groups[pos]))
+        hits.sort(key=lambda h: (h[0], h[1], h[2]))
+        grouped = {}
+        for rank, _, batch, group in hits[:limit]:
+            grouped.setdefault(batch, []).append(
+                {"brand": group["brand"], "key": group["key"], "files": group["files"], "rank": rank})
+        return len(hits), [{"batch": batch, "brands": brands} for batch, brands in grouped.items()]
+
+
+if __name__ == "__main__":
+    import time
+    import logo_preview_editor as editor
+
+    started = time.perf_counter()
+    index = editor.current_catalog_search()
+    print(f"📚 {len(index)} brand groups indexed in {time.perf_counter() - started:.2f}s")
+    for query in sys.argv[1:]:
+        started = time.perf_counter()
+        total, batches = index.search(query)
+        print(f"\n🔎 {query}: {total} match(es) in {(time.perf_counter() - started) * 1000:.1f} ms")
+        for entry in batches:
+            print(f"   {entry['batch']}: {', '.join(b['brand'] for b in entry['brands'])}")
@@ -22,6 +22,7 @@ import os
 import re
 from urllib.parse import urlparse, unquote
 import numpy as np
+from report_sink import ReportSink
 
 # ===== CONFIGURATION =====
 CLIENT_LOGO_FILE = 'client_logo_master.xlsx'
@@ -208,7 +209,10 @@ def download_batch_logos():
     print(f"\n📥 Downloading logos for {len(batch_brands)} brands...")
     print("-" * 70)
     
-    results = []
+    # Each brand's row is flushed to a .jsonl log as soon as it finishes
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+    excel_filename = f'batch_{BATCH_NUMBER}_download_report_{timestamp}.xlsx'
+    report = ReportSink(Path(excel_filename).with_suffix('.jsonl'))
     download_stats = {
         'found': 0,
         'not_found': 0,
@@ -228,7 +232,7 @@ def download_batch_logos():
         
         if matched_row is None:
             print(f"    ❌ Not found in database")
-            results.append({
+            report.append({
                 'Brand': brand_clean,
                 'Matched_As': 'NOT FOUND',
                 'Logo1_Path': 'NOT FOUND',
@@ -286,34 +290,15 @@ def download_batch_logos():
             else:
                 logo_paths[f'Logo{logo_num}_Path'] = ''
         
-        results.append({
+        report.append({
             'Brand': brand_clean,
             'Matched_As': matched_name if match_type != 'EXACT' else brand_clean,
             **logo_paths,
             **logo_urls
         })
     
-    # Create Excel report
-    output_df = pd.DataFrame(results)
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-    excel_filename = f'batch_{BATCH_NUMBER}_download_report_{timestamp}.xlsx'
-    
-    with pd.ExcelWriter(excel_filename, engine='openpyxl') as writer:
-        output_df.to_excel(writer, index=False, sheet_name='Download Report')
-        worksheet = writer.sheets['Download Report']
-        
-        # Auto-adjust column widths
-        for column in worksheet.columns:
-            max_length = 0
-            column = [cell for cell in column]
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(cell.value)
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 60)
-            worksheet.column_dimensions[column[0].column_letter].width = adjusted_width
+    # Create Excel report (column widths were tracked while rows were appended)
+    report.finalize(excel_filename)
     
     # Print summary
     print("\n" + "=" * 70)
@@ -347,7 +332,7 @@ def download_batch_logos():
     print(f"   4. Or use: Insert > Image > Image over cells")
     print("=" * 70)
     
-    return output_df
+    return excel_filename
 
 # ===== ALTERNATIVE: DIRECT GOOGLE SHEETS UPLOAD =====
 def create_google_sheets_instructions():
@@ -396,7 +381,7 @@ def create_google_sheets_instructions():
 
 # ===== RUN THE SCRIPT =====
 if __name__ == '__main__':
-    df = download_batch_logos()
+    report_file = download_batch_logos()
     create_google_sheets_instructions()
     
     print("\n🚀 All done! Check the output folder for your images.")
\ No newline at end of file
@@ -0,0 +1,170 @@
+"""
+CHUNKED, RESUMABLE UPLOADS
+---------------------------------------------------------
+/add_brand takes a whole file in one request, capped by
+MAX_CONTENT_LENGTH - and a big upload over the tunnel that drops
+near the end starts again from zero. Here a file goes up in
+chunks instead:
+
+  init      batch, brand, file name, total size and SHA-256
+            -> upload id
+  append    PUT the bytes at `offset`; the server only accepts the
+            offset it already has (409 + the real offset otherwise),
+            so a retried or duplicated chunk can never corrupt the file
+  status    how many bytes arrived - where to resume after a drop
+  finalize  size and SHA-256 checked against init, then the file is
+            moved into the batch folder in one rename
+
+Sessions live on disk (data/uploads/<id>.json + <id>.part), so any
+server process (run_server.py workers) can take the next chunk and
+an upload survives a restart. Unfinished sessions are removed
+after UPLOAD_TTL.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+UPLOADS_DIR = Path(__file__).parent / "data" / "uploads"
+CHUNK_SIZE = 4 * 1024 * 1024          # what the editor sends; must stay under MAX_CONTENT_LENGTH
+MAX_UPLOAD_BYTES = 512 * 1024 * 1024
+UPLOAD_TTL = 24 * 3600                # seconds an unfinished upload is kept
+COPY_BUFSIZE = 64 * 1024
+_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+
+class UploadError(Exception):
+    """Rejected upload request; `status` is the HTTP code, `offset` the bytes the server holds."""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(COPY_BUFSIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class UploadSessions:
+    def __init__(self, root=UPLOADS_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _paths(self, upload_id):
+        if not _ID_RE.match(upload_id or ""):
+            raise UploadError("Unknown upload", 404)
+        return self.root / f"{upload_id}.json", self.root / f"{upload_id}.part"
+
+    @contextmanager
+    def _locked(self, upload_id):
+        """One writer per upload, across threads and (where fcntl exists) worker processes."""
+        self._load(upload_id)  # unknown ids fail here, before a .lock file is created for them
+        try:
+            import fcntl
+        except ImportError:
+            with self._lock:
+                yield
+            return
+        # flock holds per open file, so this also keeps two threads of one process apart
+        with open(self.root / f"{upload_id}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _load(self, upload_id):
+        info_path, part_path = self._paths(upload_id)
+        try:
+            info = json.loads(info_path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            raise UploadError("Unknown upload", 404)
+        info["offset"] = part_path.stat().st_size if part_path.exists() else 0
+        return info
+
+    def start(self, batch, brand, filename, size, sha256):
+        if not isinstance(size, int) or isinstance(size, bool) or not 0 < size <= MAX_UPLOAD_BYTES:
+            raise UploadError(f"Size must be 1..{MAX_UPLOAD_BYTES} bytes")
+        if not isinstance(sha256, str) or not re.match(r"^[0-9a-f]{64}$", sha256):
+            raise UploadError("sha256 must be 64 hex chars")
+        self.purge_stale()
+        upload_id = uuid.uuid4().hex
+        info = {"id": upload_id, "batch": batch, "brand": brand, "filename": filename,
+                "size": size, "sha256": sha256, "created": time.time()}
+        info_path, part_path = self._paths(upload_id)
+        part_path.touch()
+        info_path.write_text(json.dumps(info), encoding="utf-8")
+        return {**info, "offset": 0, "chunk_size": CHUNK_SIZE}
+
+    def status(self, upload_id):
+        return self._load(upload_id)
+
+    def append(self, upload_id, offset, stream):
+        """Write a chunk at `offset` (which must equal the bytes already received). Returns the new offset."""
+        with self._locked(upload_id):
+            info = self._load(upload_id)
+            if offset != info["offset"]:
+                raise UploadError("Offset mismatch", 409, info["offset"])
+            _, part_path = self._paths(upload_id)
+            written = 0
+            # Bytes are kept as they arrive: a chunk cut off mid-way still counts up to where it stopped.
+            with open(part_path, "ab") as f:
+                for block in iter(lambda: stream.read(COPY_BUFSIZE), b""):
+                    if offset + written + len(block) > info["size"]:
+                        f.truncate(offset + written)
+                        raise UploadError("More data than declared", 400, offset + written)
+                    f.write(block)
+                    written += len(block)
+            return offset + written
+
+    def finish(self, upload_id, target):
+        """Verify size and hash, then move the assembled file to `target` atomically. Returns the session."""
+        with self._locked(upload_id):
+            info = self._load(upload_id)
+            if info["offset"] != info["size"]:
+                raise UploadError("Upload incomplete", 409, info["offset"])
+            _, part_path = self._paths(upload_id)
+            if _file_sha256(part_path) != info["sha256"]:
+                self._remove(upload_id)
+                raise UploadError("SHA-256 mismatch - upload discarded", 422)
+            # data/ and static/logos may be on different disks: stage next to the target, then rename.
+            staged = target.with_name(f".{target.name}.{upload_id}.tmp")
+            shutil.move(str(part_path), str(staged))
+            os.replace(staged, target)
+            self._remove(upload_id)
+            return info
+
+    def discard(self, upload_id):
+        with self._locked(upload_id):
+            self._remove(upload_id)
+
+    def _remove(self, upload_id):
+        for path in (*self._paths(upload_id), self.root / f"{upload_id}.lock"):
+            path.unlink(missing_ok=True)
+
+    def purge_stale(self):
+        cutoff = time.time() - UPLOAD_TTL
+        for info_path in self.root.glob("*.json"):
+            part_path = info_path.with_suffix(".part")
+            try:
+                touched = max(info_path.stat().st_mtime, part_path.stat().st_mtime if part_path.exists() else 0)
+            except FileNotFoundError:
+                continue
+            if touched < cutoff and _ID_RE.match(info_path.stem):
+                self._remove(info_path.stem)
+        for lock_path in self.root.glob("*.lock"):  # left by a session that vanished while it was locked
+            try:
+                if lock_path.stat().st_mtime < cutoff and not lock_path.with_suffix(".json").exists():
+                    lock_path.unlink()
+            except FileNotFoundError:
+                pass
@@ -4,138 +4,210 @@ Creates Excel file with actual images in cells - can upload to Google Sheets!
 
 REQUIREMENTS: pip install openpyxl pillow
 
-Run this AFTER downloading logos
+Run this AFTER downloading logos:
+    python create_excel_with_images.py            # batch in BATCH_NUMBER
+    python create_excel_with_images.py 54a 54b    # several batches in one go
+
+Logos are resampled to the 150x100 cell box before embedding (in a
+process pool, cached by content hash), so workbooks carry thumbnails
+instead of full-resolution originals. SVG logos are rasterized through
+the same cache (needs `pip install cairosvg`); when a brand has both a
+raster and an SVG file for the same logo slot, the raster one is used.
+
+VERY LARGE CATALOGS (thousands of brands):
+    python create_excel_with_images.py 54 --stream --max-rows 2000 --max-mb 50
+Streams rows into write-only workbooks brand by brand and starts a new
+part file whenever the row or size threshold is reached, so memory stays
+flat whatever the brand count.
 """
 
-import pandas as pd
+import os
+import argparse
+from itertools import groupby, islice
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.drawing.image import Image as XLImage
+from openpyxl.styles import Font
 from openpyxl.utils import get_column_letter
 from datetime import datetime
 
+from thumb_cache import EXCEL_BOX, cached_thumbnail
+
 BATCH_NUMBER = '54'
 LOGOS_FOLDER = f'batch_{BATCH_NUMBER}_logos'
+LOGO_KEYS = ['logo1', 'logo2', 'logo3']
+RASTER_EXT = {'.png', '.jpg', '.jpeg', '.gif'}
+EMBED_EXT = RASTER_EXT | {'.svg'}  # SVGs are rasterized by thumb_cache
+STREAM_WINDOW = 256  # brands resampled per pool round-trip in streaming mode
 
-def create_excel_with_images():
-    print("=" * 70)
-    print(f"📊 CREATING EXCEL WITH EMBEDDED IMAGES - BATCH {BATCH_NUMBER}")
-    print("=" * 70)
-    
-    logos_path = Path(LOGOS_FOLDER)
-    
-    if not logos_path.exists():
-        print(f"\n❌ ERROR: Folder '{LOGOS_FOLDER}' not found!")
-        return
-    
-    # Get all image files (including converted PNGs from SVG)
+
+def _pick(current, candidate):
+    """Fill a logo slot, letting a raster file win over an SVG of the same logo."""
+    if current is None or Path(current).suffix.lower() == '.svg':
+        return candidate
+    return current
+
+
+def collect_brands(logos_path):
+    """Group the folder's images by brand -> {'logo1': path, ...}."""
     image_files = []
-    for ext in ['*.png', '*.jpg', '*.jpeg', '*.gif']:
+    for ext in ['*.png', '*.jpg', '*.jpeg', '*.gif', '*.svg']:
         image_files.extend(logos_path.glob(ext))
-    
-    # Also check for SVG files (we'll note them but prefer PNG versions)
-    svg_files = list(logos_path.glob('*.svg'))
-    
-    if not image_files:
-        print(f"\n❌ No compatible images found in {LOGOS_FOLDER}/")
-        if svg_files:
-            print(f"   Found {len(svg_files)} SVG files but they need conversion to PNG")
-            print(f"   Run the download script again with cairosvg installed")
-        return
-    
-    print(f"\n📸 Found {len(image_files)} images")
-    
-    # Group by brand
+
     brands = {}
     for img_path in image_files:
         filename = img_path.stem
         parts = filename.rsplit('_logo', 1)
         brand_name = parts[0].replace('_', ' ')
-        
+
         if brand_name not in brands:
             brands[brand_name] = {'logo1': None, 'logo2': None, 'logo3': None}
-        
+
         if 'logo1' in filename.lower():
-            brands[brand_name]['logo1'] = img_path
+            brands[brand_name]['logo1'] = _pick(brands[brand_name]['logo1'], img_path)
         elif 'logo2' in filename.lower():
-            brands[brand_name]['logo2'] = img_path
+            brands[brand_name]['logo2'] = _pick(brands[brand_name]['logo2'], img_path)
         elif 'logo3' in filename.lower():
-            brands[brand_name]['logo3'] = img_path
-    
+            brands[brand_name]['logo3'] = _pick(brands[brand_name]['logo3'], img_path)
+    return brands
+
+
+def brand_of(filename):
+    stem = Path(filename).stem
+    return stem.rsplit('_logo', 1)[0].replace('_', ' ')
+
+
+def logo_key_of(filename):
+    lower = Path(filename).stem.lower()
+    for key in LOGO_KEYS:
+        if key in lower:
+            return key
+    return None
+
+
+def iter_brands(logos_path):
+    """Yield (brand_name, {'logo1': path, ...}) in brand order, one brand at a time.
+
+    Only the file names are held in memory (for sorting); no images, paths
+    objects or per-brand dicts for the whole folder.
+    """
+    names = sorted((e.name for e in os.scandir(logos_path)
+                    if e.is_file() and Path(e.name).suffix.lower() in EMBED_EXT),
+                   key=lambda n: (brand_of(n), n))
+    for brand_name, files in groupby(names, key=brand_of):
+        logos = {'logo1': None, 'logo2': None, 'logo3': None}
+        for fn in files:
+            key = logo_key_of(fn)
+            if key:
+                logos[key] = _pick(logos[key], str(Path(logos_path) / fn))
+        yield brand_name, logos
+
+
+def prepare_brand_logos(logos):
+    """Worker: resample one brand's logos to the cell box. Returns {logo_key: thumb path or error}."""
+    prepared = {}
+    for logo_key, logo_path in logos.items():
+        if not logo_path or not Path(logo_path).exists():
+            continue
+        try:
+            prepared[logo_key] = str(cached_thumbnail(logo_path, EXCEL_BOX))
+        except ImportError:
+            prepared[logo_key] = Exception("SVG needs cairosvg")
+        except Exception as e:
+            prepared[logo_key] = Exception(str(e))
+    return prepared
+
+
+def create_excel_with_images(batch_number=BATCH_NUMBER, logos_folder=None, pool=None):
+    logos_folder = logos_folder or f'batch_{batch_number}_logos'
+    print("=" * 70)
+    print(f"📊 CREATING EXCEL WITH EMBEDDED IMAGES - BATCH {batch_number}")
+    print("=" * 70)
+
+    logos_path = Path(logos_folder)
+
+    if not logos_path.exists():
+        print(f"\n❌ ERROR: Folder '{logos_folder}' not found!")
+        return
+
+    brands = collect_brands(logos_path)
+
+    if not brands:
+        print(f"\n❌ No compatible images found in {logos_folder}/")
+        return
+
+    print(f"\n📸 Found {sum(1 for l in brands.values() for p in l.values() if p)} images")
+
+    # Resample every brand's logos in parallel (cached thumbnails are reused)
+    names = sorted(brands)
+    own_pool = pool is None
+    pool = pool or ProcessPoolExecutor()
+    try:
+        prepared = dict(zip(names, pool.map(prepare_brand_logos, [brands[n] for n in names], chunksize=8)))
+    finally:
+        if own_pool:
+            pool.shutdown()
+
     # Create Excel workbook
     wb = Workbook()
     ws = wb.active
-    ws.title = f'Batch {BATCH_NUMBER} Logos'
-    
+    ws.title = f'Batch {batch_number} Logos'
+
     # Set column widths and row heights
     ws.column_dimensions['A'].width = 25
     ws.column_dimensions['B'].width = 30
     ws.column_dimensions['C'].width = 30
     ws.column_dimensions['D'].width = 30
-    
+
     # Headers
     ws['A1'] = 'Brand'
     ws['B1'] = 'Logo 1'
     ws['C1'] = 'Logo 2'
     ws['D1'] = 'Logo 3'
-    
+
     # Style headers
     for cell in ['A1', 'B1', 'C1', 'D1']:
         ws[cell].font = ws[cell].font.copy(bold=True)
-    
+
     ws.row_dimensions[1].height = 20
-    
+
     print("\n🖼️ Embedding images into Excel...")
-    
+
     # Add brands and images
     row = 2
-    for brand_name, logos in sorted(brands.items()):
+    for brand_name in names:
         print(f"   {brand_name}")
-        
+
         ws[f'A{row}'] = brand_name
-        
+
         # Set row height for images
         ws.row_dimensions[row].height = 80
-        
-        # Add each logo
-        for idx, logo_key in enumerate(['logo1', 'logo2', 'logo3'], start=2):
-            logo_path = logos[logo_key]
-            
-            if logo_path and logo_path.exists():
-                try:
-                    # Create image object
-                    img = XLImage(str(logo_path))
-                    
-                    # Resize to fit cell (max 150px width, 100px height)
-                    max_width = 150
-                    max_height = 100
-                    
-                    # Calculate scaling
-                    width_scale = max_width / img.width if img.width > max_width else 1
-                    height_scale = max_height / img.height if img.height > max_height else 1
-                    scale = min(width_scale, height_scale)
-                    
-                    img.width = int(img.width * scale)
-                    img.height = int(img.height * scale)
-                    
-                    # Position in cell
-                    col_letter = get_column_letter(idx)
-                    cell_ref = f'{col_letter}{row}'
-                    
-                    # Add image to cell
-                    img.anchor = cell_ref
-                    ws.add_image(img)
-                    
-                except Exception as e:
-                    ws[f'{get_column_letter(idx)}{row}'] = f'Error: {str(e)[:20]}'
-        
+
+        # Add each logo (already resampled to fit the 150x100 cell)
+        for idx, logo_key in enumerate(LOGO_KEYS, start=2):
+            thumb = prepared[brand_name].get(logo_key)
+            if thumb is None:
+                continue
+            cell_ref = f'{get_column_letter(idx)}{row}'
+            if isinstance(thumb, Exception):
+                ws[cell_ref] = f'Error: {str(thumb)[:20]}'
+                continue
+            try:
+                img = XLImage(thumb)
+                img.anchor = cell_ref
+                ws.add_image(img)
+            except Exception as e:
+                ws[cell_ref] = f'Error: {str(e)[:20]}'
+
         row += 1
-    
+
     # Save workbook
     timestamp = datetime.now().strftime("%Y%m%d_%H%M")
-    output_file = f'batch_{BATCH_NUMBER}_with_images_{timestamp}.xlsx'
+    output_file = f'batch_{batch_number}_with_images_{timestamp}.xlsx'
     wb.save(output_file)
-    
+
     print(f"\n✅ Excel file created with embedded images!")
     print(f"   📄 {output_file}")
     print(f"\n🚀 TO USE:")
@@ -148,6 +220,126 @@ def create_excel_with_images():
     print(f"   - Paste into Google Sheets")
     print(f"   - Images copy over!")
     print("=" * 70)
+    return output_file
+
+
+class _PartWriter:
+    """Write-only workbook that rolls over to a new part file at a row or byte threshold."""
+
+    def __init__(self, batch_number, max_rows=None, max_bytes=None):
+        self.batch_number = batch_number
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+        self.outputs = []
+        self.wb = None
+
+    def _open(self):
+        self.wb = Workbook(write_only=True)
+        self.ws = self.wb.create_sheet(f'Batch {self.batch_number} Logos')
+        for col, width in zip('ABCD', (25, 30, 30, 30)):
+            self.ws.column_dimensions[col].width = width
+        headers = []
+        for title in ('Brand', 'Logo 1', 'Logo 2', 'Logo 3'):
+            cell = WriteOnlyCell(self.ws, value=title)
+            cell.font = Font(bold=True)
+            headers.append(cell)
+        self.ws.row_dimensions[1].height = 20
+        self.ws.append(headers)
+        self.row = 2
+        self.image_bytes = 0
+
+    def _close(self):
+        part = len(self.outputs) + 1
+        output_file = f'batch_{self.batch_number}_with_images_{self.timestamp}_part{part}.xlsx'
+        self.wb.save(output_file)
+        self.outputs.append(output_file)
+        print(f"   💾 {output_file} ({self.row - 2} brands)")
+        self.wb = None
+
+    def add_brand(self, brand_name, prepared):
+        full = self.wb is not None and (
+            (self.max_rows and self.row - 2 >= self.max_rows)
+            or (self.max_bytes and self.image_bytes >= self.max_bytes))
+        if full:
+            self._close()
+        if self.wb is None:
+            self._open()
+
+        self.ws.row_dimensions[self.row].height = 80
+        values = [brand_name]
+        for idx, logo_key in enumerate(LOGO_KEYS, start=2):
+            thumb = prepared.get(logo_key)
+            if thumb is None:
+                values.append(None)
+            elif isinstance(thumb, Exception):
+                values.append(f'Error: {str(thumb)[:20]}')
+            else:
+                values.append(None)
+                img = XLImage(thumb)  # keeps only the path; bytes are read when the part is saved
+                self.ws.add_image(img, f'{get_column_letter(idx)}{self.row}')
+                self.image_bytes += os.path.getsize(thumb)
+        self.ws.append(values)
+        self.row += 1
+
+    def finish(self):
+        if self.wb is not None:
+            self._close()
+        return self.outputs
+
+
+def create_excel_streaming(batch_number=BATCH_NUMBER, logos_folder=None, pool=None,
+                           max_rows=None, max_bytes=None):
+    """Constant-memory variant of create_excel_with_images() for very large folders."""
+    logos_folder = logos_folder or f'batch_{batch_number}_logos'
+    print("=" * 70)
+    print(f"📊 STREAMING EXCEL WITH EMBEDDED IMAGES - BATCH {batch_number}")
+    print("=" * 70)
+
+    if not Path(logos_folder).exists():
+        print(f"\n❌ ERROR: Folder '{logos_folder}' not found!")
+        return []
+
+    own_pool = pool is None
+    pool = pool or ProcessPoolExecutor()
+    writer = _PartWriter(batch_number, max_rows, max_bytes)
+    brands = iter_brands(logos_folder)
+    total = 0
+    try:
+        while True:
+            window = list(islice(brands, STREAM_WINDOW))
+            if not window:
+                break
+            results = pool.map(prepare_brand_logos, [logos for _, logos in window])
+            for (brand_name, _), prepared in zip(window, results):
+                writer.add_brand(brand_name, prepared)
+            total += len(window)
+            print(f"   ✓ {total} brands written")
+    finally:
+        if own_pool:
+            pool.shutdown()
+    outputs = writer.finish()
+
+    if not outputs:
+        print(f"\n❌ No compatible images found in {logos_folder}/")
+    else:
+        print(f"\n✅ {len(outputs)} workbook(s) created for {total} brands")
+    print("=" * 70)
+    return outputs
+
 
 if __name__ == '__main__':
-    create_excel_with_images()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build Excel workbooks with embedded logo thumbnails.")
+    parser.add_argument('batches', nargs='*', default=[BATCH_NUMBER], help="batch numbers (folders batch_<n>_logos)")
+    parser.add_argument('--stream', action='store_true', help="constant-memory write-only mode")
+    parser.add_argument('--max-rows', type=int, help="streaming: start a new workbook after this many brands")
+    parser.add_argument('--max-mb', type=float, help="streaming: start a new workbook after this many MB of images")
+    args = parser.parse_args()
+
+    max_bytes = int(args.max_mb * 1024 * 1024) if args.max_mb else None
+    with ProcessPoolExecutor() as shared_pool:
+        for number in args.batches:
+            if args.stream or args.max_rows or max_bytes:
+                create_excel_streaming(number, pool=shared_pool, max_rows=args.max_rows, max_bytes=max_bytes)
+            else:
+                create_excel_with_images(number, pool=shared_pool)
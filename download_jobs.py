@@ -0,0 +1,196 @@
+"""
+BACKGROUND DOWNLOAD JOBS
+---------------------------------------------------------
+Lets the editor start a download for a list of brands without
+anyone running logo_lookup_multi.py on a workstation and copying
+the folder over by hand.
+
+A job downloads straight into the batch folder under
+static/logos, reusing download_brand() (matching, .part files,
+verification, metadata sidecar). Jobs run on their own small
+thread pool - never on a waitress request thread - and every
+brand that finishes is handed to `on_files`, which the editor
+uses to publish the new logos into the live catalog.
+
+Job status (state, per-brand counts, the last log lines) is kept
+in data/download_jobs.sqlite, so it survives a restart and any
+server process can report it; jobs that were queued or running
+in a process that has since died are marked 'interrupted' (when a
+process starts, and by run_server.py when a worker exits).
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from logo_lookup_multi import DownloadBudget, download_brand
+from logo_meta import meta_for
+
+JOBS_FILE = Path(__file__).parent / "data" / "download_jobs.sqlite"
+JOB_WORKERS = 1          # jobs running at once; the rest wait in 'queued'
+JOB_CONNECTIONS = 4      # simultaneous HTTP downloads shared by all jobs
+RECENT_LINES = 50        # log lines kept per job for the status endpoint
+STAT_KEYS = ("found", "not_found", "failed", "rejected", "images", "unchanged")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id       INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch    TEXT NOT NULL,
+    brands   TEXT NOT NULL,
+    state    TEXT NOT NULL,
+    total    INTEGER NOT NULL,
+    done     INTEGER NOT NULL DEFAULT 0,
+    stats    TEXT NOT NULL,
+    recent   TEXT NOT NULL DEFAULT '[]',
+    error    TEXT,
+    pid      INTEGER,
+    created  REAL NOT NULL,
+    started  REAL,
+    finished REAL
+);
+"""
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        pass
+    return True
+
+
+def downloaded_files(row):
+    """Filenames from a download_brand() report row."""
+    names = row.get("Downloaded", "None")
+    return [] if names == "None" else names.split(", ")
+
+
+class DownloadJobs:
+    """Queue of download jobs for one logos root. `master` is a callable returning the master rows."""
+
+    def __init__(self, logos_root, master, on_files=None, path=JOBS_FILE,
+                 workers=JOB_WORKERS, connections=JOB_CONNECTIONS):
+        self.logos_root = Path(logos_root)
+        self.master = master
+        self.on_files = on_files
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.executescript(_SCHEMA)
+            if "pid" not in {r[1] for r in self._db.execute("PRAGMA table_info(jobs)")}:
+                self._db.execute("ALTER TABLE jobs ADD COLUMN pid INTEGER")
+        self.budget = DownloadBudget(connections)
+        self._workers = workers
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download-job")
+        self._active = 0
+        self.sweep_orphans()
+
+    def reopen(self):
+        """Fresh connection and pool in a forked child (run_server.py); the parent's connection stays unused."""
+        self._inherited = self._db
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="download-job")
+        self._active = 0
+        self.sweep_orphans()
+
+    def sweep_orphans(self):
+        """Mark queued/running jobs whose process is gone as 'interrupted' (several processes share the table)."""
+        with self._lock, self._db:
+            orphans = [job_id for job_id, pid in self._db.execute(
+                "SELECT id, pid FROM jobs WHERE state IN ('queued', 'running')") if not pid or not _alive(pid)]
+            self._db.executemany("UPDATE jobs SET state = 'interrupted', finished = ? WHERE id = ?",
+                                 [(time.time(), job_id) for job_id in orphans])
+        return len(orphans)
+
+    def in_flight(self):
+        """Jobs of this process that are queued or still running."""
+        return self._active
+
+    def interrupt_own(self):
+        """Called by a process about to exit: its unfinished jobs won't finish."""
+        with self._lock, self._db:
+            self._db.execute("UPDATE jobs SET state = 'interrupted', finished = ? "
+                             "WHERE pid = ? AND state IN ('queued', 'running')", (time.time(), os.getpid()))
+
+    def submit(self, batch, brands):
+        """Queue a job and return its id right away."""
+        stats = dict.fromkeys(STAT_KEYS, 0)
+        with self._lock, self._db:
+            cur = self._db.execute("INSERT INTO jobs (batch, brands, state, total, stats, pid, created) "
+                                   "VALUES (?, ?, 'queued', ?, ?, ?, ?)",
+                                   (batch, json.dumps(brands), len(brands), json.dumps(stats), os.getpid(),
+                                    time.time()))
+            job_id = cur.lastrowid
+            self._active += 1
+        self._pool.submit(self._run, job_id, batch, brands)
+        return job_id
+
+    def _update(self, job_id, **fields):
+        cols = ", ".join(f"{k} = ?" for k in fields)
+        with self._lock, self._db:
+            self._db.execute(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+
+    def _run(self, job_id, batch, brands):
+        try:
+            self._run_job(job_id, batch, brands)
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _run_job(self, job_id, batch, brands):
+        self._update(job_id, state="running", started=time.time())
+        stats, recent, done = dict.fromkeys(STAT_KEYS, 0), [], 0
+        try:
+            master = self.master()
+            batch_dir = self.logos_root / batch
+            batch_dir.mkdir(parents=True, exist_ok=True)
+            meta = meta_for(batch_dir)
+            # Brands inside a job share the job budget's connections, like download_batch;
+            # files are verified inline on these threads (no process pool inside the web server).
+            with ThreadPoolExecutor(max_workers=self.budget.max_connections,
+                                    thread_name_prefix=f"download-job-{job_id}") as pool:
+                futures = [pool.submit(download_brand, i, brand, master, batch_dir, meta, self.budget)
+                           for i, brand in enumerate(brands, 1)]
+                for future in as_completed(futures):
+                    row, lines, brand_stats = future.result()
+                    files = downloaded_files(row)
+                    if files and self.on_files:
+                        self.on_files(batch, files)
+                    for key, value in brand_stats.items():
+                        stats[key] += value
+                    recent = (recent + lines)[-RECENT_LINES:]
+                    done += 1
+                    self._update(job_id, done=done, stats=json.dumps(stats), recent=json.dumps(recent))
+        except Exception as e:
+            self._update(job_id, state="failed", error=str(e), finished=time.time())
+            print(f"❌ Download job {job_id} ({batch}) failed: {e}")
+            return
+        self._update(job_id, state="done", finished=time.time())
+        print(f"✅ Download job {job_id} ({batch}): {stats['images']} logos for {len(brands)} brands")
+
+    def _job(self, values):
+        job_id, batch, state, total, done, stats, recent, error, created, started, finished = values
+        return {"id": job_id, "batch": batch, "state": state, "total": total, "done": done,
+                "stats": json.loads(stats), "recent": json.loads(recent), "error": error,
+                "created": created, "started": started, "finished": finished}
+
+    _COLUMNS = "id, batch, state, total, done, stats, recent, error, created, started, finished"
+
+    def get(self, job_id):
+        with self._lock:
+            found = self._db.execute(f"SELECT {self._COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(found) if found else None
+
+    def recent_jobs(self, limit=20):
+        with self._lock:
+            rows = self._db.execute(f"SELECT {self._COLUMNS} FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return [self._job(values) for values in rows]
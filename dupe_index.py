@@ -0,0 +1,197 @@
+"""
+NEAR-DUPLICATE LOGO FINDER
+---------------------------------------------------------
+Finds logos that look the same (re-encodes, resizes, the same
+brand coming back in a later batch) using the 64-bit perceptual
+hashes stored in each batch's metadata sidecar (logo_meta.py).
+
+Hashes live in a BK-tree over Hamming distance, so "near
+duplicates of X" only visits a small part of the catalog.
+Files with identical bytes (same SHA-256) always cluster,
+including SVGs, which have no perceptual hash.
+
+USAGE:
+    python dupe_index.py                       # clusters inside each batch
+    python dupe_index.py --batch batch_54c     # one batch only
+    python dupe_index.py --cross               # clusters spanning batches
+    python dupe_index.py --threshold 4         # stricter matching
+"""
+
+import argparse
+from pathlib import Path
+
+from logo_meta import META_FILENAME, meta_for
+
+DEFAULT_THRESHOLD = 6
+DEFAULT_ROOT = Path(__file__).parent / "static" / "logos"
+ALLOWED_EXT = {".png", ".jpg", ".jpeg", ".svg", ".webp", ".gif"}
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """Burkhard-Keller tree keyed by integer hashes; each node keeps every item sharing its hash."""
+
+    def __init__(self):
+        self._root = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def add(self, key, item):
+        self._size += 1
+        if self._root is None:
+            self._root = [key, [item], {}]
+            return
+        node = self._root
+        while True:
+            dist = hamming(key, node[0])
+            if dist == 0:
+                node[1].append(item)
+                return
+            child = node[2].get(dist)
+            if child is None:
+                node[2][dist] = [key, [item], {}]
+                return
+            node = child
+
+    def search(self, key, radius):
+        """All (distance, item) pairs within `radius` bits of `key`."""
+        found = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node = stack.pop()
+            dist = hamming(key, node[0])
+            if dist <= radius:
+                found.extend((dist, item) for item in node[1])
+            for edge, child in node[2].items():
+                if dist - radius <= edge <= dist + radius:
+                    stack.append(child)
+        return found
+
+
+class DupeIndex:
+    """Perceptual-hash index over every logo under a root folder, read from the metadata sidecars."""
+
+    def __init__(self, entries):
+        # entries: (batch, filename, phash_hex or None, sha256)
+        self.entries = list(entries)
+        self.tree = BKTree()
+        self.by_sha = {}
+        self.by_key = {}
+        for entry in self.entries:
+            batch, filename, phash, sha = entry
+            self.by_key[(batch, filename)] = entry
+            self.by_sha.setdefault(sha, []).append(entry)
+            if phash:
+                self.tree.add(int(phash, 16), entry)
+
+    @classmethod
+    def from_root(cls, root, batches=None, reconcile=False):
+        root = Path(root)
+        names = batches or sorted(p.name for p in root.iterdir() if p.is_dir())
+        entries = []
+        for batch in names:
+            store = meta_for(root / batch)
+            if reconcile:
+                store.reconcile(ALLOWED_EXT)
+            for row in store.all().values():
+                entries.append((batch, row["filename"], row["phash"], row["sha256"]))
+        return cls(entries)
+
+    def near(self, batch, filename, threshold=DEFAULT_THRESHOLD):
+        """Logos within `threshold` bits of (batch, filename), closest first, excluding itself."""
+        entry = self.by_key.get((batch, filename))
+        if entry is None:
+            return None
+        hits = {e: 0 for e in self.by_sha[entry[3]]}
+        if entry[2]:
+            for dist, other in self.tree.search(int(entry[2], 16), threshold):
+                hits[other] = min(hits.get(other, dist), dist)
+        hits.pop(entry, None)
+        return sorted(({"batch": e[0], "filename": e[1], "distance": d} for e, d in hits.items()),
+                      key=lambda x: (x["distance"], x["batch"], x["filename"]))
+
+    def clusters(self, threshold=DEFAULT_THRESHOLD, cross_batch=False):
+        """Groups of near-identical logos (union of all pairs within `threshold`)."""
+        parent = {e: e for e in self.entries}
+
+        def find(e):
+            while parent[e] != e:
+                parent[e] = parent[parent[e]]
+                e = parent[e]
+            return e
+
+        def union(a, b):
+            ra, rb = find(a), find(b)
+            if ra != rb:
+                parent[rb] = ra
+
+        for group in self.by_sha.values():
+            for i, entry in enumerate(group):
+                for other in group[i + 1:]:
+                    if cross_batch or other[0] == entry[0]:
+                        union(entry, other)
+        for entry in self.entries:
+            if entry[2]:
+                for _, other in self.tree.search(int(entry[2], 16), threshold):
+                    if cross_batch or other[0] == entry[0]:
+                        union(entry, other)
+
+        groups = {}
+        for entry in self.entries:
+            groups.setdefault(find(entry), []).append(entry)
+        result = []
+        for members in groups.values():
+            if len(members) < 2:
+                continue
+            batches = sorted({m[0] for m in members})
+            if cross_batch and len(batches) < 2:
+                continue
+            if not cross_batch and len(batches) > 1:
+                continue
+            result.append({
+                "batches": batches,
+                "files": [{"batch": m[0], "filename": m[1]} for m in sorted(members)],
+            })
+        return sorted(result, key=lambda c: (c["batches"], c["files"][0]["filename"]))
+
+
+def index_signature(root):
+    """Cheap change token for cached indexes: every sidecar's mtime."""
+    sig = []
+    for p in sorted(Path(root).iterdir()):
+        sidecar = p / META_FILENAME
+        if p.is_dir() and sidecar.exists():
+            sig.append((p.name, sidecar.stat().st_mtime_ns))
+    return tuple(sig)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List near-duplicate logo clusters.")
+    parser.add_argument("--root", default=str(DEFAULT_ROOT), help="folder holding batch folders")
+    parser.add_argument("--batch", action="append", help="limit to this batch (repeatable)")
+    parser.add_argument("--threshold", type=int, default=DEFAULT_THRESHOLD, help="max differing hash bits")
+    parser.add_argument("--cross", action="store_true", help="only report clusters spanning several batches")
+    args = parser.parse_args()
+
+    print("🔎 Updating metadata sidecars...")
+    index = DupeIndex.from_root(args.root, batches=args.batch, reconcile=True)
+    clusters = index.clusters(args.threshold, cross_batch=args.cross)
+    print(f"✓ Indexed {len(index.entries)} logos ({len(index.tree)} with perceptual hashes)")
+
+    if not clusters:
+        print("\n🎉 No near-duplicates found.")
+        return
+    print(f"\n📋 {len(clusters)} duplicate cluster(s):")
+    for i, cluster in enumerate(clusters, 1):
+        print(f"\n{i:2d}. [{', '.join(cluster['batches'])}]")
+        for f in cluster["files"]:
+            print(f"     {f['batch']}/{f['filename']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,48 +7,79 @@ the official client logo Excel sheet.
 SETUP:
 1. Place this script in your LogoLookup folder
 2. Make sure you have `client_logo_master.xlsx` in the same folder
-3. Install dependencies:
+3. List batches in `batches.csv` (one `Batch,Brand` row per brand) -
+   adding batch 55 means adding rows, not editing this script
+4. Install dependencies:
       pip install pandas openpyxl requests pillow
-4. Run:
+      (plus pyyaml if your manifest is a .yaml file)
+5. Run:
       python logo_lookup_multi.py
+      python logo_lookup_multi.py --batch 54a --batch 54c
+      python logo_lookup_multi.py --manifest batches.yaml --connections 16
+      python logo_lookup_multi.py --manifest client_logo_master.xlsx --sheet Batches
+
+QUICK LOOKUPS (no pandas, starts in a blink):
+      python logo_lookup_multi.py --lookup "Rapid 7" --lookup TD
+      python logo_lookup_multi.py --lookup "Oreo" --download
+The master sheet is parsed once and cached next to it as a compact
+JSON file, refreshed automatically whenever the .xlsx changes.
+
+All selected batches run at once and share one connection /
+bandwidth budget, so a ten-batch run keeps the machine busy
+without hammering any single host harder than one batch would.
+
+Every download lands as a .part file and is fully decoded (Pillow,
+or XML for SVG) in a worker process before it is renamed into the
+batch folder: truncated images, HTML error pages and tracking
+pixels are rejected, and the real format/size goes in the report.
+
+Runs are INCREMENTAL: each batch folder remembers a fingerprint of
+the master-sheet row every brand was downloaded from
+(.download_state.sqlite). On the next run only brands whose row is
+new or changed (other match, other URLs) are fetched; the rest keep
+their files and report row. Force a full refresh with --full.
 """
 
 import os
 import re
-import pandas as pd
-import requests
+import csv
+import json
+import time
+import hashlib
+import sqlite3
+import argparse
+import threading
+import uuid
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
 from urllib.parse import urlparse, unquote
 from datetime import datetime
 from pathlib import Path
+from brand_search import index_for
+from logo_meta import meta_for, verify_image
+from report_sink import ReportSink
 
 # ========== CONFIGURATION ==========
 CLIENT_LOGO_FILE = "client_logo_master.xlsx"
 
-# --- Define all batches and brands ---
-BATCHES = {
-    "54a": [
-        "Air Canada", "Amazon", "American Airlines", "AutoNation",
-        "Canada Life Insurance", "Enterprise", "Firestone", "Highmark",
-        "Lenovo", "PNC", "Scotiabank", "TD", "Xcel Energy", "YMCA"
-    ],
-    "54b": [
-        "Amerant Bank", "BJC Healthcare", "Caesars Sportsbook", "Calian Group",
-        "Childrens National", "Key Bank", "RBC", "SkipTheDishes",
-        "Telus", "Vanderbilt University"
-    ],
-    "54c": [
-        "Amalie Oil Co.", "Belle Tire", "Bold Penguin", "CarShield",
-        "Climate Pledge", "Clio", "Energy Transfer Partners",
-        "First National Bank", "Gamesense", "IMA Financial",
-        "Iron Bow Technologies", "Kiewit Corporation", "Kinaxis",
-        "La Croix", "MSA Safety", "Muckleshoot Casino",
-        "NAVQVI Injury Law", "NexGen Energy", "OC Health Care Agency",
-        "Oreo", "Play Alberta", "Prudential", "Rapid 7",
-        "RWJBarnabas Health", "Solo Stove", "TRIA Orthopedics",
-        "Trusted Nurse Staffing", "Viam AI", "Visit Anaheim",
-        "Visit Lauderdale", "Western National Property Management"
-    ]
-}
+BATCH_MANIFEST = "batches.csv"   # Batch,Brand rows (or .yaml / .xlsx with --sheet)
+
+# --- Shared download budget (across ALL batches running at once) ---
+MAX_CONNECTIONS = 8          # simultaneous HTTP downloads
+MAX_BYTES_PER_SEC = None     # e.g. 5 * 1024 * 1024 to cap total bandwidth
+PARALLEL_BATCHES = 4         # batches processed side by side
+
+FUZZY_MIN_SCORE = 0.5        # trigram/word similarity needed for a FUZZY match
+
+# --- Download verification ---
+MIN_LOGO_WIDTH = 32          # smaller images (tracking pixels, favicons) are rejected
+MIN_LOGO_HEIGHT = 16
+VERIFY_WORKERS = None        # decode processes (None = one per CPU)
+FORMAT_EXT = {'png': '.png', 'jpeg': '.jpg', 'gif': '.gif', 'webp': '.webp', 'svg': '.svg'}
+
+# --- Incremental runs ---
+STATE_FILENAME = ".download_state.sqlite"   # per batch folder, next to the metadata sidecar
 
 # =========================================================
 # ------------------ HELPER FUNCTIONS ---------------------
@@ -71,143 +102,452 @@ def get_file_extension(url, default='.png'):
         if '.jpg' in url.lower(): return '.jpg'
     return default
 
-def find_best_match(search_name, df):
+def master_cache_path(path):
+    path = Path(path)
+    return path.parent / f".{path.stem}.cache.json"
+
+def read_master_xlsx(path):
+    """Parse the master sheet with openpyxl's streaming reader (no pandas)."""
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = [str(h).strip() if h is not None else '' for h in next(rows)]
+        master = []
+        for values in rows:
+            row = {h: ('' if v is None else str(v).strip()) for h, v in zip(header, values) if h}
+            if row.get('Brand'):
+                master.append(row)
+        return master
+    finally:
+        wb.close()
+
+def load_master(path=CLIENT_LOGO_FILE):
+    """Master rows as plain dicts (Brand, Brand_Lower, Logo1..3), served from a compact JSON cache."""
+    st = os.stat(path)
+    cache = master_cache_path(path)
+    try:
+        with open(cache, encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached['mtime_ns'] == st.st_mtime_ns and cached['size'] == st.st_size:
+            return cached['rows']
+    except (OSError, ValueError, KeyError):
+        pass
+    rows = read_master_xlsx(path)
+    for row in rows:
+        row['Brand_Lower'] = row['Brand'].lower()
+    # Own temp name: editor workers and work_queue runs (other hosts, too) may rebuild the cache at once.
+    tmp = cache.with_name(f"{cache.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'mtime_ns': st.st_mtime_ns, 'size': st.st_size, 'rows': rows}, f, separators=(',', ':'))
+        os.replace(tmp, cache)
+    except OSError:
+        tmp.unlink(missing_ok=True)  # a cache we couldn't write just means reading the .xlsx next time
+    return rows
+
+def find_best_match(search_name, rows):
     search_lower = search_name.strip().lower()
 
     # Exact match
-    exact = df[df['Brand_Lower'] == search_lower]
-    if not exact.empty:
-        return exact.iloc[0], 'EXACT', exact.iloc[0]['Brand']
+    for row in rows:
+        if row['Brand_Lower'] == search_lower:
+            return row, 'EXACT', row['Brand']
 
     # Contains match
-    contains = df[df['Brand_Lower'].str.contains(search_lower, na=False)]
-    if not contains.empty:
-        return contains.iloc[0], 'CONTAINS', contains.iloc[0]['Brand']
+    for row in rows:
+        if search_lower in row['Brand_Lower']:
+            return row, 'CONTAINS', row['Brand']
 
     # Partial word overlap
-    for _, row in df.iterrows():
-        brand_lower = str(row['Brand_Lower'])
-        if brand_lower in search_lower or search_lower in brand_lower:
+    for row in rows:
+        if row['Brand_Lower'] in search_lower:
             return row, 'PARTIAL', row['Brand']
 
+    # Fuzzy: ranked token + trigram similarity
+    best = index_for(rows).top_k(search_name, k=1, min_score=FUZZY_MIN_SCORE)
+    if best:
+        score, pos, name = best[0]
+        return rows[pos], f'FUZZY({score:.2f})', name
+
     return None, 'NOT_FOUND', None
 
-def download_image(url, save_path):
+def batch_id(value):
+    """Batch ids as text: 54, 54.0 (how Excel hands numbers back), "54.0" and " 54 " are all "54"."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    text = str(value).strip()
+    return re.sub(r'^(\d+)\.0+$', r'\1', text)
+
+def select_batches(batches, wanted):
+    """The manifest's batches limited to `wanted` (--batch). Unknown ids raise ValueError
+    instead of quietly leaving nothing to run."""
+    if not wanted:
+        return batches
+    wanted = list(dict.fromkeys(batch_id(b) for b in wanted))
+    unknown = [b for b in wanted if b not in batches]
+    if unknown:
+        raise ValueError(f"batch(es) not in the manifest: {', '.join(unknown)} "
+                         f"(it has: {', '.join(batches) or 'none'})")
+    return {b: batches[b] for b in wanted}
+
+def load_manifest(path, sheet=None):
+    """Batch definitions -> {batch_id: [brand, ...]} from CSV, YAML or a sheet tab."""
+    path = Path(path)
+    suffix = path.suffix.lower()
+    batches = {}
+    if suffix in ('.yaml', '.yml'):
+        import yaml
+        data = yaml.safe_load(path.read_text(encoding='utf-8')) or {}
+        return {batch_id(b): [str(x).strip() for x in brands or [] if str(x).strip()] for b, brands in data.items()}
+    if suffix in ('.xlsx', '.xls'):
+        import pandas as pd
+        rows = pd.read_excel(path, sheet_name=sheet or 'Batches').to_dict('records')
+    else:
+        with open(path, encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+    for row in rows:
+        batch, brand = batch_id(row.get('Batch', '')), str(row.get('Brand', '')).strip()
+        if batch and batch.lower() != 'nan' and brand and brand.lower() != 'nan':
+            batches.setdefault(batch, []).append(brand)
+    return batches
+
+class DownloadBudget:
+    """One connection + bandwidth budget shared by every download thread of every batch."""
+
+    def __init__(self, max_connections=MAX_CONNECTIONS, max_bytes_per_sec=MAX_BYTES_PER_SEC):
+        self.connections = threading.BoundedSemaphore(max_connections)
+        self.max_connections = max_connections
+        self.rate = max_bytes_per_sec
+        self._lock = threading.Lock()
+        self._allowance = float(max_bytes_per_sec or 0)
+        self._last = time.monotonic()
+
+    def throttle(self, nbytes):
+        """Token bucket: sleep just long enough to keep total throughput under the cap."""
+        if not self.rate:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._allowance = min(self.rate, self._allowance + (now - self._last) * self.rate)
+            self._last = now
+            self._allowance -= nbytes
+            wait = -self._allowance / self.rate if self._allowance < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+def row_fingerprint(matched_name, row):
+    """Hash of what a brand's download depends on: the matched sheet name and its logo URLs."""
+    h = hashlib.sha1(matched_name.encode('utf-8'))
+    for n in range(1, 4):
+        h.update(b'\0' + str(row.get(f'Logo{n}', '')).strip().encode('utf-8'))
+    return h.hexdigest()
+
+class DownloadState:
+    """What the last successful run fetched for each brand of a folder: fingerprint, files, report row.
+
+    With `force` nothing counts as unchanged, but new results are still recorded.
+    """
+
+    def __init__(self, folder, force=False):
+        self.force = force
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(Path(folder) / STATE_FILENAME), check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS brands (brand TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, "
+                             "files TEXT NOT NULL, row TEXT NOT NULL)")
+
+    def get(self, brand):
+        """(fingerprint, files, report row) from the last run, or None."""
+        with self._lock:
+            found = self._db.execute("SELECT fingerprint, files, row FROM brands WHERE brand = ?", (brand,)).fetchone()
+        return (found[0], json.loads(found[1]), json.loads(found[2])) if found else None
+
+    def put(self, brand, fingerprint, files, row):
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO brands VALUES (?, ?, ?, ?)",
+                             (brand, fingerprint, json.dumps(files), json.dumps(row, ensure_ascii=False)))
+
+def download_image(url, save_path, budget=None):
     """Downloads the image from a URL and saves it to disk."""
+    import requests
+
     try:
         if not url or not isinstance(url, str) or not url.startswith("http"):
             return False
 
-        # Special handling for Wikipedia file pages
-        if 'wikipedia.org/wiki/File:' in url:
-            html = requests.get(url, timeout=10).text
-            match = re.search(r'href="(//upload\.wikimedia\.org/wikipedia/[^"]+)"', html)
-            if match:
-                url = 'https:' + match.group(1)
-
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        r = requests.get(url, headers=headers, stream=True, timeout=10)
-        r.raise_for_status()
-
-        with open(save_path, 'wb') as f:
-            for chunk in r.iter_content(8192):
-                f.write(chunk)
-
-        # Verify non-empty file
-        if os.path.getsize(save_path) < 100:
-            os.remove(save_path)
-            return False
+        with budget.connections if budget else nullcontext():
+            # Special handling for Wikipedia file pages
+            if 'wikipedia.org/wiki/File:' in url:
+                html = requests.get(url, timeout=10).text
+                match = re.search(r'href="(//upload\.wikimedia\.org/wikipedia/[^"]+)"', html)
+                if match:
+                    url = 'https:' + match.group(1)
+
+            headers = {'User-Agent': 'Mozilla/5.0'}
+            r = requests.get(url, headers=headers, stream=True, timeout=10)
+            r.raise_for_status()
+
+            with open(save_path, 'wb') as f:
+                for chunk in r.iter_content(8192):
+                    f.write(chunk)
+                    if budget:
+                        budget.throttle(len(chunk))
         return True
 
     except Exception as e:
+        if os.path.exists(save_path):
+            os.remove(save_path)
         return False
 
+def describe(meta_row):
+    """Report text for a verified file, e.g. 'png 512x256, 14.2 KB'."""
+    dims = f"{meta_row['width']}x{meta_row['height']}" if meta_row['width'] else "no size"
+    return f"{meta_row['format']} {dims}, {meta_row['size'] / 1024:.1f} KB"
+
+def place_verified(part_path, target_stem, default_ext, meta_row, meta):
+    """Rename a verified .part file into place and record its metadata. Returns the final path."""
+    # Name the file after what it really is (a .png URL may well serve a JPEG)
+    file_path = Path(f"{target_stem}{FORMAT_EXT.get(meta_row['format'], default_ext)}")
+    os.replace(part_path, file_path)
+    meta.put({**meta_row, 'filename': file_path.name})
+    return file_path
+
 # =========================================================
 # ------------------ MAIN DOWNLOAD LOGIC ------------------
 # =========================================================
 
-def download_batch(batch_number, brands, logo_df):
-    print(f"\n{'='*70}")
-    print(f"🎯 DOWNLOADING LOGOS FOR BATCH {batch_number.upper()}")
-    print(f"{'='*70}")
-
-    output_folder = Path(f"batch_{batch_number}_logos")
-    output_folder.mkdir(exist_ok=True)
-
-    results = []
-    stats = {'found':0, 'not_found':0, 'failed':0, 'images':0}
-
-    for i, brand in enumerate(brands, 1):
-        print(f"\n{i:2d}. {brand}")
-        matched_row, match_type, matched_name = find_best_match(brand, logo_df)
-
-        if matched_row is None:
-            print("   ❌ No match found in sheet.")
-            results.append({'Brand': brand, 'Matched_As': 'NOT FOUND'})
-            stats['not_found'] += 1
-            continue
-
-        if match_type != 'EXACT':
-            print(f"   🔗 Matched as: {matched_name} [{match_type}]")
-
-        stats['found'] += 1
-        safe_name = clean_filename(matched_name)
+_target_locks = {}
+_target_locks_guard = threading.Lock()
+
+def target_lock(target_stem):
+    """Lock for one output file stem, shared by every thread downloading into it."""
+    key = str(Path(target_stem).resolve())
+    with _target_locks_guard:
+        return _target_locks.setdefault(key, threading.Lock())
+
+def submit_verify(verifier, part_path):
+    """verify_image on the process pool (a Future), or its result right here without a working pool."""
+    if verifier:
+        try:
+            return verifier.submit(verify_image, part_path, MIN_LOGO_WIDTH, MIN_LOGO_HEIGHT)
+        except BrokenProcessPool:
+            pass
+    return verify_image(part_path, MIN_LOGO_WIDTH, MIN_LOGO_HEIGHT)
+
+
+def download_brand(i, brand, master, output_folder, meta, budget=None, verifier=None, state=None):
+    """Match and download one brand. Returns (report row, log lines, stat deltas).
+
+    Files are verified in `verifier` (a process pool) while the next logo
+    downloads; without one they are verified inline. With a DownloadState,
+    a brand whose sheet row is unchanged since the last run is skipped.
+    """
+    lines = [f"{i:2d}. {brand}"]
+    stats = {'found':0, 'not_found':0, 'failed':0, 'rejected':0, 'images':0, 'unchanged':0}
+    matched_row, match_type, matched_name = find_best_match(brand, master)
+
+    if matched_row is None:
+        lines.append("   ❌ No match found in sheet.")
+        stats['not_found'] += 1
+        return {'Brand': brand, 'Matched_As': 'NOT FOUND'}, lines, stats
+
+    if match_type != 'EXACT':
+        lines.append(f"   🔗 Matched as: {matched_name} [{match_type}]")
+
+    stats['found'] += 1
+    fingerprint = row_fingerprint(matched_name, matched_row)
+    previous = state.get(brand) if state else None
+    if (previous and not state.force and previous[0] == fingerprint
+            and all((output_folder / fn).exists() for fn in previous[1])):
+        lines.append("   ⏭️  Unchanged since last run - kept")
+        stats['unchanged'] += 1
+        return previous[2], lines, stats
+
+    safe_name = clean_filename(matched_name)
+    # Brands matching the same sheet row write the same files: one of them at a time.
+    with target_lock(output_folder / safe_name):
         downloaded = []
+        checks = {}
+        pending = []
 
         for n in range(1, 4):
             url = str(matched_row.get(f'Logo{n}', '')).strip()
             if not url or url.lower() == 'nan':
                 continue
-            ext = get_file_extension(url)
-            file_path = output_folder / f"{safe_name}_logo{n}{ext}"
-            print(f"   Logo{n}: ", end="")
-            if download_image(url, file_path):
-                print(f"✓ Downloaded → {file_path.name}")
-                stats['images'] += 1
-                downloaded.append(file_path.name)
-            else:
-                print("❌ Failed")
+            part_path = output_folder / f"{safe_name}_logo{n}{get_file_extension(url)}.part"
+            if not download_image(url, part_path, budget):
+                lines.append(f"   Logo{n}: ❌ Failed")
+                checks[f'Logo{n}_Check'] = 'FAILED'
                 stats['failed'] += 1
-
-        results.append({
+                continue
+            pending.append((n, part_path, submit_verify(verifier, part_path)))
+
+        for n, part_path, result in pending:
+            if isinstance(result, Future):
+                try:
+                    meta_row, reason = result.result()
+                except BrokenProcessPool:  # a verifier process died: check this file here instead
+                    meta_row, reason = verify_image(part_path, MIN_LOGO_WIDTH, MIN_LOGO_HEIGHT)
+            else:
+                meta_row, reason = result
+            if reason:
+                os.remove(part_path)
+                lines.append(f"   Logo{n}: ❌ Rejected - {reason}")
+                checks[f'Logo{n}_Check'] = f'REJECTED: {reason}'
+                stats['rejected'] += 1
+                continue
+            stem = Path(part_path.stem)
+            file_path = place_verified(part_path, output_folder / stem.stem, stem.suffix, meta_row, meta)
+            lines.append(f"   Logo{n}: ✓ Downloaded → {file_path.name} ({describe(meta_row)})")
+            checks[f'Logo{n}_Check'] = describe(meta_row)
+            stats['images'] += 1
+            downloaded.append(file_path.name)
+
+        row = {
             'Brand': brand,
             'Matched_As': matched_name,
             'Match_Type': match_type,
-            'Downloaded': ', '.join(downloaded) if downloaded else 'None'
-        })
+            'Downloaded': ', '.join(downloaded) if downloaded else 'None',
+            **checks
+        }
+        if state and not stats['failed']:  # failed downloads are retried on the next run
+            for fn in previous[1] if previous else []:
+                if fn not in downloaded and (output_folder / fn).exists():
+                    os.remove(output_folder / fn)  # left over from the old URLs
+                    meta.pop(fn)
+            state.put(brand, fingerprint, downloaded, row)
+        return row, lines, stats
+
+_print_lock = threading.Lock()
+
+def download_batch(batch_number, brands, master, budget=None, verifier=None, full=False):
+    with _print_lock:
+        print(f"\n{'='*70}")
+        print(f"🎯 DOWNLOADING LOGOS FOR BATCH {batch_number.upper()}")
+        print(f"{'='*70}")
 
-    # Export Excel report
+    output_folder = Path(f"batch_{batch_number}_logos")
+    output_folder.mkdir(exist_ok=True)
+    meta = meta_for(output_folder)
+    state = DownloadState(output_folder, force=full)
+
+    # Rows are flushed to a .jsonl log as brands finish (in manifest order), then converted to .xlsx
     timestamp = datetime.now().strftime("%Y%m%d_%H%M")
     report_name = f"batch_{batch_number}_download_report_{timestamp}.xlsx"
-    pd.DataFrame(results).to_excel(report_name, index=False)
-
-    print("\n📊 SUMMARY")
-    print("------------------------------------------------------")
-    print(f"   Found: {stats['found']}")
-    print(f"   Not Found: {stats['not_found']}")
-    print(f"   Failed Downloads: {stats['failed']}")
-    print(f"   Total Images: {stats['images']}")
-    print(f"   Folder: {output_folder}/")
-    print(f"   Report: {report_name}")
-    print("=======================================================")
+    report = ReportSink(Path(report_name).with_suffix(".jsonl"))
+    stats = {'found':0, 'not_found':0, 'failed':0, 'rejected':0, 'images':0, 'unchanged':0}
+
+    # Brands run concurrently; the shared budget caps connections across all batches
+    workers = budget.max_connections if budget else 1
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"batch-{batch_number}") as pool:
+        futures = {pool.submit(download_brand, i, brand, master, output_folder, meta, budget, verifier, state): i
+                   for i, brand in enumerate(brands, 1)}
+        finished, next_row = {}, 1
+        for future in as_completed(futures):
+            row, lines, brand_stats = future.result()
+            finished[futures[future]] = row
+            while next_row in finished:  # hold early finishers until the brands before them are in
+                report.append(finished.pop(next_row))
+                next_row += 1
+            for key, value in brand_stats.items():
+                stats[key] += value
+            with _print_lock:
+                print(f"\n[{batch_number}] " + "\n".join(lines))
+
+    # Export Excel report
+    report.finalize(report_name)
+
+    with _print_lock:
+        print(f"\n📊 SUMMARY - BATCH {batch_number.upper()}")
+        print("------------------------------------------------------")
+        print(f"   Found: {stats['found']}")
+        print(f"   Unchanged (kept): {stats['unchanged']}")
+        print(f"   Not Found: {stats['not_found']}")
+        print(f"   Failed Downloads: {stats['failed']}")
+        print(f"   Rejected (bad image): {stats['rejected']}")
+        print(f"   Total Images: {stats['images']}")
+        print(f"   Folder: {output_folder}/")
+        print(f"   Report: {report_name}")
+        print("=======================================================")
+    return stats
+
+def quick_lookup(names, master, download=False):
+    """Match brand names against the sheet and print their URLs (optionally download them)."""
+    output_folder = Path("lookup_logos")
+    for i, name in enumerate(names, 1):
+        if download:
+            output_folder.mkdir(exist_ok=True)
+            _, lines, _ = download_brand(i, name, master, output_folder, meta_for(output_folder))
+            print("\n".join(lines))
+            continue
+        row, match_type, matched_name = find_best_match(name, master)
+        if row is None:
+            print(f"{i:2d}. {name}: ❌ No match found in sheet.")
+            continue
+        print(f"{i:2d}. {name} → {matched_name} [{match_type}]")
+        for n in range(1, 4):
+            url = row.get(f'Logo{n}', '')
+            if url:
+                print(f"   Logo{n}: {url}")
+
+def run_batches(batches, master, parallel_batches=PARALLEL_BATCHES, budget=None, full=False):
+    """Run several batches side by side, all drawing from one DownloadBudget and one decode pool."""
+    budget = budget or DownloadBudget()
+    results = {}
+    with ProcessPoolExecutor(max_workers=VERIFY_WORKERS) as verifier, \
+            ThreadPoolExecutor(max_workers=max(1, parallel_batches), thread_name_prefix="batch") as pool:
+        futures = {pool.submit(download_batch, batch_id, brand_list, master, budget, verifier, full): batch_id
+                   for batch_id, brand_list in batches.items()}
+        for future in as_completed(futures):
+            results[futures[future]] = future.result()
+    return results
 
 # =========================================================
 # ---------------------- MAIN ENTRY -----------------------
 # =========================================================
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download logos for the batches in a manifest.")
+    parser.add_argument("--manifest", default=BATCH_MANIFEST, help="CSV / YAML / XLSX batch manifest")
+    parser.add_argument("--sheet", help="sheet tab when the manifest is an Excel file")
+    parser.add_argument("--batch", action="append", help="only run this batch (repeatable)")
+    parser.add_argument("--parallel-batches", type=int, default=PARALLEL_BATCHES)
+    parser.add_argument("--connections", type=int, default=MAX_CONNECTIONS, help="global simultaneous downloads")
+    parser.add_argument("--bandwidth-mbps", type=float, help="global bandwidth cap in megabytes/second")
+    parser.add_argument("--full", action="store_true", help="re-download every brand, not just changed sheet rows")
+    parser.add_argument("--lookup", action="append", metavar="BRAND", help="quick lookup, no batch run (repeatable)")
+    parser.add_argument("--download", action="store_true", help="with --lookup: also download into lookup_logos/")
+    args = parser.parse_args()
+
+    if args.lookup:
+        if not Path(CLIENT_LOGO_FILE).exists():
+            print(f"❌ ERROR: {CLIENT_LOGO_FILE} not found in this folder.")
+            exit()
+        quick_lookup(args.lookup, load_master(CLIENT_LOGO_FILE), download=args.download)
+        exit()
+
+    if not Path(args.manifest).exists():
+        print(f"❌ ERROR: batch manifest {args.manifest} not found.")
+        exit()
+    try:
+        batches = select_batches(load_manifest(args.manifest, args.sheet), args.batch)
+    except ValueError as e:
+        print(f"❌ ERROR: {e}")
+        exit(1)
+    print(f"🗂️  {len(batches)} batch(es) from {args.manifest}: {', '.join(batches)}")
+
     print("📂 Loading client logo master file...")
     if not Path(CLIENT_LOGO_FILE).exists():
         print(f"❌ ERROR: {CLIENT_LOGO_FILE} not found in this folder.")
         exit()
 
-    logo_df = pd.read_excel(CLIENT_LOGO_FILE)
-    logo_df.columns = logo_df.columns.str.strip()
-    logo_df["Brand_Lower"] = logo_df["Brand"].astype(str).str.strip().str.lower()
+    master = load_master(CLIENT_LOGO_FILE)
 
-    print(f"✓ Loaded {len(logo_df)} brands from client sheet.")
+    print(f"✓ Loaded {len(master)} brands from client sheet.")
 
-    for batch_id, brand_list in BATCHES.items():
-        download_batch(batch_id, brand_list, logo_df)
+    rate = int(args.bandwidth_mbps * 1024 * 1024) if args.bandwidth_mbps else MAX_BYTES_PER_SEC
+    run_batches(batches, master, args.parallel_batches, DownloadBudget(args.connections, rate), args.full)
 
     print("\n🎉 All batches completed successfully!")
@@ -0,0 +1,294 @@
+"""
+LOGO METADATA INDEX
+---------------------------------------------------------
+Keeps a small SQLite sidecar (.logo_meta.sqlite) inside each
+batch folder with the facts reviewers care about:
+dimensions, format, byte size, transparency, a content hash
+and (for raster logos) a 64-bit perceptual hash.
+
+Files are decoded ONCE - when they are downloaded or uploaded -
+and the sidecar is reconciled by mtime/size at startup, so
+listing routes never have to open an image.
+
+The sidecar travels with the folder, so a `batch_xx_logos`
+folder copied into static/logos keeps its metadata.
+"""
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+META_FILENAME = ".logo_meta.sqlite"
+HASH_CHUNK_SIZE = 64 * 1024
+ALPHA_MODES = {"RGBA", "LA", "PA", "RGBa", "La"}
+DHASH_SIZE = 8
+SCHEMA_VERSION = 1  # bumped when stored values must be re-probed (1: relative SVG sizes)
+COLUMNS = ("filename", "size", "mtime_ns", "sha256", "format", "width", "height", "has_alpha", "phash")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS logo_meta (
+    filename  TEXT PRIMARY KEY,
+    size      INTEGER NOT NULL,
+    mtime_ns  INTEGER NOT NULL,
+    sha256    TEXT NOT NULL,
+    format    TEXT,
+    width     INTEGER,
+    height    INTEGER,
+    has_alpha INTEGER,
+    phash     TEXT
+)
+"""
+
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+RELATIVE_SVG_UNITS = {"%", "em", "ex", "rem"}
+
+
+def _svg_length(value):
+    """Pixels for an absolute SVG length; None for relative ones ("100%", "2em") so the viewBox is used."""
+    match = re.match(r"\s*([0-9.]+)\s*([a-z%]*)", value or "", re.I)
+    if not match or match.group(2).lower() in RELATIVE_SVG_UNITS:
+        return None
+    return int(float(match.group(1)))
+
+
+def probe_svg(path):
+    root = ET.parse(path).getroot()
+    if not root.tag.endswith("svg"):
+        raise ValueError("not an SVG document")
+    width, height = _svg_length(root.get("width")), _svg_length(root.get("height"))
+    if (not width or not height) and root.get("viewBox"):
+        parts = re.split(r"[\s,]+", root.get("viewBox").strip())
+        if len(parts) == 4:
+            width, height = int(float(parts[2])), int(float(parts[3]))
+    # Vector logos have no backdrop unless they draw one.
+    return "svg", width, height, True
+
+
+def dhash(img):
+    """64-bit difference hash as 16 hex chars; transparent areas are flattened onto white first."""
+    from PIL import Image
+
+    rgba = img.convert("RGBA")
+    flat = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+    flat.alpha_composite(rgba)
+    small = flat.convert("L").resize((DHASH_SIZE + 1, DHASH_SIZE), Image.LANCZOS)
+    px = list(small.getdata())
+    bits = 0
+    for row in range(DHASH_SIZE):
+        for col in range(DHASH_SIZE):
+            left = px[row * (DHASH_SIZE + 1) + col]
+            right = px[row * (DHASH_SIZE + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return f"{bits:016x}"
+
+
+def probe_raster(path):
+    from PIL import Image
+
+    with Image.open(path) as img:
+        has_alpha = img.mode in ALPHA_MODES or "transparency" in img.info
+        img.seek(0)
+        return (img.format or "").lower() or None, img.width, img.height, has_alpha, dhash(img)
+
+
+def probe_image(path):
+    """Decode a file once and return its metadata row (format/dims are None if undecodable)."""
+    path = Path(path)
+    st = path.stat()
+    try:
+        if path.suffix.lower() == ".svg":
+            fmt, width, height, has_alpha = probe_svg(path)
+            phash = None
+        else:
+            fmt, width, height, has_alpha, phash = probe_raster(path)
+    except Exception:
+        fmt, width, height, has_alpha, phash = None, None, None, None, None
+    return {
+        "filename": path.name,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": file_sha256(path),
+        "format": fmt,
+        "width": width,
+        "height": height,
+        "has_alpha": has_alpha,
+        "phash": phash,
+    }
+
+
+def sniff_svg(path):
+    """True when the file's first bytes look like XML/SVG markup rather than a raster header."""
+    with open(path, "rb") as f:
+        head = f.read(256).lstrip(b"\xef\xbb\xbf \t\r\n")
+    return head.startswith(b"<")
+
+
+def verify_image(path, min_width=1, min_height=1):
+    """Fully decode a downloaded file. Returns (meta row, None) if usable, else (None, reason).
+
+    Runs in a worker process: raster files are decoded pixel by pixel (so
+    truncated data fails), SVG is parsed as XML, and HTML error pages or
+    tracking pixels are rejected by format and (raster only) minimum dimensions.
+    """
+    from PIL import Image
+
+    path = Path(path)
+    try:
+        if sniff_svg(path):
+            fmt, width, height, has_alpha = probe_svg(path)
+            phash = None
+        else:
+            with Image.open(path) as img:
+                img.load()
+                has_alpha = img.mode in ALPHA_MODES or "transparency" in img.info
+                fmt, width, height = (img.format or "").lower() or None, img.width, img.height
+                phash = dhash(img)
+    except Exception as e:
+        return None, f"undecodable ({type(e).__name__}: {str(e)[:60]})"
+    # SVG sizes are nominal (a 24x24 viewBox scales to any size): the raster minimum doesn't apply.
+    if fmt != "svg" and width is not None and height is not None and (width < min_width or height < min_height):
+        return None, f"too small ({width}x{height})"
+    st = path.stat()
+    return {
+        "filename": path.name,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "sha256": file_sha256(path),
+        "format": fmt,
+        "width": width,
+        "height": height,
+        "has_alpha": has_alpha,
+        "phash": phash,
+    }, None
+
+
+class MetaStore:
+    """Metadata sidecar for one batch folder. Safe to share between request threads."""
+
+    def __init__(self, batch_dir):
+        self.batch_dir = Path(batch_dir)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.batch_dir / META_FILENAME), check_same_thread=False)
+        with self._lock, self._db:
+            self._db.execute(_SCHEMA)
+            present = {r[1] for r in self._db.execute("PRAGMA table_info(logo_meta)")}
+            if "phash" not in present:
+                self._db.execute("ALTER TABLE logo_meta ADD COLUMN phash TEXT")
+            # Sidecars older than SCHEMA_VERSION 1 read relative SVG sizes ("100%") as pixels.
+            self._stale_svg = self._db.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION
+
+    def _row(self, values):
+        row = dict(zip(COLUMNS, values))
+        if row["has_alpha"] is not None:
+            row["has_alpha"] = bool(row["has_alpha"])
+        return row
+
+    def put(self, row):
+        values = tuple(row[c] for c in COLUMNS)
+        with self._lock, self._db:
+            self._db.execute(f"INSERT OR REPLACE INTO logo_meta VALUES ({','.join('?' * len(COLUMNS))})", values)
+
+    def put_many(self, rows):
+        """Store many rows in one transaction (bulk imports, generated test batches)."""
+        values = [tuple(row[c] for c in COLUMNS) for row in rows]
+        with self._lock, self._db:
+            self._db.executemany(f"INSERT OR REPLACE INTO logo_meta VALUES ({','.join('?' * len(COLUMNS))})", values)
+
+    def record(self, filename):
+        """Probe a freshly written file and store its row."""
+        row = probe_image(self.batch_dir / filename)
+        self.put(row)
+        return row
+
+    def pop(self, filename):
+        with self._lock, self._db:
+            cur = self._db.execute(f"SELECT {','.join(COLUMNS)} FROM logo_meta WHERE filename = ?", (filename,))
+            found = cur.fetchone()
+            self._db.execute("DELETE FROM logo_meta WHERE filename = ?", (filename,))
+        return self._row(found) if found else None
+
+    def rename(self, old, new):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM logo_meta WHERE filename = ?", (new,))
+            self._db.execute("UPDATE logo_meta SET filename = ? WHERE filename = ?", (new, old))
+
+    def all(self):
+        with self._lock:
+            cur = self._db.execute(f"SELECT {','.join(COLUMNS)} FROM logo_meta")
+            return {values[0]: self._row(values) for values in cur.fetchall()}
+
+    def get_many(self, filenames):
+        """Rows for just these files (no full-table read on big batches)."""
+        filenames = list(filenames)
+        if not filenames:
+            return {}
+        with self._lock:
+            cur = self._db.execute(f"SELECT {','.join(COLUMNS)} FROM logo_meta WHERE filename IN "
+                                   f"({','.join('?' * len(filenames))})", filenames)
+            return {values[0]: self._row(values) for values in cur.fetchall()}
+
+    def reconcile(self, allowed_ext):
+        """Re-probe files whose size/mtime changed, add new ones and drop rows for deleted files."""
+        known = self.all()
+        seen = set()
+        probed = 0
+        for p in self.batch_dir.iterdir():
+            if not p.is_file() or p.suffix.lower() not in allowed_ext:
+                continue
+            seen.add(p.name)
+            st = p.stat()
+            row = known.get(p.name)
+            missing_phash = row and row["phash"] is None and row["format"] not in (None, "svg")
+            stale_svg = row and self._stale_svg and row["format"] == "svg"
+            if row and row["size"] == st.st_size and row["mtime_ns"] == st.st_mtime_ns \
+                    and not missing_phash and not stale_svg:
+                continue
+            self.put(probe_image(p))
+            probed += 1
+        stale = [fn for fn in known if fn not in seen]
+        with self._lock, self._db:
+            self._db.executemany("DELETE FROM logo_meta WHERE filename = ?", [(fn,) for fn in stale])
+            if self._stale_svg:
+                self._db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+                self._stale_svg = False
+        return probed, len(stale)
+
+
+_STORES = {}
+_STORES_LOCK = threading.Lock()
+
+
+def _forget_stores():
+    """Forked child: open its own sidecar connections (the parent's stay referenced, never closed here)."""
+    _INHERITED.extend(_STORES.values())
+    _STORES.clear()
+
+
+_INHERITED = []
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_forget_stores)
+
+
+def meta_for(batch_dir):
+    """Shared MetaStore for a batch folder (one SQLite connection per folder per process)."""
+    key = str(Path(batch_dir).resolve())
+    with _STORES_LOCK:
+        if key not in _STORES:
+            _STORES[key] = MetaStore(batch_dir)
+        return _STORES[key]
+
+
+def public_meta(row):
+    return {k: row[k] for k in ("format", "width", "height", "size", "has_alpha", "sha256")}
@@ -0,0 +1,334 @@
+"""
+PACKED LOGO STORE
+---------------------------------------------------------
+Optional serving format for big batches: instead of opening one
+small file per logo, every batch gets ONE append-only data file
+plus a JSON offset index under data/packs/. The data file is
+memory-mapped and logos are served as slices of the map - no
+open(), stat() or read() per request.
+
+The loose files in static/logos/<batch>/ stay the source of
+truth. Editor changes are applied to the pack as they happen
+(new uploads are appended, deletes and renames only touch the
+index) - made inside `changing()`, which checks the pack still
+matched the folder right before; anything else - a folder copied in, a download run - is
+noticed through the batch folder's mtime, and the pack is
+rebuilt in the background while requests fall back to the
+files. Once deleted/replaced logos take up more than half the
+data file, it is compacted the same way.
+
+Several server processes (run_server.py workers) share one pack:
+rebuilds, appends and index writes take a file lock on the pack
+folder, every generation gets a data file name of its own, and a
+process that sees a newer index.json adopts it instead of
+rebuilding.
+
+Enable in the editor with:  LOGO_PACKS=1 python logo_preview_editor.py
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+PACK_ROOT = Path(__file__).parent / "data" / "packs"
+INDEX_NAME = "index.json"
+LOCK_NAME = "pack.lock"
+REVALIDATE_SECONDS = 2.0   # how often a pack re-checks its batch folder's mtime
+REBUILD_DELAY = 2.0        # debounce: one rebuild for a burst of changes
+GARBAGE_RATIO = 0.5        # compact once this share of the data file is dead
+
+
+def pack_dir_for(batch_dir, pack_root=PACK_ROOT):
+    """data/packs/<batch>-<hash of the folder path>, so equal batch names under different roots never collide."""
+    batch_dir = Path(batch_dir).resolve()
+    digest = hashlib.sha1(str(batch_dir).encode("utf-8")).hexdigest()[:8]
+    return Path(pack_root) / f"{batch_dir.name}-{digest}"
+
+
+def _etag(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+class LogoPack:
+    """One batch's pack: index {filename: [offset, length, mtime_ns, etag]} over a mapped data file."""
+
+    def __init__(self, batch_dir, allowed_ext, pack_root=PACK_ROOT):
+        self.batch_dir = Path(batch_dir)
+        self.allowed_ext = set(allowed_ext)
+        self.pack_dir = pack_dir_for(batch_dir, pack_root)
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._index = None
+        self._index_stamp = None
+        self._mm = None
+        self._checked = 0.0
+        self._fresh = False
+        self._timer = None
+        self._local = threading.local()  # per thread: inside changing()? was the pack in sync there?
+        self._load()
+
+    # ---------- loading ----------
+    def _stamp(self):
+        """Identity of the published index.json - it is always replaced, never rewritten in place."""
+        try:
+            st = (self.pack_dir / INDEX_NAME).stat()
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def _load(self):
+        stamp = self._stamp()
+        try:
+            index = json.loads((self.pack_dir / INDEX_NAME).read_text(encoding="utf-8"))
+            self._map(index)
+        except (OSError, ValueError, KeyError):
+            self._index, self._mm = None, None
+        self._index_stamp = stamp
+
+    def _reload_if_changed(self):
+        """Adopt an index another process published since we last read or wrote it."""
+        if self._stamp() != self._index_stamp:
+            self._load()
+
+    @contextmanager
+    def _locked_dir(self):
+        """Serialize writers to the pack folder across threads and (where fcntl exists) processes."""
+        try:
+            import fcntl
+        except ImportError:
+            fcntl = None  # no fork there: one process, and the thread locks already cover it
+        if fcntl is None or getattr(self._local, "locked", False):
+            yield
+            return
+        self.pack_dir.mkdir(parents=True, exist_ok=True)
+        # flock holds per open file, so this also keeps two threads of one process apart
+        with open(self.pack_dir / LOCK_NAME, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._local.locked = True
+            try:
+                yield
+            finally:
+                self._local.locked = False
+
+    def _map(self, index):
+        """Point at `index` and (re)map its data file. Old maps are left to the GC:
+        responses may still hold memoryviews into them."""
+        path = self.pack_dir / index["data"]
+        size = path.stat().st_size
+        mm = None
+        if size:
+            with open(path, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._index, self._mm, self._checked = index, mm, 0.0
+
+    def _dir_mtime(self):
+        try:
+            return self.batch_dir.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _save_index(self):
+        tmp = self.pack_dir / f"{INDEX_NAME}.{os.getpid()}.tmp"
+        tmp.write_text(json.dumps(self._index, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp, self.pack_dir / INDEX_NAME)
+        self._index_stamp = self._stamp()
+
+    def fresh(self):
+        """True when the pack matches the batch folder (checked at most every REVALIDATE_SECONDS)."""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._checked >= REVALIDATE_SECONDS:
+                self._reload_if_changed()
+                self._fresh = self._index is not None and self._index["dir_mtime_ns"] == self._dir_mtime()
+                self._checked = now
+                if not self._fresh:
+                    self._schedule()
+            return self._fresh
+
+    # ---------- reading ----------
+    def get(self, filename):
+        """(memoryview, entry) for a packed logo, or None when the caller should use the file."""
+        if not self.fresh():
+            return None
+        with self._lock:
+            entry = self._index["entries"].get(filename)
+            if entry is None or self._mm is None:
+                return None
+            offset, length = entry[0], entry[1]
+            return memoryview(self._mm)[offset:offset + length], entry
+
+    def names(self):
+        """Sorted filenames in the batch, or None when the pack is stale."""
+        if not self.fresh():
+            return None
+        with self._lock:
+            return sorted(self._index["entries"])
+
+    # ---------- editor changes ----------
+    @contextmanager
+    def changing(self):
+        """Wrap an editor change to the batch folder and the add/remove/rename calls that report it.
+
+        The folder is checked against the index before the change, so a change made elsewhere
+        (another process, a copy) since the last check is not masked when the pack adopts the
+        folder's new mtime; the pack is rebuilt instead."""
+        with self._locked_dir():
+            with self._lock:
+                self._reload_if_changed()
+                self._local.in_sync = self._index is not None and self._index["dir_mtime_ns"] == self._dir_mtime()
+            try:
+                yield self
+            finally:
+                self._local.in_sync = None
+
+    def _in_sync(self):
+        """Only patch a pack that matched the folder before the change: otherwise another change would be masked."""
+        in_sync = getattr(self._local, "in_sync", None)
+        if in_sync is None:
+            # Reported after the fact: only an in-place rewrite leaves the folder's mtime as the index has it.
+            in_sync = self._index is not None and self._index["dir_mtime_ns"] == self._dir_mtime()
+        if not in_sync:
+            self._schedule()
+            return False
+        return True
+
+    def _touch(self):
+        """Adopt the folder's new mtime after a change we applied ourselves."""
+        self._index["dir_mtime_ns"] = self._dir_mtime()
+        self._save_index()
+        self._checked = 0.0
+
+    def add(self, filename):
+        """Append a new or replaced file to the data file."""
+        path = self.batch_dir / filename
+        with self._locked_dir(), self._lock:
+            self._reload_if_changed()
+            if not self._in_sync():
+                return
+            data = path.read_bytes()
+            old = self._index["entries"].get(filename)
+            if old:
+                self._index["garbage"] += old[1]
+            data_path = self.pack_dir / self._index["data"]
+            with open(data_path, "ab") as f:
+                offset = f.tell()
+                f.write(data)
+            self._index["entries"][filename] = [offset, len(data), path.stat().st_mtime_ns, _etag(data)]
+            self._touch()
+            self._map(self._index)
+            self._maybe_compact(offset + len(data))
+
+    def remove(self, filename):
+        with self._locked_dir(), self._lock:
+            self._reload_if_changed()
+            if not self._in_sync():
+                return
+            old = self._index["entries"].pop(filename, None)
+            if old:
+                self._index["garbage"] += old[1]
+            self._touch()
+            self._maybe_compact(len(self._mm) if self._mm else 0)
+
+    def rename(self, old, new):
+        with self._locked_dir(), self._lock:
+            self._reload_if_changed()
+            if not self._in_sync():
+                return
+            entries = self._index["entries"]
+            if new in entries:
+                self._index["garbage"] += entries.pop(new)[1]
+            if old in entries:
+                entries[new] = entries.pop(old)
+            self._touch()
+
+    def _maybe_compact(self, data_size):
+        if data_size and self._index["garbage"] > GARBAGE_RATIO * data_size:
+            self._schedule()
+
+    # ---------- background rebuild ----------
+    def _schedule(self):
+        if self._timer is None:
+            self._timer = threading.Timer(REBUILD_DELAY, self._rebuild_later)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _rebuild_later(self):
+        with self._lock:
+            self._timer = None
+        self.rebuild()
+
+    def rebuild(self):
+        """Write a fresh generation from the loose files, swap it in and drop older generations."""
+        with self._rebuild_lock, self._locked_dir():
+            with self._lock:
+                # Another process may have rebuilt (or compacted) while we waited for the lock.
+                self._reload_if_changed()
+                if (self._index is not None and self._index["dir_mtime_ns"] == self._dir_mtime()
+                        and self._index["garbage"] <= GARBAGE_RATIO * (len(self._mm) if self._mm else 0)):
+                    self._checked = 0.0
+                    return len(self._index["entries"])
+            return self._rebuild()
+
+    def _rebuild(self):
+        dir_mtime = self._dir_mtime()  # taken first: changes made while we copy leave the pack stale
+        if dir_mtime is None:
+            return
+        self.pack_dir.mkdir(parents=True, exist_ok=True)
+        gen = (self._index["gen"] + 1) if self._index else 1
+        # Never reuse a name: other processes may still map the previous generation's file.
+        data_name = f"pack.{gen}.{uuid.uuid4().hex[:8]}.bin"
+        entries = {}
+        with open(self.pack_dir / data_name, "wb") as out:
+            for entry in sorted(os.scandir(self.batch_dir), key=lambda e: e.name):
+                if not entry.is_file() or Path(entry.name).suffix.lower() not in self.allowed_ext:
+                    continue
+                try:
+                    with open(entry.path, "rb") as f:
+                        data = f.read()
+                except FileNotFoundError:
+                    continue  # deleted while we copy; the folder's mtime already marks this pack stale
+                entries[entry.name] = [out.tell(), len(data), entry.stat().st_mtime_ns, _etag(data)]
+                out.write(data)
+        with self._lock:
+            self._index = {"gen": gen, "data": data_name, "dir_mtime_ns": dir_mtime, "garbage": 0, "entries": entries}
+            self._save_index()
+            self._map(self._index)
+        for old in self.pack_dir.glob("pack.*.bin"):
+            if old.name != data_name:
+                try:
+                    old.unlink()
+                except OSError:
+                    pass  # still mapped somewhere (Windows); removed by a later rebuild
+        return len(entries)
+
+    def ensure(self):
+        """Rebuild right away if stale (used by the startup warm-up thread)."""
+        if self._index is None or self._index["dir_mtime_ns"] != self._dir_mtime():
+            self.rebuild()
+
+
+_PACKS = {}
+_PACKS_LOCK = threading.Lock()
+
+
+def pack_for(batch_dir, allowed_ext, pack_root=PACK_ROOT):
+    """Shared LogoPack for a batch folder (one map per folder per process)."""
+    key = os.path.abspath(batch_dir)
+    with _PACKS_LOCK:
+        pack = _PACKS.get(key)
+        if pack is None:
+            real = os.path.realpath(batch_dir)  # a symlinked path must share the same pack
+            pack = _PACKS.get(real) or LogoPack(batch_dir, allowed_ext, pack_root)
+            _PACKS[key] = _PACKS[real] = pack
+        return pack
+
+
+def loaded_pack(batch_dir):
+    """The already-open pack for a folder, if any - a lookup with no filesystem access at all."""
+    return _PACKS.get(os.path.abspath(batch_dir))
@@ -13,24 +13,85 @@ Logo Preview Pro (Enhanced Version)
 ✅ NEW: White backgrounds for better logo visibility
 ✅ NEW: Delete individual logos
 ✅ FIXED: Add brand endpoint connection
+✅ NEW: Streaming ZIP export of a batch (or only the marked logos)
+✅ NEW: Bulk rename / delete / move in one request (exact brand matching)
+✅ NEW: Per-logo metadata (size, format, dimensions, transparency) for sorting & flags
+✅ NEW: Near-duplicate detection (perceptual hashes) within and across batches
+✅ NEW: Add Brand suggests matching names from the client master sheet as you type
+✅ NEW: Optional packed logo store (LOGO_PACKS=1): logos served from one mmap'd file per batch
+✅ NEW: Per-route latency / size / status metrics at /metrics (Prometheus) + slow-request log
+✅ NEW: Live updates - every reviewer's grid is patched over Server-Sent Events, no reloads
+✅ NEW: Grid shows cached thumbnails (/thumbs) - SVGs rasterized once, shared with the Excel exporter
+✅ NEW: Read-only static mirror for reviewers (python static_export.py mirror/)
+✅ NEW: Admins start background download jobs for a brand list (POST /admin/jobs) and poll their status
+✅ NEW: Large uploads go up in resumable, hash-checked chunks (/upload/init -> PUT chunks -> finalize)
+✅ NEW: Search every batch at once (/api/search, "All batches" button) - results grouped by batch
 """
 
 import os
+import re
+import json
+import time
 import uuid
+import mimetypes
+import zipfile
+import threading
+from contextlib import ExitStack, contextmanager
 from pathlib import Path
-from flask import Flask, render_template_string, jsonify, request, send_from_directory, abort
+from flask import Flask, Response, render_template_string, jsonify, request, send_file, send_from_directory, abort
+from werkzeug.exceptions import HTTPException
+from logo_meta import meta_for, public_meta
+from dupe_index import DEFAULT_THRESHOLD, DupeIndex, index_signature
+from brand_search import index_for
+from catalog_search import DEFAULT_LIMIT as SEARCH_LIMIT, CatalogSearch
+from logo_lookup_multi import load_master
+from logo_pack import loaded_pack, pack_for
+from route_metrics import install as install_metrics
+from catalog_events import CatalogEvents
+from thumb_cache import GRID_BOX, cached_thumbnail
+from download_jobs import DownloadJobs
+from admin_tokens import SharedTokens
+from chunked_uploads import UploadError, UploadSessions
 
 # --- Setup ---
 BASE_DIR = Path(__file__).parent
-STATIC_LOGOS_ROOT = BASE_DIR / "static" / "logos"
+STATIC_LOGOS_ROOT = Path(os.environ.get("STATIC_LOGOS_ROOT") or BASE_DIR / "static" / "logos")
 STATIC_LOGOS_ROOT.mkdir(parents=True, exist_ok=True)
+# marks, SQLite stores, uploads, packs and thumbnails; benchmarks/load_test.py points this at a temp root
+DATA_DIR = Path(os.environ.get("LOGO_DATA_DIR") or BASE_DIR / "data")
 
 ALLOWED_EXT = {".png", ".jpg", ".jpeg", ".svg", ".webp", ".gif"}
+# Already-compressed formats are stored as-is in exports; recompressing them only burns CPU.
+STORED_EXT = {".png", ".jpg", ".jpeg", ".webp", ".gif"}
+ZIP_CHUNK_SIZE = 64 * 1024
+MARKS_FILE = DATA_DIR / "marks.json"
+_MARKS_LOCK = threading.Lock()
+_LISTINGS = {}  # batch dir -> (dir mtime_ns, JSON body); warmed before run_server.py forks its workers
+_DUPES = {"sig": None, "index": None}
+_DUPES_LOCK = threading.Lock()
+SEARCH = CatalogSearch()  # brand search across every batch; shards follow each folder's mtime
+MAX_SEARCH_LIMIT = 1000
+MASTER_FILE = BASE_DIR / "client_logo_master.xlsx"
+_MASTER = {"mtime": None, "rows": []}
+USE_LOGO_PACKS = os.environ.get("LOGO_PACKS") == "1"  # see logo_pack.py
+SLOW_REQUEST_MS = float(os.environ.get("SLOW_REQUEST_MS", "500"))  # log requests slower than this
+# Live updates: each open stream holds one server thread, so keep this below the server's thread count
+MAX_EVENT_STREAMS = int(os.environ.get("MAX_EVENT_STREAMS", "24"))
+EVENT_STREAM_SECONDS = 300   # streams end and the browser reconnects (Last-Event-ID) - threads get recycled
+EVENT_HEARTBEAT_SECONDS = 15
+EVENT_RETRY_MS = 2000
+CATALOG = CatalogEvents(DATA_DIR / "catalog_events.sqlite")
+_EVENT_SLOTS = threading.BoundedSemaphore(MAX_EVENT_STREAMS)
+MAX_JOB_BRANDS = 5000
 ADMIN_PASSWORD = "aya900"
-ADMIN_TOKENS = set()
+ADMIN_TOKENS = SharedTokens(DATA_DIR / "admin_tokens.sqlite")  # shared by every server process (run_server.py pre-forks several)
+UPLOADS = UploadSessions(DATA_DIR / "uploads")  # chunked uploads; sessions on disk so any worker can take the next chunk
+PRELOADED = os.environ.get("LOGO_EDITOR_PRELOAD") == "1"  # run_server.py warms the catalog itself, then forks
 
 app = Flask(__name__)
-app.config["MAX_CONTENT_LENGTH"] = 12 * 1024 * 1024  # 12MB uploads
+app.config["MAX_CONTENT_LENGTH"] = 12 * 1024 * 1024  # 12MB per request; bigger files go up in chunks (/upload)
+# Pre-forked workers (run_server.py) pool their counters under data/metrics, so any worker can answer a scrape
+METRICS = install_metrics(app, slow_ms=SLOW_REQUEST_MS, spool_dir=DATA_DIR / "metrics" if PRELOADED else None)
 
 
 # --- Helpers ---
@@ -42,21 +103,206 @@ def scan_batches():
     return sorted([p.name for p in STATIC_LOGOS_ROOT.iterdir() if p.is_dir()])
 
 
+def brand_key_of(filename):
+    stem = Path(filename).stem
+    if "_logo" in stem.lower():
+        return stem.rsplit("_logo", 1)[0]
+    parts = stem.rsplit("_", 1)
+    return parts[0] if len(parts) == 2 and parts[1].isdigit() else stem
+
+
 def group_by_brand(filenames):
     groups = {}
     for fn in filenames:
-        stem = Path(fn).stem
-        if "_logo" in stem.lower():
-            brand_key = stem.rsplit("_logo", 1)[0]
-        else:
-            parts = stem.rsplit("_", 1)
-            brand_key = parts[0] if len(parts) == 2 and parts[1].isdigit() else stem
+        brand_key = brand_key_of(fn)
         brand_display = brand_key.replace("_", " ")
-        groups.setdefault(brand_key, {"brand": brand_display, "files": []})
+        groups.setdefault(brand_key, {"brand": brand_display, "key": brand_key, "files": []})
         groups[brand_key]["files"].append(fn)
     return [groups[k] for k in sorted(groups.keys(), key=lambda x: groups[x]["brand"].lower())]
 
 
+def logo_pack(batch_dir):
+    """The batch's LogoPack when packed serving is enabled, else None."""
+    return pack_for(batch_dir, ALLOWED_EXT, DATA_DIR / "packs") if USE_LOGO_PACKS else None
+
+
+@contextmanager
+def pack_change(*batch_dirs):
+    """Wrap a change to batch folders: each pack takes it incrementally only if it matched its folder before."""
+    with ExitStack() as stack:
+        if USE_LOGO_PACKS:
+            # one fixed order, so two moves in opposite directions never wait on each other's pack lock
+            for batch_dir in sorted(batch_dirs, key=lambda d: str(Path(d).resolve())):
+                stack.enter_context(logo_pack(batch_dir).changing())
+        yield
+
+
+def list_logos(batch_dir):
+    """Sorted logo filenames of a batch: from the pack index when it is fresh, else from the folder."""
+    pack = logo_pack(batch_dir)
+    names = pack.names() if pack else None
+    if names is None:
+        names = [p.name for p in sorted(batch_dir.iterdir()) if p.is_file() and allowed_ext(p.name)]
+    return names
+
+
+def listing_body(batch_dir):
+    """The /api/logos JSON for a batch, rebuilt only when the folder changed (every add, delete,
+    rename and sidecar write touches its mtime)."""
+    mtime = batch_dir.stat().st_mtime_ns  # read first: a change made while listing forces a rebuild
+    key = str(batch_dir)
+    hit = _LISTINGS.get(key)
+    if hit and hit[0] == mtime:
+        return hit[1]
+    groups = group_by_brand(list_logos(batch_dir))
+    meta = meta_for(batch_dir).all()
+    for group in groups:
+        group["meta"] = {fn: public_meta(meta[fn]) for fn in group["files"] if fn in meta}
+    body = app.json.dumps(groups).encode("utf-8")
+    _LISTINGS[key] = (mtime, body)
+    return body
+
+
+def brand_index(batch_dir):
+    """Exact brand key -> filenames for one batch, using the same grouping rule as the grid."""
+    index = {}
+    if not batch_dir.is_dir():
+        return index
+    for p in sorted(batch_dir.iterdir()):
+        if p.is_file() and allowed_ext(p.name):
+            index.setdefault(brand_key_of(p.name), []).append(p.name)
+    return index
+
+
+def free_name(batch_dir, filename, key):
+    """`filename` if it is free in batch_dir, else <key>_<n><ext> with the first free n."""
+    target, n = batch_dir / filename, 1
+    while target.exists():
+        target = batch_dir / f"{key}_{n}{Path(filename).suffix}"
+        n += 1
+    return target
+
+
+def move_to_free_name(src, batch_dir, filename, key):
+    """Move `src` into batch_dir under a free name (see free_name) and return the new path.
+
+    A hard link fails on an existing name where a rename would replace it, so a name taken
+    between the check and the move costs a retry, never a logo."""
+    while True:
+        target = free_name(batch_dir, filename, key)
+        try:
+            os.link(src, target)
+        except FileExistsError:
+            continue
+        os.unlink(src)
+        return target
+
+
+def rename_files(batch_dir, files, new_key):
+    renamed = []
+    with pack_change(batch_dir):
+        for counter, fn in enumerate(files, 1):
+            suffix = Path(fn).suffix
+            target_name = f"{new_key}_logo{suffix}" if counter == 1 else f"{new_key}_logo{counter}{suffix}"
+            target = move_to_free_name(batch_dir / fn, batch_dir, target_name, new_key)
+            meta_for(batch_dir).rename(fn, target.name)
+            if USE_LOGO_PACKS: logo_pack(batch_dir).rename(fn, target.name)
+            renamed.append((fn, target.name))
+    return renamed
+
+
+def remove_files(batch_dir, files):
+    meta, pack = meta_for(batch_dir), logo_pack(batch_dir)
+    with pack_change(batch_dir):
+        for fn in files:
+            (batch_dir / fn).unlink()
+            meta.pop(fn)
+            if pack: pack.remove(fn)
+
+
+def current_dupe_index():
+    """Near-duplicate index, rebuilt from the sidecars only when one of them changed."""
+    sig = index_signature(STATIC_LOGOS_ROOT)
+    with _DUPES_LOCK:
+        if _DUPES["sig"] != sig:
+            _DUPES["index"] = DupeIndex.from_root(STATIC_LOGOS_ROOT)
+            _DUPES["sig"] = sig
+        return _DUPES["index"]
+
+
+def current_catalog_search():
+    """Cross-batch search index, re-indexing only the batches whose folder changed since the last search."""
+    stamps = {b: (STATIC_LOGOS_ROOT / b).stat().st_mtime_ns for b in scan_batches()}
+    SEARCH.sync(stamps, lambda batch: group_by_brand(list_logos(STATIC_LOGOS_ROOT / batch)))
+    return SEARCH
+
+
+def master_rows():
+    """Master-sheet rows, reloaded (from the JSON cache) only when the .xlsx changes."""
+    try:
+        mtime = MASTER_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return []
+    if _MASTER["mtime"] != mtime:
+        _MASTER["rows"], _MASTER["mtime"] = load_master(MASTER_FILE), mtime
+    return _MASTER["rows"]
+
+
+def publish_downloaded(batch, files):
+    """Download-job callback: pack and announce logos a job just wrote into a batch."""
+    batch_dir = STATIC_LOGOS_ROOT / batch
+    if USE_LOGO_PACKS:
+        for fn in files: logo_pack(batch_dir).add(fn)
+    meta = meta_for(batch_dir).get_many(files)
+    CATALOG.publish(batch, "added", files=files, meta={fn: public_meta(meta[fn]) for fn in files if fn in meta})
+
+
+def next_logo_filename(batch_dir, brand, suffix):
+    """<brand>_logo<ext> for a brand's first file, then <brand>_logo2<ext>, _logo3 ..."""
+    brand_key = clean_brand_key(brand)
+    existing = [p for p in batch_dir.iterdir() if p.stem.startswith(brand_key)]
+    if len(existing) == 0:
+        return f"{brand_key}_logo{suffix}"
+    return f"{brand_key}_logo{len(existing) + 1}{suffix}"
+
+
+def publish_upload(batch, batch_dir, filename):
+    """Record, pack and announce one logo an admin just put into a batch; returns its metadata row."""
+    meta = meta_for(batch_dir).record(filename)
+    if USE_LOGO_PACKS: logo_pack(batch_dir).add(filename)
+    CATALOG.publish(batch, "added", files=[filename], meta={filename: public_meta(meta)})
+    return meta
+
+
+def reconcile_meta():
+    for batch in scan_batches():
+        meta_for(STATIC_LOGOS_ROOT / batch).reconcile(ALLOWED_EXT)
+
+
+def warm_packs():
+    for batch in scan_batches():
+        logo_pack(STATIC_LOGOS_ROOT / batch).ensure()
+
+
+def warm_catalog():
+    """Pay every cold-start cost up front: sidecars, packs, listings, master sheet, duplicate and search indexes."""
+    reconcile_meta()
+    if USE_LOGO_PACKS: warm_packs()
+    for batch in scan_batches():
+        listing_body(STATIC_LOGOS_ROOT / batch)
+    index_for(master_rows())
+    current_dupe_index()
+    current_catalog_search()
+
+
+def _reopen_after_fork():
+    """Pre-forked workers get their own SQLite connections and pools; nothing is shared with the master."""
+    CATALOG.reopen()
+    JOBS.reopen()
+    ADMIN_TOKENS.reopen()
+    METRICS.after_fork()
+
+
 def safe_join(base: Path, *paths):
     p = base.joinpath(*paths).resolve()
     if not str(p).startswith(str(base.resolve())):
@@ -75,14 +321,111 @@ def require_admin_token():
 
 
 def clean_brand_key(text: str):
-    import re
-
     s = re.sub(r'[<>:"/\\|?*]', "", text)
     s = s.strip().replace(" ", "_")
     s = re.sub(r"__+", "_", s)
     return s[:80]
 
 
+@contextmanager
+def marks_lock():
+    """Serialize marks.json updates across threads and, where fcntl exists, across worker processes."""
+    with _MARKS_LOCK:
+        try:
+            import fcntl
+        except ImportError:
+            yield
+            return
+        MARKS_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(MARKS_FILE.with_suffix(".lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+
+def load_marks():
+    try:
+        return json.loads(MARKS_FILE.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_marks(marks):
+    MARKS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = MARKS_FILE.with_suffix(".tmp")
+    tmp.write_text(json.dumps(marks, indent=2), encoding="utf-8")
+    os.replace(tmp, MARKS_FILE)
+
+
+def marked_files(batch, filenames):
+    """Files marked done in a batch, either one by one or through their brand's Mark All."""
+    marks = load_marks().get(batch, {})
+    picked = []
+    for group in group_by_brand(filenames):
+        brand_key = re.sub(r"\s+", "_", group["brand"])
+        for fn in group["files"]:
+            if marks.get(brand_key) or marks.get(f"{brand_key}::{fn}"):
+                picked.append(fn)
+    return picked
+
+
+def event_stream(batch, after):
+    """SSE body for one batch: catch up from version `after`, then push deltas as they are published."""
+    yield f"retry: {EVENT_RETRY_MS}\n\n"
+    deadline = time.monotonic() + EVENT_STREAM_SECONDS
+    events, head = CATALOG.since(batch, after)
+    while True:
+        if events is None:  # the log no longer reaches back that far
+            yield f"id: {head}\nevent: reset\ndata: {{}}\n\n"
+        else:
+            for version, kind, payload in events:
+                yield f"id: {version}\nevent: {kind}\ndata: {json.dumps(payload)}\n\n"
+            last = events[-1][0] if events else after
+            if head > last:
+                yield f"id: {head}\n\n"  # other batches moved on: advance Last-Event-ID, no event
+            elif not events:
+                yield ": ping\n\n"
+        after = head
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        events, head = CATALOG.wait(batch, after, min(EVENT_HEARTBEAT_SECONDS, remaining))
+
+
+class _ZipSink:
+    """Write-only file object for zipfile; output is drained by the streaming generator."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(files):
+    """Yield a ZIP archive of (path, arcname) pairs chunk by chunk, without a temp file or full buffer."""
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w") as zf:
+        for path, arcname in files:
+            zinfo = zipfile.ZipInfo.from_file(path, arcname)
+            zinfo.compress_type = zipfile.ZIP_STORED if path.suffix.lower() in STORED_EXT else zipfile.ZIP_DEFLATED
+            with open(path, "rb") as src, zf.open(zinfo, "w") as dst:
+                for chunk in iter(lambda: src.read(ZIP_CHUNK_SIZE), b""):
+                    dst.write(chunk)
+                    data = sink.drain()
+                    if data: yield data
+    data = sink.drain()
+    if data: yield data
+
+
 # --- Template ---
 TEMPLATE = r"""
 <!doctype html>
@@ -130,6 +473,9 @@ input[type=search]{width:220px;}
 .progress-bar{width:100%;background:#222;height:6px;border-radius:4px;overflow:hidden;margin-top:4px;display:none;}
 .progress-fill{height:100%;background:var(--accent);width:0%;transition:width 0.2s;}
 .card-actions{display:flex;gap:6px;flex-wrap:wrap;align-items:center;}
+#addBrandPanel{display:none;gap:6px;align-items:center;}
+#addBrandPanel input{width:240px;}
+.logo-flag{position:absolute;bottom:2px;left:2px;background:rgba(0,0,0,0.7);color:#ffd54f;border-radius:4px;padding:1px 4px;font-size:10px;pointer-events:none;}
 </style>
 </head>
 <body>
@@ -140,13 +486,28 @@ input[type=search]{width:220px;}
     <button id="loginBtn" class="btn">🔐 Admin Login</button>
     <button id="logoutBtn" class="btn" style="display:none">Logout</button>
     <button id="addBrandBtn" class="btn" style="display:none">+ Add Brand</button>
+    <span id="addBrandPanel">
+      <input id="newBrandInput" list="brandSuggestions" placeholder="Brand name (sheet suggestions)" autocomplete="off">
+      <datalist id="brandSuggestions"></datalist>
+      <button id="addBrandUploadBtn" class="btn">Choose logo…</button>
+      <button id="addBrandCancelBtn" class="btn">Cancel</button>
+    </span>
     <label>Batch:</label>
     <select id="batchSelect" onchange="onBatchChange()">
       <option value="">-- pick batch --</option>
       {% for b in batches %}<option value="{{b}}">{{b}}</option>{% endfor %}
     </select>
-    <input type="search" id="searchInput" placeholder="Search brand..." oninput="filterBrands()">
+    <input type="search" id="searchInput" placeholder="Search brand..." oninput="filterBrands()" onkeydown="if(event.key==='Enter'&&!MIRROR)searchAllBatches()">
+    <button onclick="searchAllBatches()" class="btn live-only" title="Find this brand in every batch (Enter)">🔎 All batches</button>
+    <select id="viewSelect" onchange="filterBrands()" title="Sort or flag logos using their stored metadata">
+      <option value="">Sort: name</option>
+      <option value="smallest">Sort: smallest first</option>
+      <option value="tiny">Flag: tiny logos</option>
+      <option value="opaque">Flag: no transparency</option>
+    </select>
     <button onclick="reloadCurrent()" class="btn">Reload</button>
+    <button onclick="exportBatch(false)" class="btn live-only" title="Download the whole batch as a ZIP">⬇ ZIP</button>
+    <button onclick="exportBatch(true)" class="btn live-only" title="Download only the logos marked done">⬇ Marked</button>
   </div>
 </header>
 <main>
@@ -154,122 +515,266 @@ input[type=search]{width:220px;}
 </main>
 </div>
 <script>
+// Set in the static mirror (static_export.py): read-only, listings and images are plain files.
+const MIRROR={{ mirror|tojson }};
 let currentBatch='',brandData=[];
+let liveEvents=null,liveConnected=false,renderPending=false;
 let doneMap=JSON.parse(localStorage.getItem('logo_done_v3')||'{}');
-let adminToken=localStorage.getItem('admin_token_v3')||null;
+let adminToken=MIRROR?null:(localStorage.getItem('admin_token_v3')||null);
 const grid=document.getElementById('logoGrid');
 const searchInput=document.getElementById('searchInput');
+const viewSelect=document.getElementById('viewSelect');
+const TINY_PX=100;
+
+function logoMeta(item,fn){return (item.meta||{})[fn]||null;}
+function thumbUrl(item,fn){return MIRROR?item.urls[fn].thumb:`/thumbs/${currentBatch}/${fn}`;}
+function isTiny(m){return !!m&&m.width!=null&&m.height!=null&&Math.min(m.width,m.height)<TINY_PX;}
+function isOpaque(m){return !!m&&m.has_alpha===false;}
+function minSide(item){
+  const sides=item.files.map(fn=>logoMeta(item,fn)).filter(m=>m&&m.width!=null).map(m=>Math.min(m.width,m.height));
+  return sides.length?Math.min(...sides):Infinity;
+}
+function describeMeta(m){
+  if(!m)return '';
+  const dims=m.width!=null?`${m.width}×${m.height}`:'?';
+  return `${(m.format||'?').toUpperCase()} ${dims} · ${Math.round(m.size/1024)} KB`+(m.has_alpha===false?' · no transparency':'');
+}
+
+function brandKeyOf(fn){
+  const stem=fn.replace(/\.[^.]*$/,'');
+  if(stem.toLowerCase().includes('_logo')){const i=stem.lastIndexOf('_logo');return i>=0?stem.slice(0,i):stem;}
+  const m=stem.match(/^(.*)_(\d+)$/);
+  return m?m[1]:stem;
+}
+function groupFor(key,create){
+  let g=brandData.find(b=>b.key===key);
+  if(!g&&create){
+    g={brand:key.replace(/_/g,' '),key:key,files:[],meta:{}};
+    const i=brandData.findIndex(b=>b.brand.toLowerCase()>g.brand.toLowerCase());
+    brandData.splice(i<0?brandData.length:i,0,g);
+  }
+  return g;
+}
+function addFile(fn,meta){
+  const g=groupFor(brandKeyOf(fn),true);
+  if(!g.files.includes(fn)){g.files.push(fn);g.files.sort();}
+  if(meta){g.meta=g.meta||{};g.meta[fn]=meta;}
+}
+function removeFile(fn){
+  const g=groupFor(brandKeyOf(fn),false);if(!g)return null;
+  const meta=(g.meta||{})[fn]||null;
+  g.files=g.files.filter(f=>f!==fn);if(g.meta)delete g.meta[fn];
+  if(!g.files.length)brandData.splice(brandData.indexOf(g),1);
+  return meta;
+}
+// Deltas are idempotent: replaying one the listing already contains changes nothing.
+function applyDelta(kind,d){
+  if(kind==='added')d.files.forEach(fn=>addFile(fn,(d.meta||{})[fn]));
+  else if(kind==='removed')d.files.forEach(removeFile);
+  else if(kind==='renamed')d.pairs.forEach(([from,to])=>addFile(to,removeFile(from)));
+  else if(kind==='mark'){const k=currentBatch+'::'+d.key;if(d.done)doneMap[k]=true;else delete doneMap[k];saveDone();}
+  scheduleRender();
+}
+function scheduleRender(){
+  if(renderPending)return;renderPending=true;
+  requestAnimationFrame(()=>{renderPending=false;renderGrid();});
+}
+function openLiveEvents(batch,version){
+  if(liveEvents)liveEvents.close();
+  liveConnected=false;
+  liveEvents=new EventSource(`/api/events/${batch}?since=${version}`);
+  liveEvents.onopen=()=>{liveConnected=true;};
+  liveEvents.onerror=()=>{liveConnected=false;};
+  ['added','removed','renamed','mark'].forEach(kind=>liveEvents.addEventListener(kind,e=>{if(batch===currentBatch)applyDelta(kind,JSON.parse(e.data));}));
+  liveEvents.addEventListener('reset',()=>{if(batch===currentBatch)loadBatch(batch);});
+}
+// With the live stream up our own changes come back as deltas; without it, refetch.
+function closeLiveEvents(){if(liveEvents)liveEvents.close();liveEvents=null;liveConnected=false;}
+function afterChange(){if(!liveConnected)reloadCurrent();}
 
 function saveDone(){localStorage.setItem('logo_done_v3',JSON.stringify(doneMap));}
+// The server's marks replace the batch's local ones, so unmarks made elsewhere clear here too.
+function applyMarks(batch,marks){
+  Object.keys(doneMap).forEach(k=>{if(k.startsWith(batch+'::'))delete doneMap[k];});
+  Object.keys(marks).forEach(k=>{if(marks[k])doneMap[batch+'::'+k]=true;});
+  saveDone();
+}
+function syncMark(key){
+  if(!adminToken)return;
+  fetch('/toggle_mark',{method:'POST',headers:{'Content-Type':'application/json','X-Admin-Token':adminToken},body:JSON.stringify({batch:currentBatch,key:key.slice(currentBatch.length+2),done:!!doneMap[key]})});
+}
+function exportBatch(marked){
+  if(!currentBatch){alert('Please select a batch first!');return;}
+  window.location=`/export/${currentBatch}`+(marked?'?marked=1':'');
+}
 function saveAdminToken(){if(adminToken)localStorage.setItem('admin_token_v3',adminToken);else localStorage.removeItem('admin_token_v3');}
 function setAdminUI(loggedIn){document.getElementById('loginBtn').style.display=loggedIn?'none':'inline-block';document.getElementById('logoutBtn').style.display=loggedIn?'inline-block':'none';document.getElementById('addBrandBtn').style.display=loggedIn?'inline-block':'none';}
 
 setAdminUI(!!adminToken);
+if(MIRROR)document.querySelectorAll('#loginBtn,.live-only').forEach(el=>el.style.display='none');
 
 document.getElementById('loginBtn').onclick=async ()=>{
   const pw=prompt('Enter admin password:'); if(!pw)return;
   const res=await fetch('/admin_login',{method:'POST',headers:{'Content-Type':'application/json'},body:JSON.stringify({password:pw})});
   if(!res.ok){alert('Login failed');return;}
-  const j=await res.json();adminToken=j.token;saveAdminToken();setAdminUI(true);alert('Admin unlocked');reloadCurrent();
+  const j=await res.json();adminToken=j.token;saveAdminToken();setAdminUI(true);alert('Admin unlocked');renderGrid();
 };
 
 document.getElementById('logoutBtn').onclick=async ()=>{
   if(adminToken)await fetch('/admin_logout',{method:'POST',headers:{'X-Admin-Token':adminToken}});
-  adminToken=null;saveAdminToken();setAdminUI(false);alert('Logged out');reloadCurrent();
+  adminToken=null;saveAdminToken();setAdminUI(false);alert('Logged out');renderGrid();
 };
 
+const addBrandPanel=document.getElementById('addBrandPanel');
+const newBrandInput=document.getElementById('newBrandInput');
+let suggestTimer=null;
+
 document.getElementById('addBrandBtn').onclick=()=>{
   if(!currentBatch){alert('Please select a batch first!');return;}
-  const name=prompt('New brand name:');if(!name)return;
+  addBrandPanel.style.display='inline-flex';newBrandInput.value='';newBrandInput.focus();
+};
+document.getElementById('addBrandCancelBtn').onclick=()=>{addBrandPanel.style.display='none';};
+newBrandInput.oninput=()=>{
+  clearTimeout(suggestTimer);
+  const q=newBrandInput.value.trim();
+  if(q.length<2)return;
+  suggestTimer=setTimeout(async ()=>{
+    const res=await fetch('/api/brand_suggest?q='+encodeURIComponent(q));
+    if(!res.ok)return;
+    const list=document.getElementById('brandSuggestions');
+    list.innerHTML='';
+    (await res.json()).forEach(s=>{const o=document.createElement('option');o.value=s.brand;o.label=`${s.brand} (${Math.round(s.score*100)}%)`;list.appendChild(o);});
+  },150);
+};
+document.getElementById('addBrandUploadBtn').onclick=()=>{
+  const name=newBrandInput.value.trim();if(!name){newBrandInput.focus();return;}
   const fileInput=document.createElement('input');fileInput.type='file';fileInput.accept='image/*';
-  fileInput.onchange=e=>uploadBrand(name,e.target.files[0]);
+  fileInput.onchange=e=>{addBrandPanel.style.display='none';uploadLogo(name,e.target.files[0]);};
   fileInput.click();
 };
 
-async function uploadBrand(name,file){
-  if(!file||!currentBatch)return;
-  const fd=new FormData();
-  fd.append('file',file);fd.append('brand',name);fd.append('batch',currentBatch);
+const CHUNKED_UPLOAD_FROM=4*1024*1024; // bigger files go up in resumable chunks
+const MAX_CHUNK_RETRIES=8;
+const sleep=ms=>new Promise(ok=>setTimeout(ok,ms));
+
+async function sha256Hex(file){
+  const digest=await crypto.subtle.digest('SHA-256',await file.arrayBuffer());
+  return [...new Uint8Array(digest)].map(b=>b.toString(16).padStart(2,'0')).join('');
+}
+
+function formUpload(brand,file,onProgress){
+  return new Promise((resolve,reject)=>{
+    const fd=new FormData();
+    fd.append('file',file);fd.append('brand',brand);fd.append('batch',currentBatch);
+    const xhr=new XMLHttpRequest();
+    xhr.open('POST','/add_brand');
+    xhr.setRequestHeader('X-Admin-Token',adminToken);
+    xhr.upload.onprogress=(e)=>{if(e.lengthComputable)onProgress(e.loaded/e.total);};
+    xhr.onload=()=>xhr.status===200?resolve():reject(new Error(xhr.responseText));
+    xhr.onerror=()=>reject(new Error('connection lost'));
+    xhr.send(fd);
+  });
+}
+
+async function chunkedUpload(brand,file,onProgress){
+  // The upload id is remembered per file, so picking the same file again after a drop or reload resumes it.
+  const key=`upload:${currentBatch}:${brand}:${file.name}:${file.size}:${file.lastModified}`;
+  const headers={'X-Admin-Token':adminToken};
+  let id=localStorage.getItem(key),offset=0,chunk=CHUNKED_UPLOAD_FROM,failures=0;
+  if(id){
+    const res=await fetch('/upload/'+id,{headers});
+    if(res.ok)offset=(await res.json()).offset;else id=null;
+  }
+  if(!id){
+    const res=await fetch('/upload/init',{method:'POST',headers:{...headers,'Content-Type':'application/json'},
+      body:JSON.stringify({batch:currentBatch,brand,filename:file.name,size:file.size,sha256:await sha256Hex(file)})});
+    const info=await res.json();
+    if(!res.ok)throw new Error(info.error);
+    id=info.id;chunk=info.chunk_size;localStorage.setItem(key,id);
+  }
+  while(offset<file.size){
+    onProgress(offset/file.size);
+    let res=null;
+    try{res=await fetch(`/upload/${id}?offset=${offset}`,{method:'PUT',headers:{...headers,'Content-Type':'application/octet-stream'},body:file.slice(offset,offset+chunk)});}catch(e){}
+    if(!res||res.status>=500){
+      // Dropped connection or tunnel error: wait, ask the server how far it got, carry on from there.
+      if(++failures>MAX_CHUNK_RETRIES)throw new Error('connection lost - pick the same file again to resume');
+      await sleep(500*2**Math.min(failures,5));
+      try{const st=await fetch('/upload/'+id,{headers});if(st.ok)offset=(await st.json()).offset;}catch(e){}
+      continue;
+    }
+    const body=await res.json();
+    if(res.ok||res.status===409){offset=body.offset;failures=0;continue;}
+    if(res.status===404)localStorage.removeItem(key);
+    throw new Error(body.error);
+  }
+  onProgress(1);
+  const res=await fetch(`/upload/${id}/finalize`,{method:'POST',headers});
+  const body=await res.json();
+  if(res.ok||res.status===404||res.status===422)localStorage.removeItem(key);
+  if(!res.ok)throw new Error(body.error);
+}
+
+async function uploadLogo(brand,file){
+  if(!file||!currentBatch||!adminToken)return;
   const progressBar=document.createElement('div');
   progressBar.className='progress-bar';
   progressBar.innerHTML='<div class="progress-fill"></div>';
   document.body.appendChild(progressBar);
   progressBar.style.display='block';
   const fill=progressBar.querySelector('.progress-fill');
-  const xhr=new XMLHttpRequest();
-  xhr.open('POST','/add_brand');
-  xhr.setRequestHeader('X-Admin-Token',adminToken);
-  xhr.upload.onprogress=(e)=>{if(e.lengthComputable){fill.style.width=(e.loaded/e.total*100)+'%';}};
-  xhr.onload=()=>{
-    progressBar.remove();
-    if(xhr.status===200){
-      reloadCurrent();
-    }else{
-      alert('Upload failed: '+xhr.responseText);
-    }
-  };
-  xhr.onerror=()=>{
+  const onProgress=p=>{fill.style.width=(p*100)+'%';};
+  try{
+    if(file.size>CHUNKED_UPLOAD_FROM&&window.crypto&&crypto.subtle)await chunkedUpload(brand,file,onProgress);
+    else await formUpload(brand,file,onProgress);
+    afterChange();
+  }catch(e){
+    alert('Upload failed: '+e.message);
+  }finally{
     progressBar.remove();
-    alert('Upload failed!');
-  };
-  xhr.send(fd);
+  }
 }
 
-async function uploadAdditionalLogo(brandName){
+function uploadAdditionalLogo(brandName){
   if(!currentBatch||!adminToken)return;
   const fileInput=document.createElement('input');
   fileInput.type='file';
   fileInput.accept='image/*';
-  fileInput.onchange=async (e)=>{
-    const file=e.target.files[0];
-    if(!file)return;
-    const fd=new FormData();
-    fd.append('file',file);
-    fd.append('brand',brandName);
-    fd.append('batch',currentBatch);
-    const progressBar=document.createElement('div');
-    progressBar.className='progress-bar';
-    progressBar.innerHTML='<div class="progress-fill"></div>';
-    document.body.appendChild(progressBar);
-    progressBar.style.display='block';
-    const fill=progressBar.querySelector('.progress-fill');
-    const xhr=new XMLHttpRequest();
-    xhr.open('POST','/add_brand');
-    xhr.setRequestHeader('X-Admin-Token',adminToken);
-    xhr.upload.onprogress=(e)=>{if(e.lengthComputable){fill.style.width=(e.loaded/e.total*100)+'%';}};
-    xhr.onload=()=>{
-      progressBar.remove();
-      if(xhr.status===200){
-        reloadCurrent();
-      }else{
-        alert('Upload failed: '+xhr.responseText);
-      }
-    };
-    xhr.onerror=()=>{
-      progressBar.remove();
-      alert('Upload failed!');
-    };
-    xhr.send(fd);
-  };
+  fileInput.onchange=e=>uploadLogo(brandName,e.target.files[0]);
   fileInput.click();
 }
 
 async function deleteIndividualLogo(filename){
   if(!confirm('Delete this logo: '+filename+'?'))return;
   const res=await fetch('/delete_logo',{method:'POST',headers:{'Content-Type':'application/json','X-Admin-Token':adminToken},body:JSON.stringify({batch:currentBatch,filename:filename})});
-  if(res.ok)reloadCurrent();else alert('Delete failed');
+  if(res.ok)afterChange();else alert('Delete failed');
 }
 
 async function loadBatch(batch){
   grid.innerHTML='<div style="grid-column:1/-1;color:#888">Loading...</div>';
-  try{const res=await fetch(`/api/logos/${batch}`);brandData=await res.json();renderGrid();}
+  try{
+    if(MIRROR){
+      const listing=await (await fetch(MIRROR.listings[batch])).json();
+      brandData=listing.groups;
+      applyMarks(batch,listing.marks);renderGrid();return;
+    }
+    const [res,marksRes]=await Promise.all([fetch(`/api/logos/${batch}`),fetch(`/api/marks/${batch}`)]);
+    brandData=await res.json();
+    const marks=await marksRes.json();
+    applyMarks(batch,marks);renderGrid();
+    openLiveEvents(batch,res.headers.get('X-Catalog-Version')||'');
+  }
   catch(e){grid.innerHTML='<div style="grid-column:1/-1;color:#888">Failed to load.</div>';}
 }
 
 function renderGrid(){
   const term=searchInput.value.toLowerCase();
   grid.innerHTML='';
-  const list=brandData.filter(b=>!term||b.brand.toLowerCase().includes(term));
+  const view=viewSelect.value;
+  let list=brandData.filter(b=>!term||b.brand.toLowerCase().includes(term));
+  if(view==='tiny')list=list.filter(b=>b.files.some(fn=>isTiny(logoMeta(b,fn))));
+  if(view==='opaque')list=list.filter(b=>b.files.some(fn=>isOpaque(logoMeta(b,fn))));
+  if(view==='smallest')list=list.slice().sort((a,b)=>minSide(a)-minSide(b));
   if(list.length===0){grid.innerHTML='<div style="grid-column:1/-1;color:#888">No logos found.</div>';return;}
   list.forEach(item=>{
     const brandKey=item.brand.replace(/\s+/g,'_');
@@ -306,11 +811,20 @@ function renderGrid(){
       if(doneMap[logoKey])logoItem.classList.add('marked');
       
       const img=document.createElement('img');
-      img.src=`/logos/${currentBatch}/${fn}`;
+      img.src=thumbUrl(item,fn);
+      const meta=logoMeta(item,fn);
+      img.title=fn+(meta?' — '+describeMeta(meta):'');
+      if(isTiny(meta)||isOpaque(meta)){
+        const flag=document.createElement('span');
+        flag.className='logo-flag';
+        flag.textContent=isTiny(meta)?'tiny':'opaque';
+        logoItem.appendChild(flag);
+      }
       img.onclick=()=>{
+        if(MIRROR){window.open(item.urls[fn].logo,'_blank');return;}
         if(!adminToken){alert('Admin login required to mark logos');return;}
         doneMap[logoKey]=!doneMap[logoKey];
-        saveDone();
+        saveDone();syncMark(logoKey);
         logoItem.classList.toggle('marked');
       };
       logoItem.appendChild(img);
@@ -341,7 +855,7 @@ function renderGrid(){
       markBtn.style.background=doneMap[doneKey]?'var(--mark)':'var(--secondary)';
       markBtn.onclick=()=>{
         doneMap[doneKey]=!doneMap[doneKey];
-        saveDone();
+        saveDone();syncMark(doneKey);
         markBtn.textContent=doneMap[doneKey]?'Marked':'Mark All';
         markBtn.style.background=doneMap[doneKey]?'var(--mark)':'var(--secondary)';
         card.classList.toggle('done');
@@ -365,19 +879,52 @@ function renderGrid(){
 async function deleteBrand(name){
   if(!confirm('Delete all logos for '+name+'?'))return;
   const res=await fetch('/delete_brand',{method:'POST',headers:{'Content-Type':'application/json','X-Admin-Token':adminToken},body:JSON.stringify({batch:currentBatch,brand:name})});
-  if(res.ok)reloadCurrent();else alert('Delete failed');
+  if(res.ok)afterChange();else alert('Delete failed');
 }
 
 async function renameBrandPrompt(oldName){
   const newName=prompt('Rename brand:',oldName);
   if(!newName||newName.trim()===oldName)return;
   const res=await fetch('/rename_brand',{method:'POST',headers:{'Content-Type':'application/json','X-Admin-Token':adminToken},body:JSON.stringify({batch:currentBatch,old_key:oldName,new_key:newName})});
-  if(res.ok)reloadCurrent();else alert('Rename failed');
+  if(res.ok)afterChange();else alert('Rename failed');
 }
 
 function filterBrands(){renderGrid();}
+
+async function searchAllBatches(){
+  const term=searchInput.value.trim();
+  if(!term){searchInput.focus();return;}
+  const res=await fetch('/api/search?q='+encodeURIComponent(term));
+  if(!res.ok){alert('Search failed');return;}
+  const result=await res.json();
+  // Results replace the batch grid, so its live updates must not redraw it; picking a result reloads a batch.
+  closeLiveEvents();
+  grid.innerHTML='';
+  const summary=document.createElement('div');
+  summary.style.cssText='grid-column:1/-1;color:#888';
+  const shown=result.batches.reduce((n,b)=>n+b.brands.length,0);
+  summary.textContent=result.total?`${result.total} brand(s) match "${term}"`+(shown<result.total?` - showing the best ${shown}`:''):`No brand matches "${term}" in any batch.`;
+  grid.appendChild(summary);
+  result.batches.forEach(entry=>{
+    const card=document.createElement('div');
+    card.className='card';
+    const title=document.createElement('div');
+    title.className='brandTitle';
+    title.textContent=entry.batch;
+    card.appendChild(title);
+    entry.brands.forEach(b=>{
+      const link=document.createElement('button');
+      link.className='btn';
+      link.style.cssText='display:block;width:100%;margin-top:4px;text-align:left';
+      link.textContent=`${b.brand} (${b.files.length})`;
+      link.onclick=()=>{searchInput.value=b.brand;document.getElementById('batchSelect').value=entry.batch;onBatchChange();};
+      card.appendChild(link);
+    });
+    grid.appendChild(card);
+  });
+}
 function reloadCurrent(){if(currentBatch)loadBatch(currentBatch);}
-function onBatchChange(){currentBatch=document.getElementById('batchSelect').value;if(!currentBatch){grid.innerHTML='<div style="grid-column:1/-1;color:#888">Select a batch to start.</div>';return;}loadBatch(currentBatch);}
+function onBatchChange(){currentBatch=document.getElementById('batchSelect').value;if(!currentBatch){closeLiveEvents();grid.innerHTML='<div style="grid-column:1/-1;color:#888">Select a batch to start.</div>';return;}loadBatch(currentBatch);}
 </script>
 </body>
 </html>
@@ -386,23 +933,126 @@ function onBatchChange(){currentBatch=document.getElementById('batchSelect').val
 # --- Routes ---
 @app.route("/")
 def index():
-    return render_template_string(TEMPLATE, batches=scan_batches())
+    return render_template_string(TEMPLATE, batches=scan_batches(), mirror=None)
 
 @app.route("/api/logos/<path:batch>")
 def api_logos(batch):
     batch_dir = STATIC_LOGOS_ROOT / batch
+    version = CATALOG.version()  # read first: changes made while listing are replayed by the stream
     if not batch_dir.exists(): return jsonify([])
-    fns = [p.name for p in sorted(batch_dir.iterdir()) if p.is_file() and allowed_ext(p.name)]
-    return jsonify(group_by_brand(fns))
+    resp = Response(listing_body(batch_dir), mimetype="application/json")
+    resp.headers["X-Catalog-Version"] = str(version)
+    return resp
+
+@app.route("/api/events/<path:batch>")
+def api_events(batch):
+    last = request.headers.get("Last-Event-ID") or request.args.get("since", "")
+    after = int(last) if last.isdigit() else CATALOG.version()
+    if not _EVENT_SLOTS.acquire(blocking=False):
+        return Response("Too many live streams", 503, headers={"Retry-After": "30"})
+    request.environ["metrics.long_lived"] = True
+    resp = Response(event_stream(batch, after), mimetype="text/event-stream",
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    resp.call_on_close(_EVENT_SLOTS.release)
+    return resp
 
 @app.route("/logos/<path:batch>/<path:filename>")
 def serve_logo(batch, filename):
     batch_dir = STATIC_LOGOS_ROOT / batch
+    pack = loaded_pack(batch_dir) if USE_LOGO_PACKS else None
+    hit = pack.get(filename) if pack else None
+    if hit: return packed_response(filename, *hit)
     if not batch_dir.exists(): return ("Not found", 404)
     requested = safe_join(batch_dir, filename)
     if not requested.exists(): return ("Not found", 404)
     return send_from_directory(str(batch_dir), filename)
 
+@app.route("/thumbs/<path:batch>/<path:filename>")
+def serve_thumb(batch, filename):
+    batch_dir = STATIC_LOGOS_ROOT / batch
+    requested = safe_join(batch_dir, filename)
+    if not requested.is_file(): return serve_logo(batch, filename)
+    row = meta_for(batch_dir).get_many([requested.name]).get(requested.name)
+    st = requested.stat()
+    fresh = row and row["size"] == st.st_size and row["mtime_ns"] == st.st_mtime_ns
+    try:
+        thumb = cached_thumbnail(requested, GRID_BOX, DATA_DIR / "thumb_cache", sha=row["sha256"] if fresh else None)
+    except Exception:  # no cairosvg for an SVG, or an undecodable file: the browser gets the original
+        return serve_logo(batch, filename)
+    # Named by content hash, so a changed logo gets a new ETag
+    return send_file(thumb, mimetype="image/png", etag=thumb.stem, max_age=0, conditional=True)
+
+def packed_response(filename, view, entry):
+    """Serve a slice of the pack; conditional requests are answered before any bytes are touched."""
+    _, _, mtime_ns, etag = entry
+    resp = Response(mimetype=mimetypes.guess_type(filename)[0] or "application/octet-stream")
+    resp.set_etag(etag)
+    resp.last_modified = mtime_ns / 1e9
+    resp.cache_control.no_cache = True
+    resp = resp.make_conditional(request)
+    if resp.status_code == 200:
+        resp.set_data(bytes(view))  # WSGI servers take bytes: the one copy, straight from the map
+    return resp
+
+@app.route("/metrics")
+def metrics():
+    return Response(METRICS.render(), mimetype="text/plain; version=0.0.4")
+
+@app.route("/api/marks/<path:batch>")
+def api_marks(batch):
+    return jsonify(load_marks().get(batch, {}))
+
+@app.route("/api/duplicates")
+def api_duplicates():
+    threshold = request.args.get("threshold", DEFAULT_THRESHOLD, type=int)
+    cross = bool(request.args.get("cross"))
+    clusters = current_dupe_index().clusters(threshold, cross_batch=cross)
+    batch = request.args.get("batch")
+    if batch: clusters = [c for c in clusters if batch in c["batches"]]
+    return jsonify({"threshold": threshold, "cross_batch": cross, "clusters": clusters})
+
+@app.route("/api/near_duplicates")
+def api_near_duplicates():
+    batch = request.args.get("batch", "")
+    filename = request.args.get("filename", "")
+    threshold = request.args.get("threshold", DEFAULT_THRESHOLD, type=int)
+    matches = current_dupe_index().near(batch, filename, threshold)
+    if matches is None: return jsonify({"error": "Logo not indexed"}), 404
+    return jsonify({"batch": batch, "filename": filename, "matches": matches})
+
+@app.route("/api/search")
+def api_search():
+    q = request.args.get("q", "").strip()
+    limit = min(max(request.args.get("limit", SEARCH_LIMIT, type=int), 1), MAX_SEARCH_LIMIT)
+    if not q: return jsonify({"query": q, "total": 0, "batches": []})
+    total, batches = current_catalog_search().search(q, limit)
+    return jsonify({"query": q, "total": total, "batches": batches})
+
+@app.route("/api/brand_suggest")
+def api_brand_suggest():
+    query = request.args.get("q", "").strip()
+    k = max(1, min(request.args.get("k", 8, type=int), 50))
+    if not query: return jsonify([])
+    rows = master_rows()
+    hits = index_for(rows).top_k(query, k=k, min_score=0.2)
+    return jsonify([
+        {"brand": name, "score": score, "logos": [rows[pos][f"Logo{n}"] for n in range(1, 4) if rows[pos].get(f"Logo{n}")]}
+        for score, pos, name in hits
+    ])
+
+@app.route("/export/<path:batch>")
+def export_batch(batch):
+    batch_dir = safe_join(STATIC_LOGOS_ROOT, batch)
+    if not batch_dir.is_dir(): return ("Not found", 404)
+    fns = list_logos(batch_dir)
+    suffix = ""
+    if request.args.get("marked"):
+        fns = marked_files(batch, fns)
+        suffix = "_marked"
+    files = [(batch_dir / fn, fn) for fn in fns]
+    headers = {"Content-Disposition": f'attachment; filename="{batch_dir.name}{suffix}.zip"'}
+    return Response(iter_zip(files), mimetype="application/zip", headers=headers, direct_passthrough=True)
+
 @app.route("/admin_login", methods=["POST"])
 def admin_login():
     data = request.get_json() or {}
@@ -418,6 +1068,25 @@ def admin_logout():
     if token in ADMIN_TOKENS: ADMIN_TOKENS.discard(token)
     return jsonify({"ok": True})
 
+@app.route("/toggle_mark", methods=["POST"])
+def toggle_mark():
+    token = request.headers.get("X-Admin-Token")
+    if token not in ADMIN_TOKENS: return jsonify({"error": "Admin required"}), 401
+    data = request.get_json() or {}
+    batch = data.get("batch", "")
+    key = data.get("key", "")
+    if not batch or not key: return jsonify({"error": "Missing data"}), 400
+    with marks_lock():
+        marks = load_marks()
+        batch_marks = marks.setdefault(batch, {})
+        if data.get("done"):
+            batch_marks[key] = True
+        else:
+            batch_marks.pop(key, None)
+        save_marks(marks)
+    CATALOG.publish(batch, "mark", key=key, done=bool(data.get("done")))
+    return jsonify({"ok": True})
+
 @app.route("/add_brand", methods=["POST"])
 def add_brand():
     token = request.headers.get("X-Admin-Token")
@@ -427,20 +1096,64 @@ def add_brand():
     batch = request.form.get("batch")
     if not file or not brand or not batch:
         return jsonify({"error": "Missing data"}), 400
-    batch_dir = STATIC_LOGOS_ROOT / batch
-    batch_dir.mkdir(exist_ok=True)
-    
-    brand_key = clean_brand_key(brand)
-    existing = [p for p in batch_dir.iterdir() if p.stem.startswith(brand_key)]
-    
-    if len(existing) == 0:
-        filename = f"{brand_key}_logo{Path(file.filename).suffix}"
-    else:
-        next_num = len(existing) + 1
-        filename = f"{brand_key}_logo{next_num}{Path(file.filename).suffix}"
-    
-    file.save(batch_dir / filename)
-    return jsonify({"ok": True, "filename": filename})
+    batch_dir = safe_join(STATIC_LOGOS_ROOT, batch)  # mkdir(parents=True) must not reach outside the root
+    batch_dir.mkdir(parents=True, exist_ok=True)
+    with pack_change(batch_dir):
+        filename = next_logo_filename(batch_dir, brand, Path(file.filename).suffix)
+        file.save(batch_dir / filename)
+        meta = publish_upload(batch, batch_dir, filename)
+    return jsonify({"ok": True, "filename": filename, "meta": public_meta(meta)})
+
+@app.route("/upload/init", methods=["POST"])
+def upload_init():
+    token = request.headers.get("X-Admin-Token")
+    if token not in ADMIN_TOKENS: return jsonify({"error": "Admin required"}), 401
+    data = request.get_json() or {}
+    brand, batch, filename = data.get("brand"), data.get("batch"), data.get("filename") or ""
+    if not brand or not batch or not filename:
+        return jsonify({"error": "Missing data"}), 400
+    if not all(isinstance(v, str) for v in (brand, batch, filename)):
+        return jsonify({"error": "brand, batch and filename must be strings"}), 400
+    if Path(filename).suffix.lower() not in ALLOWED_EXT:
+        return jsonify({"error": "Unsupported file type"}), 400
+    safe_join(STATIC_LOGOS_ROOT, batch)
+    try:
+        return jsonify(UPLOADS.start(batch, brand, filename, data.get("size"), data.get("sha256")))
+    except UploadError as e:
+        return jsonify({"error": str(e)}), e.status
+
+@app.route("/upload/<upload_id>", methods=["GET", "PUT", "DELETE"])
+def upload_chunk(upload_id):
+    token = request.headers.get("X-Admin-Token")
+    if token not in ADMIN_TOKENS: return jsonify({"error": "Admin required"}), 401
+    try:
+        if request.method == "GET":
+            info = UPLOADS.status(upload_id)
+            return jsonify({"offset": info["offset"], "size": info["size"]})
+        if request.method == "DELETE":
+            UPLOADS.discard(upload_id)
+            return jsonify({"ok": True})
+        offset = request.args.get("offset", type=int)
+        if offset is None: return jsonify({"error": "Missing offset"}), 400
+        return jsonify({"offset": UPLOADS.append(upload_id, offset, request.stream)})
+    except UploadError as e:
+        return jsonify({"error": str(e), "offset": e.offset}), e.status
+
+@app.route("/upload/<upload_id>/finalize", methods=["POST"])
+def upload_finalize(upload_id):
+    token = request.headers.get("X-Admin-Token")
+    if token not in ADMIN_TOKENS: return jsonify({"error": "Admin required"}), 401
+    try:
+        info = UPLOADS.status(upload_id)
+        batch_dir = safe_join(STATIC_LOGOS_ROOT, info["batch"])
+        batch_dir.mkdir(parents=True, exist_ok=True)
+        with pack_change(batch_dir):
+            filename = next_logo_filename(batch_dir, info["brand"], Path(info["filename"]).suffix)
+            UPLOADS.finish(upload_id, batch_dir / filename)
+            meta = publish_upload(info["batch"], batch_dir, filename)
+    except UploadError as e:
+        return jsonify({"error": str(e), "offset": e.offset}), e.status
+    return jsonify({"ok": True, "filename": filename, "meta": public_meta(meta)})
 
 @app.route("/delete_logo", methods=["POST"])
 def delete_logo():
@@ -453,7 +1166,11 @@ def delete_logo():
     batch_dir = STATIC_LOGOS_ROOT / batch
     logo_path = safe_join(batch_dir, filename)
     if logo_path.exists():
-        logo_path.unlink()
+        with pack_change(batch_dir):
+            logo_path.unlink()
+            meta_for(batch_dir).pop(logo_path.name)
+            if USE_LOGO_PACKS: logo_pack(batch_dir).remove(logo_path.name)
+        CATALOG.publish(batch, "removed", files=[logo_path.name])
         return jsonify({"ok": True})
     return jsonify({"error": "File not found"}), 404
 
@@ -467,21 +1184,10 @@ def rename_brand():
     new_key = clean_brand_key(data.get("new_key", ""))
     if not batch or not old_key or not new_key:
         return jsonify({"error": "Missing data"}), 400
-    batch_dir = STATIC_LOGOS_ROOT / batch
-    renamed = []
-    counter = 1
-    for p in sorted(batch_dir.iterdir()):
-        if p.is_file() and p.stem.startswith(old_key):
-            suffix = p.suffix
-            if counter == 1:
-                target = batch_dir / f"{new_key}_logo{suffix}"
-            else:
-                target = batch_dir / f"{new_key}_logo{counter}{suffix}"
-            if target.exists():
-                target = batch_dir / f"{new_key}_{uuid.uuid4().int%1000}{suffix}"
-            p.rename(target)
-            renamed.append((p.name, target.name))
-            counter += 1
+    batch_dir = safe_join(STATIC_LOGOS_ROOT, batch)
+    files = brand_index(batch_dir).get(old_key, [])
+    renamed = rename_files(batch_dir, files, new_key)
+    if renamed: CATALOG.publish(batch, "renamed", pairs=renamed)
     return jsonify({"renamed": renamed})
 
 @app.route("/delete_brand", methods=["POST"])
@@ -492,13 +1198,144 @@ def delete_brand():
     batch = data.get("batch", "")
     brand = clean_brand_key(data.get("brand", ""))
     if not batch or not brand: return jsonify({"error": "Missing data"}), 400
-    batch_dir = STATIC_LOGOS_ROOT / batch
-    deleted = []
-    for p in sorted(batch_dir.iterdir()):
-        if p.is_file() and p.stem.startswith(brand):
-            p.unlink()
-            deleted.append(p.name)
+    batch_dir = safe_join(STATIC_LOGOS_ROOT, batch)
+    deleted = brand_index(batch_dir).get(brand, [])
+    remove_files(batch_dir, deleted)
+    if deleted: CATALOG.publish(batch, "removed", files=deleted)
     return jsonify({"deleted": deleted})
 
+def apply_bulk_op(op, batch, indexes):
+    """Apply one rename/delete/move against cached brand indexes; returns the per-op result."""
+    batch = op.get("batch") or batch
+    if not batch: return {"ok": False, "error": "Missing batch"}
+    batch_dir = safe_join(STATIC_LOGOS_ROOT, batch)
+    if batch not in indexes: indexes[batch] = brand_index(batch_dir)
+    index = indexes[batch]
+    kind = op.get("op")
+
+    if kind == "delete" and op.get("filename"):
+        fn = op["filename"]
+        key = brand_key_of(fn)
+        if fn not in index.get(key, []): return {"ok": False, "error": "File not found"}
+        remove_files(batch_dir, [fn])
+        index[key].remove(fn)
+        if not index[key]: del index[key]
+        CATALOG.publish(batch, "removed", files=[fn])
+        return {"ok": True, "deleted": [fn]}
+
+    brand = clean_brand_key(op.get("brand", ""))
+    files = index.get(brand)
+    if not files: return {"ok": False, "error": "Brand not found"}
+
+    if kind == "delete":
+        remove_files(batch_dir, files)
+        del index[brand]
+        CATALOG.publish(batch, "removed", files=files)
+        return {"ok": True, "deleted": files}
+
+    if kind == "rename":
+        new_key = clean_brand_key(op.get("new_brand", ""))
+        if not new_key: return {"ok": False, "error": "Missing new_brand"}
+        renamed = rename_files(batch_dir, files, new_key)
+        del index[brand]
+        for _, target in renamed:
+            index.setdefault(brand_key_of(target), []).append(target)
+        CATALOG.publish(batch, "renamed", pairs=renamed)
+        return {"ok": True, "renamed": renamed}
+
+    if kind == "move":
+        to_batch = op.get("to_batch", "")
+        if not to_batch or to_batch == batch: return {"ok": False, "error": "Missing or same to_batch"}
+        target_dir = safe_join(STATIC_LOGOS_ROOT, to_batch)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        if to_batch not in indexes: indexes[to_batch] = brand_index(target_dir)
+        moved, moved_meta = [], {}
+        src_meta, dst_meta = meta_for(batch_dir), meta_for(target_dir)
+        with pack_change(batch_dir, target_dir):
+            for fn in files:
+                target = move_to_free_name(batch_dir / fn, target_dir, fn, brand)
+                row = src_meta.pop(fn)
+                if row:
+                    dst_meta.put({**row, "filename": target.name})
+                    moved_meta[target.name] = public_meta(row)
+                if USE_LOGO_PACKS:
+                    logo_pack(batch_dir).remove(fn)
+                    logo_pack(target_dir).add(target.name)
+                indexes[to_batch].setdefault(brand_key_of(target.name), []).append(target.name)
+                moved.append((fn, target.name))
+        del index[brand]
+        CATALOG.publish(batch, "removed", files=[fn for fn, _ in moved])
+        CATALOG.publish(to_batch, "added", files=[t for _, t in moved], meta=moved_meta)
+        return {"ok": True, "moved": moved, "to_batch": to_batch}
+
+    return {"ok": False, "error": f"Unknown op: {kind}"}
+
+@app.route("/bulk_ops", methods=["POST"])
+def bulk_ops():
+    token = request.headers.get("X-Admin-Token")
+    if token not in ADMIN_TOKENS: return jsonify({"error": "Admin required"}), 401
+    data = request.get_json() or {}
+    ops = data.get("ops")
+    if not isinstance(ops, list) or not ops: return jsonify({"error": "Missing ops"}), 400
+    if not all(isinstance(op, dict) for op in ops): return jsonify({"error": "Each op must be an object"}), 400
+    indexes = {}
+    results = []
+    for op in ops:
+        # One bad op (unsafe batch name, wrong field type) fails alone; the ops before it already ran.
+        try:
+            result = apply_bulk_op(op, data.get("batch", ""), indexes)
+        except HTTPException as e:
+            result = {"ok": False, "error": e.description}
+        except (OSError, ValueError, TypeError) as e:
+            result = {"ok": False, "error": str(e)}
+        results.append({"op": op.get("op"), **result})
+    return jsonify({"results": results})
+
+@app.route("/admin/jobs", methods=["POST"])
+def start_download_job():
+    token = request.headers.get("X-Admin-Token")
+    if token not in ADMIN_TOKENS: return jsonify({"error": "Admin required"}), 401
+    data = request.get_json() or {}
+    batch, brands = data.get("batch", ""), data.get("brands") or []
+    if not isinstance(batch, str) or not isinstance(brands, list):
+        return jsonify({"error": "batch must be a string and brands a list"}), 400
+    batch = batch.strip()
+    brands = [str(b).strip() for b in brands if str(b).strip()]
+    if not batch or not brands: return jsonify({"error": "Missing batch or brands"}), 400
+    if len(brands) > MAX_JOB_BRANDS: return jsonify({"error": f"At most {MAX_JOB_BRANDS} brands per job"}), 400
+    if safe_join(STATIC_LOGOS_ROOT, batch).parent != STATIC_LOGOS_ROOT.resolve():
+        return jsonify({"error": "Batch must be a folder name"}), 400
+    if not master_rows(): return jsonify({"error": "Master sheet not available"}), 503
+    job_id = JOBS.submit(batch, brands)
+    return jsonify({"id": job_id, "status": f"/admin/jobs/{job_id}"}), 202
+
+@app.route("/admin/jobs")
+def list_download_jobs():
+    token = request.headers.get("X-Admin-Token")
+    if token not in ADMIN_TOKENS: return jsonify({"error": "Admin required"}), 401
+    return jsonify(JOBS.recent_jobs(min(request.args.get("limit", 20, type=int), 100)))
+
+@app.route("/admin/jobs/<int:job_id>")
+def download_job_status(job_id):
+    token = request.headers.get("X-Admin-Token")
+    if token not in ADMIN_TOKENS: return jsonify({"error": "Admin required"}), 401
+    job = JOBS.get(job_id)
+    if job is None: return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
+# Download jobs run on their own pool; finished brands go straight into the live catalog.
+JOBS = DownloadJobs(STATIC_LOGOS_ROOT, master_rows, on_files=publish_downloaded,
+                    path=DATA_DIR / "download_jobs.sqlite")
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reopen_after_fork)
+
+# Bring the metadata sidecars up to date without holding up startup
+# (run_server.py does this itself, before forking: no threads in a process that forks).
+if not PRELOADED:
+    threading.Thread(target=reconcile_meta, name="meta-reconcile", daemon=True).start()
+    if USE_LOGO_PACKS:
+        threading.Thread(target=warm_packs, name="pack-warmup", daemon=True).start()
+
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
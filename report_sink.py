@@ -0,0 +1,133 @@
+"""
+INCREMENTAL REPORT WRITER
+---------------------------------------------------------
+Download reports used to be collected in a list and written to
+Excel only when the whole batch had finished - a crash lost
+everything and nobody could watch progress.
+
+ReportSink appends one row per brand to a JSON-lines (or CSV)
+file the moment the brand completes, tracking column order and
+widths as it goes. finalize() then converts the log to the
+styled .xlsx in a single streaming pass.
+
+Recover the report of a crashed run:
+    python report_sink.py batch_54a_download_report_20251012_1202.jsonl
+"""
+
+import csv
+import json
+import os
+import sys
+from pathlib import Path
+
+MAX_COLUMN_WIDTH = 60
+SHEET_NAME = "Download Report"
+
+
+def _cell_len(value):
+    return len("" if value is None else str(value))
+
+
+class ReportSink:
+    """Append-only report log (.jsonl by default, .csv when `columns` are fixed up front)."""
+
+    def __init__(self, path, columns=None):
+        self.path = Path(path)
+        self.columns = list(columns or [])
+        self.widths = {c: len(c) for c in self.columns}
+        self.rows = 0
+        self._csv = self.path.suffix.lower() == ".csv"
+        if self._csv and not self.columns:
+            raise ValueError("CSV reports need their columns up front")
+        self._f = open(self.path, "w", encoding="utf-8", newline="")
+        if self._csv:
+            self._writer = csv.DictWriter(self._f, fieldnames=self.columns, restval="", extrasaction="ignore")
+            self._writer.writeheader()
+            self._f.flush()
+
+    def append(self, row):
+        """Write one finished brand and flush it to disk."""
+        for key, value in row.items():
+            if key not in self.widths:
+                if self._csv:
+                    continue
+                self.columns.append(key)
+                self.widths[key] = len(key)
+            self.widths[key] = max(self.widths[key], _cell_len(value))
+        if self._csv:
+            self._writer.writerow(row)
+        else:
+            self._f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        self._f.flush()
+        self.rows += 1
+
+    def close(self):
+        if not self._f.closed:
+            self._f.close()
+
+    def finalize(self, xlsx_path, keep_log=False):
+        """Close the log and convert it to a styled .xlsx using the widths tracked while appending."""
+        self.close()
+        write_xlsx(iter_log(self.path), self.columns, self.widths, xlsx_path)
+        if not keep_log:
+            os.remove(self.path)
+        return xlsx_path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def iter_log(path):
+    """Rows of a .jsonl or .csv report log, one at a time."""
+    path = Path(path)
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.suffix.lower() == ".csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def write_xlsx(rows, columns, widths, xlsx_path, sheet_name=SHEET_NAME):
+    """Stream rows into a write-only workbook: bold header, widths set before the first row."""
+    from openpyxl import Workbook
+    from openpyxl.cell import WriteOnlyCell
+    from openpyxl.styles import Font
+    from openpyxl.utils import get_column_letter
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(sheet_name)
+    for i, col in enumerate(columns, 1):
+        ws.column_dimensions[get_column_letter(i)].width = min(widths.get(col, len(col)) + 2, MAX_COLUMN_WIDTH)
+    header = []
+    for col in columns:
+        cell = WriteOnlyCell(ws, value=col)
+        cell.font = Font(bold=True)
+        header.append(cell)
+    ws.append(header)
+    for row in rows:
+        ws.append([row.get(col) for col in columns])
+    wb.save(xlsx_path)
+    return xlsx_path
+
+
+def convert_log(log_path, xlsx_path=None):
+    """Convert a leftover log (e.g. from a crashed run): one pass for widths, one to write."""
+    columns, widths = [], {}
+    for row in iter_log(log_path):
+        for key, value in row.items():
+            if key not in widths:
+                columns.append(key)
+                widths[key] = len(key)
+            widths[key] = max(widths[key], _cell_len(value))
+    xlsx_path = xlsx_path or str(Path(log_path).with_suffix(".xlsx"))
+    return write_xlsx(iter_log(log_path), columns, widths, xlsx_path)
+
+
+if __name__ == "__main__":
+    for log in sys.argv[1:]:
+        print(f"✓ {log} → {convert_log(log)}")
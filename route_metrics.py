@@ -0,0 +1,306 @@
+"""
+ROUTE METRICS
+---------------------------------------------------------
+WSGI middleware for the editor that keeps, per Flask route:
+  - a latency histogram
+  - a response-size histogram
+  - response counts by status code
+plus the number of requests in flight, and renders them in
+Prometheus text format for a /metrics endpoint.
+
+Requests slower than `slow_ms` are logged with a breakdown:
+  dispatch - WSGI entry until the view starts (routing, hooks)
+  handler  - the view itself
+  body     - streaming the response after the view returned
+
+Kept cheap for the logo hot path: one lock per request, no URL
+matching of our own (the route comes from Flask's url_rule), and
+responses that carry a Content-Length (every logo, JSON, page)
+are passed through untouched - so servers still get their
+wsgi.file_wrapper. Only streamed bodies (ZIP export) are wrapped
+to count bytes and time the stream. Views that hold a stream open
+on purpose (SSE) set environ["metrics.long_lived"] and are never
+reported as slow.
+
+Under run_server.py every worker process keeps its own counters.
+Given a `spool_dir`, each worker also writes them to
+<spool_dir>/<pid>.json (at most every FLUSH_SECONDS, and on every
+scrape), and render() sums all the files - so a scrape shows the
+whole server whichever worker answers it. Files of exited workers
+stay, so counters never go backwards; their in-flight gauge is
+dropped. The master clears the folder when it starts.
+"""
+
+import json
+import logging
+import os
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+UNMATCHED = "<unmatched>"  # 404s share one label so random URLs can't blow up cardinality
+PREFIX = "editor_http"
+FLUSH_SECONDS = 1.0
+
+log = logging.getLogger("route_metrics")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+
+
+class _Histogram:
+    __slots__ = ("counts", "total", "n")
+
+    def __init__(self, buckets):
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, buckets, value):
+        self.counts[bisect_left(buckets, value)] += 1
+        self.total += value
+        self.n += 1
+
+
+class _CountingBody:
+    """Wraps a streamed response body to count bytes and record the request when it is closed."""
+
+    def __init__(self, metrics, environ, captured, body, t0, t_app):
+        self.metrics, self.environ, self.captured = metrics, environ, captured
+        self.body, self.t0, self.t_app = body, t0, t_app
+        self.size = 0
+
+    def __iter__(self):
+        for chunk in self.body:
+            self.size += len(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            if hasattr(self.body, "close"):
+                self.body.close()
+        finally:
+            self.metrics._finish(self.environ, self.captured.get("status", "500"), self.size,
+                                 self.t0, self.t_app, perf_counter())
+
+
+class RouteMetrics:
+    """Wrap `app.wsgi_app`; see install() for the Flask wiring."""
+
+    def __init__(self, wsgi_app, slow_ms=None, spool_dir=None):
+        self.wsgi_app = wsgi_app
+        self.slow_ms = slow_ms
+        self.spool_dir = spool_dir
+        self._lock = threading.Lock()
+        self._flush_timer = None
+        self.in_flight = 0
+        self.latency = {}
+        self.sizes = {}
+        self.statuses = {}
+
+    def __call__(self, environ, start_response):
+        t0 = perf_counter()
+        with self._lock:
+            self.in_flight += 1
+        captured = {}
+
+        def _start_response(status, headers, exc_info=None):
+            captured["status"] = status[:3]
+            for name, value in headers:
+                if name.lower() == "content-length":
+                    captured["length"] = int(value)
+            return start_response(status, headers, exc_info)
+
+        try:
+            body = self.wsgi_app(environ, _start_response)
+        except Exception:
+            now = perf_counter()
+            self._finish(environ, "500", 0, t0, now, now)
+            raise
+        t_app = perf_counter()
+        if "length" in captured:
+            self._finish(environ, captured["status"], captured["length"], t0, t_app, t_app)
+            return body
+        return _CountingBody(self, environ, captured, body, t0, t_app)
+
+    def _finish(self, environ, status, size, t0, t_app, t_end):
+        route = environ.get("metrics.route") or UNMATCHED
+        method = environ.get("REQUEST_METHOD", "GET")
+        elapsed = t_end - t0
+        key = (route, method)
+        with self._lock:
+            self.in_flight -= 1
+            hist = self.latency.get(key)
+            if hist is None:
+                hist = self.latency[key] = _Histogram(LATENCY_BUCKETS)
+                self.sizes[key] = _Histogram(SIZE_BUCKETS)
+            hist.observe(LATENCY_BUCKETS, elapsed)
+            self.sizes[key].observe(SIZE_BUCKETS, size)
+            skey = (route, method, status)
+            self.statuses[skey] = self.statuses.get(skey, 0) + 1
+            if self.spool_dir is not None and self._flush_timer is None:
+                self._flush_timer = threading.Timer(FLUSH_SECONDS, self.flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+        if self.slow_ms is not None and elapsed * 1000 >= self.slow_ms and not environ.get("metrics.long_lived"):
+            self._log_slow(environ, route, method, status, size, t0, t_app, t_end)
+
+    def _log_slow(self, environ, route, method, status, size, t0, t_app, t_end):
+        started = environ.get("metrics.handler_start")
+        handler = environ.get("metrics.handler_s")
+        parts = []
+        if started is not None:
+            parts.append(f"dispatch {(started - t0) * 1000:.1f} ms")
+        if handler is not None:
+            parts.append(f"handler {handler * 1000:.1f} ms")
+        parts.append(f"body {(t_end - t_app) * 1000:.1f} ms")
+        path = environ.get("PATH_INFO", "")
+        query = environ.get("QUERY_STRING")
+        log.warning("🐢 SLOW %s %s%s [%s] %s %.1f ms (%s) %d bytes",
+                    method, path, f"?{query}" if query else "", route, status,
+                    (t_end - t0) * 1000, ", ".join(parts), size)
+
+    # ---------- across worker processes ----------
+    def _snapshot(self):
+        with self._lock:
+            self._flush_timer = None
+            return {
+                "latency": {k: (list(h.counts), h.total, h.n) for k, h in self.latency.items()},
+                "sizes": {k: (list(h.counts), h.total, h.n) for k, h in self.sizes.items()},
+                "statuses": dict(self.statuses),
+                "in_flight": self.in_flight,
+            }
+
+    def flush(self):
+        """Write this process's counters to <spool_dir>/<pid>.json."""
+        snap = self._snapshot()
+        doc = {
+            "latency": [[*k, *v] for k, v in snap["latency"].items()],
+            "sizes": [[*k, *v] for k, v in snap["sizes"].items()],
+            "statuses": [[*k, v] for k, v in snap["statuses"].items()],
+            "in_flight": snap["in_flight"],
+        }
+        os.makedirs(self.spool_dir, exist_ok=True)
+        path = os.path.join(self.spool_dir, f"{os.getpid()}.json")
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(doc, f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def clear_spool(self):
+        """Forget the counters of earlier server runs (run_server.py's master, before it forks)."""
+        if self.spool_dir is None or not os.path.isdir(self.spool_dir):
+            return
+        for name in os.listdir(self.spool_dir):
+            try:
+                os.unlink(os.path.join(self.spool_dir, name))
+            except OSError:
+                pass
+
+    def after_fork(self):
+        """A forked worker starts from zero, with its own lock and no inherited flush timer."""
+        self._lock = threading.Lock()
+        self._flush_timer = None
+        self.in_flight = 0
+        self.latency, self.sizes, self.statuses = {}, {}, {}
+
+    def _merged(self):
+        """Every worker's counters summed; in-flight only from workers still running."""
+        self.flush()
+        merged = {"latency": {}, "sizes": {}, "statuses": {}, "in_flight": 0}
+        for name in os.listdir(self.spool_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.spool_dir, name), encoding="utf-8") as f:
+                    doc = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for kind in ("latency", "sizes"):
+                for route, method, counts, total, n in doc[kind]:
+                    have = merged[kind].get((route, method))
+                    if have is None:
+                        merged[kind][(route, method)] = (counts, total, n)
+                    else:
+                        merged[kind][(route, method)] = ([a + b for a, b in zip(have[0], counts)],
+                                                         have[1] + total, have[2] + n)
+            for route, method, status, count in doc["statuses"]:
+                key = (route, method, status)
+                merged["statuses"][key] = merged["statuses"].get(key, 0) + count
+            if _alive(int(name[:-5])):
+                merged["in_flight"] += doc["in_flight"]
+        return merged
+
+    # ---------- Prometheus text format ----------
+    def render(self):
+        snap = self._merged() if self.spool_dir is not None else self._snapshot()
+        latency, sizes = snap["latency"], snap["sizes"]
+        statuses, in_flight = snap["statuses"], snap["in_flight"]
+        lines = []
+        self._render_hist(lines, f"{PREFIX}_request_duration_seconds",
+                          "Request latency by route.", LATENCY_BUCKETS, latency)
+        self._render_hist(lines, f"{PREFIX}_response_size_bytes",
+                          "Response body size by route.", SIZE_BUCKETS, sizes)
+        lines.append(f"# HELP {PREFIX}_responses_total Responses by route and status code.")
+        lines.append(f"# TYPE {PREFIX}_responses_total counter")
+        for (route, method, status), count in sorted(statuses.items()):
+            lines.append(f"{PREFIX}_responses_total{{{_labels(route=route, method=method, status=status)}}} {count}")
+        lines.append(f"# HELP {PREFIX}_requests_in_flight Requests currently being served.")
+        lines.append(f"# TYPE {PREFIX}_requests_in_flight gauge")
+        # the scrape itself is in flight while rendering
+        lines.append(f"{PREFIX}_requests_in_flight {in_flight}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _render_hist(lines, name, help_text, buckets, data):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for (route, method), (counts, total, n) in sorted(data.items()):
+            labels = _labels(route=route, method=method)
+            running = 0
+            for bound, count in zip(list(buckets) + ["+Inf"], counts):
+                running += count
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {running}')
+            lines.append(f"{name}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{name}_count{{{labels}}} {n}")
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        pass  # exists, owned by someone else
+    return True
+
+
+def install(app, slow_ms=None, spool_dir=None):
+    """Wrap a Flask app's WSGI callable and tag each request with its route. Returns the RouteMetrics."""
+    from flask import request
+
+    @app.before_request
+    def _metrics_route():
+        env = request.environ
+        if request.url_rule is not None:
+            env["metrics.route"] = request.url_rule.rule
+        env["metrics.handler_start"] = perf_counter()
+
+    @app.after_request
+    def _metrics_handler_time(response):
+        env = request.environ
+        started = env.get("metrics.handler_start")
+        if started is not None:
+            env["metrics.handler_s"] = perf_counter() - started
+        return response
+
+    metrics = RouteMetrics(app.wsgi_app, slow_ms, spool_dir)
+    app.wsgi_app = metrics
+    return metrics
@@ -1,6 +1,229 @@
-from waitress import serve
-from logo_preview_editor import app
+"""
+PRE-FORKING SERVER RUNNER
+---------------------------------------------------------
+Runs the editor as N waitress worker processes (T threads each)
+sharing one listening socket, so throughput scales with cores
+instead of one GIL.
+
+The master imports the app and WARMS the catalog before any
+worker exists: metadata sidecars reconciled, packs built, every
+batch listing rendered to JSON, master sheet and duplicate index
+loaded. It then freezes the heap (gc.freeze) and forks - workers
+share all of that copy-on-write, read-only, and the first request
+after a deploy is as fast as the thousandth. Each worker opens its
+own SQLite connections after the fork.
+
+Signals (to the master):
+  SIGHUP         rolling restart: re-warm, then replace workers one
+                 at a time - a new worker is serving before an old
+                 one is told to stop
+  SIGTERM/INT    graceful stop: workers stop accepting, finish their
+                 requests and download jobs (up to GRACE_SECONDS),
+                 then exit; unfinished jobs are marked 'interrupted'
+
+Workers re-fork from the master, so a rolling restart picks up new
+data, not new code - restart the master for a deploy. /metrics
+answers for all workers together (see route_metrics.py).
+
+    python run_server.py                          # WEB_WORKERS x WEB_THREADS
+    python run_server.py --workers 4 --threads 32 --port 8000
+    kill -HUP <master pid>
+
+Without os.fork (Windows) it falls back to one waitress process.
+"""
+
+import argparse
+import gc
+import os
+import select
+import signal
+import socket
+import sys
+import time
+import traceback
+
+HOST = "0.0.0.0"
+PORT = int(os.environ.get("PORT", "5000"))
+WORKERS = int(os.environ.get("WEB_WORKERS", os.cpu_count() or 2))
+# Each live-update stream (SSE) holds a thread; MAX_EVENT_STREAMS (per worker) stays below this
+THREADS = int(os.environ.get("WEB_THREADS", "32"))
+BACKLOG = 1024
+GRACE_SECONDS = 30          # in-flight requests (and open SSE streams) get this long on stop
+READY_TIMEOUT = 60          # a new worker must be serving within this, or the restart is aborted
+
+
+def listen(host, port):
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(BACKLOG)
+    return sock
+
+
+def _busy(server, jobs):
+    dispatcher = server.task_dispatcher
+    return (dispatcher.active_count or dispatcher.queue or jobs.in_flight()
+            or any(ch.requests for ch in server.active_channels.values()))
+
+
+def run_worker(app, jobs, sock, threads, ready_fd):
+    """Serve until SIGTERM, then drain: stop accepting, let running requests and download jobs finish, exit.
+
+    Jobs still running at the deadline are marked 'interrupted' before the process goes.
+    """
+    from waitress.server import create_server
+
+    for sig in (signal.SIGHUP, signal.SIGINT):
+        signal.signal(sig, signal.SIG_IGN)
+    server = create_server(app, sockets=[sock], threads=threads, backlog=BACKLOG)
+    state = {"deadline": None}
+
+    def stop(*_):
+        if state["deadline"] is None:
+            state["deadline"] = time.monotonic() + GRACE_SECONDS
+            server.del_channel()  # no more accepts here; the other workers keep the socket
+            server.pull_trigger()
+
+    signal.signal(signal.SIGTERM, stop)
+    os.write(ready_fd, b"1")
+    os.close(ready_fd)
+    while state["deadline"] is None or (_busy(server, jobs) and time.monotonic() < state["deadline"]):
+        server.asyncore.loop(timeout=1.0, map=server._map, use_poll=True, count=1)
+    jobs.interrupt_own()
+    os._exit(0)
+
+
+class Master:
+    def __init__(self, app, jobs, sock, workers, threads, warm):
+        self.app, self.jobs, self.sock = app, jobs, sock
+        self.size, self.threads, self.warm = workers, threads, warm
+        self.workers = set()
+        self.pending = []
+
+    def spawn(self):
+        """Fork one worker and wait until it is serving. Returns its pid (None if it never got ready)."""
+        r, w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(r)
+            try:
+                run_worker(self.app, self.jobs, self.sock, self.threads, w)
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                os._exit(1)
+        os.close(w)
+        ready, _, _ = select.select([r], [], [], READY_TIMEOUT)
+        ok = bool(ready) and os.read(r, 1) == b"1"
+        os.close(r)
+        if not ok:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            return None
+        self.workers.add(pid)
+        return pid
+
+    def reap(self):
+        """Collect exited workers; returns how many died without being asked to."""
+        died = 0
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            if pid in self.workers:
+                self.workers.discard(pid)
+                died += 1
+                print(f"⚠️  worker {pid} exited ({status}), replacing it")
+        if died:
+            self.jobs.sweep_orphans()  # download jobs that died with it
+        return died
+
+    def stop_worker(self, pid, wait=True):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        self.workers.discard(pid)
+        if wait:
+            deadline = time.monotonic() + GRACE_SECONDS + 5
+            while time.monotonic() < deadline:
+                if os.waitpid(pid, os.WNOHANG)[0]:
+                    return
+                time.sleep(0.1)
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+
+    def warm_and_freeze(self):
+        started = time.perf_counter()
+        self.warm()
+        gc.collect()
+        gc.freeze()  # objects built so far never get GC-touched, so forked workers keep sharing their pages
+        print(f"🔥 Catalog warmed in {time.perf_counter() - started:.1f}s")
+
+    def rolling_restart(self):
+        print("🔄 Rolling restart")
+        gc.unfreeze()
+        self.warm_and_freeze()
+        for old in list(self.workers):
+            if self.spawn() is None:
+                print("❌ New worker did not come up - keeping the old ones")
+                return
+            self.stop_worker(old)
+        print(f"✅ {len(self.workers)} worker(s) replaced")
+
+    def run(self):
+        def on_signal(sig, _frame):
+            self.pending.append(sig)
+
+        for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, on_signal)
+        self.warm_and_freeze()
+        while len(self.workers) < self.size:
+            if self.spawn() is None:
+                sys.exit("❌ Worker failed to start")
+        print(f"🚀 {self.size} worker(s) x {self.threads} threads on {self.sock.getsockname()} (master {os.getpid()})")
+        while True:
+            time.sleep(0.5)
+            for _ in range(self.reap()):
+                self.spawn()
+            while self.pending:
+                sig = self.pending.pop(0)
+                if sig == signal.SIGHUP:
+                    self.rolling_restart()
+                else:
+                    print("🛑 Stopping workers")
+                    for pid in list(self.workers):
+                        self.stop_worker(pid, wait=False)
+                    deadline = time.monotonic() + GRACE_SECONDS + 5
+                    while time.monotonic() < deadline:
+                        try:
+                            os.waitpid(-1, 0)
+                        except ChildProcessError:
+                            return
+                    return
+
 
 if __name__ == "__main__":
-    print("🚀 Running Flask on production WSGI server (Waitress)...")
-    serve(app, host="0.0.0.0", port=5000)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Serve the logo editor from pre-forked waitress workers.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--threads", type=int, default=THREADS)
+    args = parser.parse_args()
+
+    if not hasattr(os, "fork"):
+        from waitress import serve
+        from logo_preview_editor import app
+        print("🚀 Running Flask on production WSGI server (Waitress)...")
+        serve(app, host=args.host, port=args.port, threads=args.threads)
+        sys.exit()
+
+    os.environ["LOGO_EDITOR_PRELOAD"] = "1"  # no background threads in the master: it forks
+    import logo_preview_editor as editor
+
+    editor.METRICS.clear_spool()  # /metrics sums the workers' counter files; start from zero with the master
+    listener = listen(args.host, args.port)
+    Master(editor.app, editor.JOBS, listener, args.workers, args.threads, editor.warm_catalog).run()
@@ -0,0 +1,202 @@
+"""
+STATIC MIRROR EXPORT
+---------------------------------------------------------
+Writes a read-only copy of the editor that any static file
+server (nginx, S3/CloudFront, GitHub Pages, `python -m
+http.server`) can serve, so reviewers never touch Flask and the
+Python process is left with admin traffic only:
+
+  index.html                  the editor page in read-only mode
+  listings/<batch>.<hash>.json brand groups, metadata and marks
+  thumbs/<sha>_240x200.png    grid thumbnails (shared thumb cache)
+  logos/<sha><ext>            originals, opened when a logo is clicked
+
+Every name except index.html carries a content hash, so those
+files can be cached forever (Cache-Control: immutable) and only
+index.html needs revalidating. Text files (HTML, JSON, SVG) also
+get pre-compressed .gz (and .br with the `brotli` package)
+siblings for servers that serve them directly (nginx gzip_static
+/ brotli_static).
+
+Re-running the export only writes what changed: logos and thumbs
+already in the mirror are skipped by name, listings and the
+index are rewritten only when their bytes differ. Files no
+longer referenced are removed afterwards (--no-prune keeps them) -
+only inside listings/, thumbs/, logos/ and index.html*. The first
+export writes a .logo-mirror marker; a non-empty folder without one
+is refused.
+
+    python static_export.py mirror/
+    python static_export.py mirror/ --batch batch_54a --batch batch_54c
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+
+from logo_meta import meta_for, public_meta
+from thumb_cache import GRID_BOX, cached_thumbnail
+import logo_preview_editor as editor
+
+FINGERPRINT_LEN = 20          # hex chars of the SHA-256 kept in file names
+MARKER = ".logo-mirror"       # written on the first export; only folders carrying it are updated or pruned
+MIRROR_DIRS = ("listings", "thumbs", "logos")
+COMPRESS_EXT = {".html", ".json", ".svg"}
+MIN_COMPRESS_BYTES = 1024     # smaller files gain nothing from a compressed sibling
+
+
+def _write_if_changed(path, data):
+    """Atomically write `data` unless the file already holds exactly it. Returns True when written."""
+    try:
+        if path.stat().st_size == len(data) and path.read_bytes() == data:
+            return False
+    except FileNotFoundError:
+        pass
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+    return True
+
+
+def _compressed(path, data, written):
+    """Write .gz/.br siblings for compressible text; returns the names it refers to."""
+    if path.suffix.lower() not in COMPRESS_EXT or len(data) < MIN_COMPRESS_BYTES:
+        return []
+    variants = [(path.with_name(path.name + ".gz"), lambda: gzip.compress(data, 9, mtime=0))]
+    try:
+        import brotli
+        variants.append((path.with_name(path.name + ".br"), lambda: brotli.compress(data)))
+    except ImportError:
+        pass
+    names = []
+    for target, compress in variants:
+        if written or not target.exists():
+            _write_if_changed(target, compress())
+        names.append(target)
+    return names
+
+
+class MirrorWriter:
+    """Tracks every file the export refers to, so the rest can be pruned."""
+
+    def __init__(self, out_dir):
+        self.out = Path(out_dir)
+        self.keep = set()
+        self.written = 0
+        self.skipped = 0
+
+    def rel(self, path):
+        return path.relative_to(self.out).as_posix()
+
+    def put_bytes(self, rel_path, data):
+        path = self.out / rel_path
+        written = _write_if_changed(path, data)
+        self.written += written
+        self.skipped += not written
+        self.keep.add(path)
+        self.keep.update(_compressed(path, data, written))
+        return rel_path
+
+    def put_file(self, rel_path, source):
+        """Copy a content-addressed file: an existing one with this name is already right."""
+        path = self.out / rel_path
+        self.keep.add(path)
+        if path.exists():
+            self.skipped += 1
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            shutil.copyfile(source, tmp)
+            os.replace(tmp, path)
+            self.written += 1
+        if path.suffix.lower() in COMPRESS_EXT:
+            data = path.read_bytes()
+            self.keep.update(_compressed(path, data, False))
+        return rel_path
+
+    def claim(self):
+        """Refuse a non-empty folder that is not already a mirror, so a typo can't point prune at real files."""
+        marker = self.out / MARKER
+        if self.out.exists() and not marker.exists() and any(self.out.iterdir()):
+            raise SystemExit(f"❌ {self.out} is not empty and has no {MARKER} marker - pick an empty or mirror folder")
+        self.out.mkdir(parents=True, exist_ok=True)
+        marker.touch()
+
+    def prune(self):
+        """Remove files the export no longer refers to - only inside the mirror's own folders and index.html*."""
+        candidates = [p for p in self.out.glob("index.html*") if p.is_file()]
+        for name in MIRROR_DIRS:
+            candidates += sorted((self.out / name).rglob("*"), reverse=True)
+        removed = 0
+        for path in candidates:
+            if path.is_file() and path not in self.keep:
+                path.unlink()
+                removed += 1
+            elif path.is_dir() and not any(path.iterdir()):
+                path.rmdir()
+        return removed
+
+
+def export_batch(writer, batch, marks):
+    """Copy one batch's logos and thumbnails; returns the listing's relative path."""
+    batch_dir = editor.STATIC_LOGOS_ROOT / batch
+    meta_store = meta_for(batch_dir)
+    meta_store.reconcile(editor.ALLOWED_EXT)  # fresh hashes: they become the file names
+    meta = meta_store.all()
+    groups = editor.group_by_brand(editor.list_logos(batch_dir))
+    for group in groups:
+        group["meta"], group["urls"] = {}, {}
+        for fn in group["files"]:
+            row = meta.get(fn)
+            if row is None:
+                continue
+            source = batch_dir / fn
+            sha = row["sha256"]
+            logo = writer.put_file(f"logos/{sha[:FINGERPRINT_LEN]}{source.suffix.lower()}", source)
+            try:
+                thumb_src = cached_thumbnail(source, GRID_BOX, sha=sha)
+                thumb = writer.put_file(f"thumbs/{sha[:FINGERPRINT_LEN]}_{GRID_BOX[0]}x{GRID_BOX[1]}.png", thumb_src)
+            except Exception:  # e.g. an SVG without cairosvg: the browser shows the original
+                thumb = logo
+            group["meta"][fn] = public_meta(row)
+            group["urls"][fn] = {"thumb": thumb, "logo": logo}
+        group["files"] = [fn for fn in group["files"] if fn in group["urls"]]
+    groups = [g for g in groups if g["files"]]
+    data = json.dumps({"groups": groups, "marks": marks.get(batch, {})},
+                      separators=(",", ":"), sort_keys=True).encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()[:FINGERPRINT_LEN]
+    return writer.put_bytes(f"listings/{batch}.{digest}.json", data), sum(len(g["files"]) for g in groups)
+
+
+def export_mirror(out_dir, batches=None, prune=True):
+    writer = MirrorWriter(out_dir)
+    writer.claim()
+    batches = batches or editor.scan_batches()
+    marks = editor.load_marks()
+    listings = {}
+    for batch in batches:
+        listings[batch], count = export_batch(writer, batch, marks)
+        print(f"   🗂️  {batch}: {count} logos → {listings[batch]}")
+    with editor.app.app_context():
+        html = editor.render_template_string(editor.TEMPLATE, batches=batches, mirror={"listings": listings})
+    # Written last: until now the old index keeps pointing at a complete set of files.
+    writer.put_bytes("index.html", html.encode("utf-8"))
+    removed = writer.prune() if prune else 0
+    return writer.written, writer.skipped, removed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a static, read-only mirror of the logo editor.")
+    parser.add_argument("out_dir", help="mirror folder (created if missing)")
+    parser.add_argument("--batch", action="append", help="only this batch (repeatable)")
+    parser.add_argument("--no-prune", action="store_true", help="keep files the new export no longer uses")
+    args = parser.parse_args()
+
+    print(f"📦 Exporting static mirror to {args.out_dir}")
+    written, skipped, removed = export_mirror(args.out_dir, args.batch, prune=not args.no_prune)
+    print(f"\n✅ {written} file(s) written, {skipped} unchanged, {removed} removed")
@@ -0,0 +1,92 @@
+"""
+THUMBNAIL CACHE
+---------------------------------------------------------
+Resamples logos once to a fixed box (e.g. the 150x100 Excel
+cell) and keeps the result under data/thumb_cache, keyed by
+the SHA-256 of the source bytes. The same logo in several
+batches - or the same batch exported twice - is resampled
+only once.
+
+SVG logos are rasterized ONCE per content hash to a standard
+size (SVG_RASTER_SIZE on the longest side); every box - the
+Excel cell, the editor grid - is resampled from that PNG, so
+no vector file is ever rendered twice. The Excel exporter and
+the editor's /thumbs route share the same cache.
+
+REQUIREMENTS: pip install pillow
+              pip install cairosvg   (only for SVG logos)
+"""
+
+import os
+import threading
+from pathlib import Path
+
+from logo_meta import file_sha256, probe_svg, sniff_svg
+
+CACHE_DIR = Path(__file__).parent / "data" / "thumb_cache"
+EXCEL_BOX = (150, 100)
+GRID_BOX = (240, 200)       # editor grid tiles (120x100 CSS px at 2x)
+SVG_RASTER_SIZE = 1024      # longest side of the one raster made from each SVG
+
+
+def cache_path(sha, box, cache_dir=CACHE_DIR):
+    return Path(cache_dir) / f"{sha}_{box[0]}x{box[1]}.png"
+
+
+def svg_raster_path(sha, cache_dir=CACHE_DIR):
+    return Path(cache_dir) / f"{sha}_svg{SVG_RASTER_SIZE}.png"
+
+
+def is_svg(path):
+    path = Path(path)
+    return path.suffix.lower() == ".svg" or sniff_svg(path)
+
+
+def _tmp_for(out):
+    """Private temp name per process AND thread: /thumbs renders from many request threads at once."""
+    return out.with_name(f"{out.stem}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+
+def rasterize_svg(path, sha=None, cache_dir=CACHE_DIR):
+    """Path of the cached PNG rendering of an SVG, rendered on first use only. Needs cairosvg."""
+    import cairosvg
+
+    out = svg_raster_path(sha or file_sha256(path), cache_dir)
+    if out.exists():
+        return out
+    out.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        _, width, height, _ = probe_svg(path)
+    except Exception:
+        width = height = None
+    # Give cairosvg only the longest side; it keeps the aspect ratio.
+    size = {"output_height": SVG_RASTER_SIZE} if width and height and height > width \
+        else {"output_width": SVG_RASTER_SIZE}
+    tmp = _tmp_for(out)
+    cairosvg.svg2png(bytestring=Path(path).read_bytes(), write_to=str(tmp), **size)
+    os.replace(tmp, out)
+    return out
+
+
+def cached_thumbnail(path, box=EXCEL_BOX, cache_dir=CACHE_DIR, sha=None):
+    """Path of a PNG no larger than `box`, resampled from `path` on first use only.
+
+    `sha` skips hashing the file when the caller already knows it (metadata sidecar).
+    """
+    from PIL import Image
+
+    sha = sha or file_sha256(path)
+    out = cache_path(sha, box, cache_dir)
+    if out.exists():
+        return out
+    source = rasterize_svg(path, sha, cache_dir) if is_svg(path) else path
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with Image.open(source) as img:
+        img.seek(0)
+        has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+        thumb = img.convert("RGBA" if has_alpha else "RGB")
+        thumb.thumbnail(box, Image.LANCZOS)
+        tmp = _tmp_for(out)
+        thumb.save(tmp, "PNG", optimize=True)
+    os.replace(tmp, out)
+    return out
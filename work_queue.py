@@ -0,0 +1,352 @@
+"""
+DOWNLOAD WORK QUEUE
+---------------------------------------------------------
+Spreads a download run over any number of worker processes, on
+this machine or on others that share the storage.
+
+Every logo URL becomes one task (batch, brand, LogoN, url) in a
+SQLite queue file. Workers LEASE a task, download and verify it
+exactly like logo_lookup_multi.py, rename it into the batch folder
+and mark it done. A worker that dies mid-task simply lets its
+lease run out and the task goes back to the queue; failed
+downloads are retried with backoff up to MAX_ATTEMPTS times.
+Images rejected by verification are final - retrying won't help.
+
+Batch folders are created next to the queue file, so put the
+queue on the shared storage:
+
+    python work_queue.py enqueue --queue /mnt/logos/queue.sqlite --batch 54a --batch 54c
+    python work_queue.py work    --queue /mnt/logos/queue.sqlite --threads 8    # on every box
+    python work_queue.py status  --queue /mnt/logos/queue.sqlite
+    python work_queue.py report  --queue /mnt/logos/queue.sqlite --batch 54a
+
+Enqueueing is idempotent: re-running it only adds brands and
+logos that are not queued yet, and re-queues logos whose URL (or
+matched name) changed in the master sheet since they were queued -
+deleting the file the old URL produced. A Logo<n> emptied in the
+sheet marks its task 'removed' and deletes its file, as
+logo_lookup_multi.py does (--retry-failed also puts failed tasks back). The shared storage must support file locking
+(SQLite's rules for network filesystems apply); the queue uses a
+rollback journal rather than WAL so it works across machines.
+"""
+
+import argparse
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+from logo_lookup_multi import (BATCH_MANIFEST, CLIENT_LOGO_FILE, MIN_LOGO_HEIGHT, MIN_LOGO_WIDTH, DownloadBudget,
+                               batch_id, clean_filename, describe, download_image, find_best_match,
+                               get_file_extension, load_manifest, load_master, place_verified, select_batches)
+from logo_meta import meta_for, verify_image
+from report_sink import ReportSink
+
+QUEUE_FILE = Path(__file__).parent / "data" / "download_queue.sqlite"
+LEASE_SECONDS = 120       # a task whose worker went quiet this long is handed out again
+MAX_ATTEMPTS = 4          # download attempts before a task is marked failed
+RETRY_BASE_SECONDS = 30   # backoff: 30 s, 60 s, 120 s ...
+IDLE_SECONDS = 5          # poll interval while other workers still hold leases
+WORKER_THREADS = 4
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS brands (
+    batch      TEXT NOT NULL,
+    brand      TEXT NOT NULL,
+    matched_as TEXT,
+    match_type TEXT,
+    PRIMARY KEY (batch, brand)
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    id           INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch        TEXT NOT NULL,
+    brand        TEXT NOT NULL,
+    n            INTEGER NOT NULL,
+    url          TEXT NOT NULL,
+    folder       TEXT NOT NULL,
+    file_stem    TEXT NOT NULL,
+    state        TEXT NOT NULL DEFAULT 'pending',
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    available_at REAL NOT NULL DEFAULT 0,
+    lease_owner  TEXT,
+    lease_until  REAL,
+    result       TEXT,
+    filename     TEXT,
+    UNIQUE (batch, brand, n)
+);
+CREATE INDEX IF NOT EXISTS tasks_ready ON tasks (state, available_at);
+"""
+
+
+class WorkQueue:
+    """One queue file. Every method is a short transaction, so many processes can share it."""
+
+    def __init__(self, path=QUEUE_FILE):
+        self.path = Path(path).resolve()
+        self.root = self.path.parent
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), timeout=60, isolation_level=None, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._db.executescript(_SCHEMA)
+
+    @contextmanager
+    def _tx(self):
+        """BEGIN IMMEDIATE: take the write lock up front so two workers never claim the same task."""
+        with self._lock:
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._db
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            self._db.execute("COMMIT")
+
+    # ---------- producer ----------
+    def enqueue(self, batches, master, retry_failed=False):
+        """Match every brand once and queue one task per logo URL. Returns (brands, tasks) added or changed."""
+        brands = tasks = 0
+        obsolete = []  # (folder, filename) of files the sheet no longer asks for
+        with self._tx() as db:
+            for batch, brand_list in batches.items():
+                folder = f"batch_{batch}_logos"
+                for brand in brand_list:
+                    row, match_type, matched_name = find_best_match(brand, master)
+                    cur = db.execute("INSERT INTO brands VALUES (?, ?, ?, ?) ON CONFLICT (batch, brand) DO UPDATE "
+                                     "SET matched_as = excluded.matched_as, match_type = excluded.match_type "
+                                     "WHERE matched_as IS NOT excluded.matched_as",
+                                     (batch, brand, matched_name, match_type))
+                    brands += cur.rowcount
+                    queued = {n: (url, file_stem, filename) for n, url, file_stem, filename in db.execute(
+                        "SELECT n, url, file_stem, filename FROM tasks WHERE batch = ? AND brand = ?", (batch, brand))}
+                    stem = f"{clean_filename(matched_name)}_logo" if row is not None else None
+                    for n in range(1, 4):
+                        url = str(row.get(f'Logo{n}', '')).strip() if row is not None else ''
+                        old = queued.get(n)
+                        if not url or url.lower() == 'nan':
+                            # Logo<n> was emptied (or the brand lost its match): drop the task and its file
+                            if old:
+                                cur = db.execute("UPDATE tasks SET state = 'removed', result = 'REMOVED: no URL in sheet', "
+                                                 "filename = NULL, lease_owner = NULL, lease_until = NULL "
+                                                 "WHERE batch = ? AND brand = ? AND n = ? AND state != 'removed'",
+                                                 (batch, brand, n))
+                                tasks += cur.rowcount
+                                if old[2]: obsolete.append((folder, old[2]))
+                            continue
+                        if old and old[2] and (old[0] != url or old[1] != f"{stem}{n}"):
+                            obsolete.append((folder, old[2]))  # replaced by the re-queued download
+                        # a changed sheet row sends its finished task back to the queue
+                        cur = db.execute("INSERT INTO tasks (batch, brand, n, url, folder, file_stem) "
+                                         "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (batch, brand, n) DO UPDATE "
+                                         "SET url = excluded.url, file_stem = excluded.file_stem, state = 'pending', "
+                                         "attempts = 0, available_at = 0, result = NULL, filename = NULL, "
+                                         "lease_owner = NULL, lease_until = NULL "
+                                         "WHERE tasks.url != excluded.url OR tasks.file_stem != excluded.file_stem "
+                                         "   OR tasks.state = 'removed'",
+                                         (batch, brand, n, url, folder, f"{stem}{n}"))
+                        tasks += cur.rowcount
+            if retry_failed and batches:  # "IN ()" is a syntax error in SQLite
+                cur = db.execute("UPDATE tasks SET state = 'pending', attempts = 0, available_at = 0 "
+                                 "WHERE state = 'failed' AND batch IN (%s)" % ",".join("?" * len(batches)),
+                                 list(batches))
+                tasks += cur.rowcount
+        for folder, filename in obsolete:
+            path = self.root / folder / filename
+            if path.exists():
+                path.unlink()
+                meta_for(path.parent).pop(filename)
+        return brands, tasks
+
+    # ---------- worker ----------
+    def claim(self, owner):
+        """Lease the next ready task (pending, or leased by a worker that went quiet)."""
+        now = time.time()
+        with self._tx() as db:
+            # a task that keeps taking its worker down with it stops coming back
+            db.execute("UPDATE tasks SET state = 'failed', result = 'LEASE EXPIRED', lease_owner = NULL "
+                       "WHERE state = 'leased' AND lease_until < ? AND attempts >= ?", (now, MAX_ATTEMPTS))
+            found = db.execute("SELECT id, batch, url, folder, file_stem, attempts FROM tasks "
+                               "WHERE (state = 'pending' AND available_at <= ?) "
+                               "   OR (state = 'leased' AND lease_until < ?) "
+                               "ORDER BY id LIMIT 1", (now, now)).fetchone()
+            if found is None:
+                return None
+            db.execute("UPDATE tasks SET state = 'leased', lease_owner = ?, lease_until = ?, attempts = attempts + 1 "
+                       "WHERE id = ?", (owner, now + LEASE_SECONDS, found[0]))
+        task_id, batch, url, folder, file_stem, attempts = found
+        return {"id": task_id, "batch": batch, "url": url, "folder": self.root / folder,
+                "file_stem": file_stem, "attempt": attempts + 1}
+
+    def extend(self, task_id, owner):
+        """Renew a lease; False when it already ran out and someone else took the task."""
+        with self._tx() as db:
+            cur = db.execute("UPDATE tasks SET lease_until = ? WHERE id = ? AND lease_owner = ? AND state = 'leased'",
+                             (time.time() + LEASE_SECONDS, task_id, owner))
+        return cur.rowcount == 1
+
+    def complete(self, task_id, owner, state, result, filename=None):
+        with self._tx() as db:
+            db.execute("UPDATE tasks SET state = ?, result = ?, filename = ?, lease_owner = NULL, lease_until = NULL "
+                       "WHERE id = ? AND lease_owner = ?", (state, result, filename, task_id, owner))
+
+    def retry_later(self, task_id, owner, attempt, result):
+        """Back off and put the task back, or fail it for good after MAX_ATTEMPTS."""
+        state = "failed" if attempt >= MAX_ATTEMPTS else "pending"
+        delay = RETRY_BASE_SECONDS * 2 ** (attempt - 1)
+        with self._tx() as db:
+            db.execute("UPDATE tasks SET state = ?, result = ?, available_at = ?, lease_owner = NULL, "
+                       "lease_until = NULL WHERE id = ? AND lease_owner = ?",
+                       (state, result, time.time() + delay, task_id, owner))
+        return state
+
+    def outstanding(self):
+        """Tasks still pending or leased (a worker keeps polling while there are any)."""
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM tasks WHERE state IN ('pending', 'leased')").fetchone()[0]
+
+    # ---------- reporting ----------
+    def status(self):
+        """{batch: {state: count}}"""
+        with self._lock:
+            rows = self._db.execute("SELECT batch, state, COUNT(*) FROM tasks GROUP BY batch, state").fetchall()
+        out = {}
+        for batch, state, count in rows:
+            out.setdefault(batch, {})[state] = count
+        return out
+
+    def report_rows(self, batch):
+        """Download-report rows in the same shape as logo_lookup_multi's reports."""
+        with self._lock:
+            brands = self._db.execute("SELECT brand, matched_as, match_type FROM brands WHERE batch = ? "
+                                      "ORDER BY rowid", (batch,)).fetchall()
+            tasks = self._db.execute("SELECT brand, n, state, result, filename FROM tasks WHERE batch = ? "
+                                     "ORDER BY n", (batch,)).fetchall()
+        by_brand = {}
+        for brand, n, state, result, filename in tasks:
+            by_brand.setdefault(brand, []).append((n, state, result, filename))
+        rows = []
+        for brand, matched_as, match_type in brands:
+            if matched_as is None:
+                rows.append({'Brand': brand, 'Matched_As': 'NOT FOUND'})
+                continue
+            logos = by_brand.get(brand, [])
+            downloaded = [fn for _, state, _, fn in logos if state == 'done']
+            row = {'Brand': brand, 'Matched_As': matched_as, 'Match_Type': match_type,
+                   'Downloaded': ', '.join(downloaded) if downloaded else 'None'}
+            for n, state, result, _ in logos:
+                row[f'Logo{n}_Check'] = result if state in ('done', 'rejected', 'failed', 'removed') else state.upper()
+            rows.append(row)
+        return rows
+
+
+def process(queue, task, owner, budget):
+    """Download, verify and place one leased task."""
+    folder = task["folder"]
+    folder.mkdir(parents=True, exist_ok=True)
+    ext = get_file_extension(task["url"])
+    # Unique per lease: a worker that lost its lease can't clobber the new holder's download.
+    part_path = folder / f"{task['file_stem']}{ext}.{task['id']}-{uuid.uuid4().hex[:8]}.part"
+    if not download_image(task["url"], part_path, budget):
+        state = queue.retry_later(task["id"], owner, task["attempt"], "FAILED")
+        return f"❌ {task['file_stem']}: download failed (attempt {task['attempt']}, {state})"
+    if not queue.extend(task["id"], owner):
+        os.remove(part_path)
+        return f"⚠️  {task['file_stem']}: lease lost, result dropped"
+    meta_row, reason = verify_image(part_path, MIN_LOGO_WIDTH, MIN_LOGO_HEIGHT)
+    if reason:
+        os.remove(part_path)
+        queue.complete(task["id"], owner, "rejected", f"REJECTED: {reason}")
+        return f"❌ {task['file_stem']}: rejected - {reason}"
+    file_path = place_verified(part_path, folder / task["file_stem"], ext, meta_row, meta_for(folder))
+    queue.complete(task["id"], owner, "done", describe(meta_row), file_path.name)
+    return f"✓ {task['batch']}: {file_path.name} ({describe(meta_row)})"
+
+
+def work(queue_path, threads=WORKER_THREADS, connections=None):
+    """Drain the queue with `threads` claimers; returns once nothing is pending or leased."""
+    owner_prefix = f"{socket.gethostname()}:{os.getpid()}"
+    budget = DownloadBudget(connections or threads)
+    print_lock = threading.Lock()
+    counts = {"tasks": 0}
+
+    def loop(i):
+        queue = WorkQueue(queue_path)  # one connection per thread
+        owner = f"{owner_prefix}:{i}"
+        while True:
+            task = queue.claim(owner)
+            if task is None:
+                if not queue.outstanding():
+                    return
+                time.sleep(IDLE_SECONDS)  # others hold leases; pick up theirs if they die
+                continue
+            try:
+                line = process(queue, task, owner, budget)
+            except Exception as e:
+                state = queue.retry_later(task["id"], owner, task["attempt"], f"ERROR: {e}")
+                line = f"❌ {task['file_stem']}: {e} ({state})"
+            with print_lock:
+                counts["tasks"] += 1
+                print(f"[{owner}] {line}")
+
+    workers = [threading.Thread(target=loop, args=(i,), name=f"queue-worker-{i}") for i in range(threads)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return counts["tasks"]
+
+
+# =========================================================
+# ---------------------- MAIN ENTRY -----------------------
+# =========================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Distributed logo downloads through a shared SQLite queue.")
+    parser.add_argument("--queue", default=str(QUEUE_FILE), help="queue file (batch folders go next to it)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_enqueue = sub.add_parser("enqueue", help="queue the logos of the batches in a manifest")
+    p_enqueue.add_argument("--manifest", default=BATCH_MANIFEST)
+    p_enqueue.add_argument("--sheet")
+    p_enqueue.add_argument("--batch", action="append", help="only this batch (repeatable)")
+    p_enqueue.add_argument("--retry-failed", action="store_true", help="also put failed tasks back")
+    p_work = sub.add_parser("work", help="drain the queue")
+    p_work.add_argument("--threads", type=int, default=WORKER_THREADS)
+    p_work.add_argument("--connections", type=int, help="simultaneous downloads in this process (default: threads)")
+    sub.add_parser("status", help="task counts per batch and state")
+    p_report = sub.add_parser("report", help="write the .xlsx download report of a batch")
+    p_report.add_argument("--batch", required=True, type=batch_id)
+    args = parser.parse_args()
+
+    if args.command == "enqueue":
+        if not Path(args.manifest).exists() or not Path(CLIENT_LOGO_FILE).exists():
+            print(f"❌ ERROR: {args.manifest} or {CLIENT_LOGO_FILE} not found in this folder.")
+            exit()
+        try:
+            batches = select_batches(load_manifest(args.manifest, args.sheet), args.batch)
+        except ValueError as e:
+            print(f"❌ ERROR: {e}")
+            exit(1)
+        brands, tasks = WorkQueue(args.queue).enqueue(batches, load_master(CLIENT_LOGO_FILE), args.retry_failed)
+        print(f"📥 {len(batches)} batch(es): {brands} new brand(s), {tasks} task(s) queued in {args.queue}")
+
+    elif args.command == "work":
+        done = work(args.queue, args.threads, args.connections)
+        print(f"\n🎉 Queue drained - this worker handled {done} task(s)")
+
+    elif args.command == "status":
+        for batch, states in sorted(WorkQueue(args.queue).status().items()):
+            print(f"   {batch}: " + ", ".join(f"{state} {count}" for state, count in sorted(states.items())))
+
+    elif args.command == "report":
+        rows = WorkQueue(args.queue).report_rows(args.batch)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M")
+        report_name = f"batch_{args.batch}_download_report_{timestamp}.xlsx"
+        report = ReportSink(Path(report_name).with_suffix(".jsonl"))
+        for row in rows:
+            report.append(row)
+        report.finalize(report_name)
+        print(f"📊 {len(rows)} brand(s) → {report_name}")